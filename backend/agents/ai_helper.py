@@ -2,43 +2,115 @@
 ai_helper.py – Multi-provider AI helper for VidyaGuide AI
 Priority order: Gemini → OpenAI → Groq (xAI)
 Falls back to the next provider on rate-limit, quota, or invalid-key errors.
-"""
 
-import requests as req
-from pathlib import Path
+All provider calls share one pooled keep-alive httpx.AsyncClient that is
+opened/closed by the FastAPI lifespan (see startup()/shutdown()).
+"""
 
-# ── Endpoints ──────────────────────────────────────────────────────────────
-GEMINI_BASE = "https://generativelanguage.googleapis.com/v1beta/models"
-OPENAI_BASE = "https://api.openai.com/v1/chat/completions"
-GROK_BASE   = "https://api.groq.com/openai/v1/chat/completions"
+import asyncio
+import contextvars
+import json
+import math
+import time
+import anyio.to_thread
+import httpx
+from agents.health import health
+from agents.llm_cache import cache, prompt_key, route_ttl
+from agents.llm_scheduler import STANDARD, LLMOverloaded, route_priority, scheduler
+from agents import metrics
+from agents.prompt_budget import estimate_tokens
+from agents.semantic_cache import semantic_cache
+from agents.providers import Provider, registry
 
-GEMINI_MODELS = [
-    "gemini-2.0-flash",
-    "gemini-1.5-flash",
-    "gemini-1.5-flash-8b",
-]
-OPENAI_MODEL = "gpt-4o-mini"
-GROK_MODEL   = "llama-3.1-8b-instant"  # llama3-8b-8192 is decommissioned
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
 
 # Status codes / error strings that mean "try next provider"
 _SKIP_CODES   = {400, 401, 403, 429}
 _SKIP_REASONS = {"API_KEY_INVALID", "INVALID_ARGUMENT", "PERMISSION_DENIED"}
 
+# ── Hedging defaults (override in .env) ─────────────────────────────────────
+# Routes whose calls fire a backup request at the next provider when the
+# primary is slower than its usual HEDGE_PERCENTILE latency. Opt-in: none by
+# default, since a hedge can double the upstream calls of a route. Enable per
+# route, e.g. HEDGE_ROUTES=/api/interview/start,/api/interview/next-question
+HEDGE_ROUTES: set  = set()
+HEDGE_PERCENTILE   = 0.9
+HEDGE_DEFAULT_WAIT = 3.0    # seconds, used until the primary has enough samples
+HEDGE_MAX_INFLIGHT = 4      # cap on concurrent backup requests app-wide
+_hedges_in_flight  = 0
+
+# ── Shared HTTP client ─────────────────────────────────────────────────────
+_client: httpx.AsyncClient | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+# ── Single-flight ──────────────────────────────────────────────────────────
+# Identical in-flight prompts share one upstream call. Sync handlers are
+# covered too: run_sync() schedules their calls onto the same app loop.
+_inflight: dict = {}   # (loop, prompt key) → task of the shared upstream call
+_flight_stats = {"upstream": 0, "coalesced": 0}
+
+
+def _new_client() -> httpx.AsyncClient:
+    """Connection-pooled client; keeps TLS sessions to each provider alive."""
+    return httpx.AsyncClient(
+        http2=_HTTP2,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60),
+        timeout=httpx.Timeout(25.0, connect=5.0),
+    )
+
+
+async def startup() -> None:
+    """Open the shared client on the app's event loop (called from lifespan)."""
+    global _client, _loop
+    if _client is None:
+        _client = _new_client()
+    _loop = asyncio.get_running_loop()
+    scheduler.bind(_loop)
+    cache.purge_expired()
+
+
+async def shutdown() -> None:
+    """Close the shared client and drop its pooled connections."""
+    global _client, _loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _loop = None
+    scheduler.bind(None)
 
-# ── Key reader ─────────────────────────────────────────────────────────────
-def _read_env() -> dict:
-    """Parse backend/.env and return key→value dict (always fresh from disk)."""
-    env_path = Path(__file__).parent.parent / ".env"
-    keys: dict = {}
-    try:
-        for line in env_path.read_text(encoding="utf-8").splitlines():
-            line = line.strip()
-            if "=" in line and not line.startswith("#"):
-                k, v = line.split("=", 1)
-                keys[k.strip()] = v.strip()
-    except Exception:
-        pass
-    return keys
+
+# Why the last provider attempt in this task failed (read when the chain moves on)
+_failure_reason: contextvars.ContextVar = contextvars.ContextVar("_failure_reason", default=None)
+
+
+def _record_success(provider: Provider, model: str, start: float) -> None:
+    latency = time.perf_counter() - start
+    health.record_success(provider.name, model, latency)
+    metrics.provider_calls.inc(provider.name, model, "ok")
+    metrics.provider_latency.observe(latency, provider.name, model)
+
+
+def _record_failure(provider: Provider, model: str, start: float, reason, exc: Exception | None = None) -> None:
+    """reason: HTTP status code, "timeout" or "error" (with the exception that caused it)."""
+    latency = time.perf_counter() - start
+    health.record_failure(provider.name, model, latency, reason)
+    metrics.provider_calls.inc(provider.name, model, str(reason))
+    metrics.provider_latency.observe(latency, provider.name, model)
+    if exc is not None:
+        metrics.provider_errors.inc(provider.name, model, type(exc).__name__)
+    _failure_reason.set(reason)
+
+
+async def _acquire_rate(provider: Provider, prompt: str, priority: int) -> float | None:
+    """Rate budget for one model attempt (see llm_scheduler.acquire_rate); None → out of budget."""
+    reserved = await scheduler.acquire_rate(provider.name, prompt, priority)
+    if reserved is None:
+        _failure_reason.set("rate_limited")
+    return reserved
 
 
 def _should_fallback(status_code: int, data: dict) -> bool:
@@ -54,94 +126,430 @@ def _should_fallback(status_code: int, data: dict) -> bool:
 
 
 # ── Provider helpers ────────────────────────────────────────────────────────
-def _try_gemini(prompt: str, api_key: str) -> str | None:
-    """Try all Gemini models. Returns answer text, or None to fall through."""
-    for model in GEMINI_MODELS:
+async def _try_gemini(client: httpx.AsyncClient, provider: Provider, prompt: str,
+                      priority: int = STANDARD) -> str | None:
+    """Try all healthy Gemini models. Returns answer text, or None to fall through."""
+    for model in provider.models:
+        if not health.available(provider.name, model):
+            continue  # breaker open → don't pay the timeout again
+        reserved = await _acquire_rate(provider, prompt, priority)
+        if reserved is None:
+            return None  # the budget is per provider → later models can't fit either
+        start = time.perf_counter()
+        text = None
         try:
-            url = f"{GEMINI_BASE}/{model}:generateContent?key={api_key}"
+            url = f"{provider.base_url}/{model}:generateContent?key={provider.api_key}"
             payload = {"contents": [{"parts": [{"text": prompt}]}]}
-            r = req.post(url, json=payload, timeout=8)  # fail fast on bad key
+            r = await client.post(url, json=payload, timeout=provider.timeout)
             data = r.json()
 
             if r.status_code == 200:
-                return data["candidates"][0]["content"]["parts"][0]["text"]
+                text = data["candidates"][0]["content"]["parts"][0]["text"]
+                _record_success(provider, model, start)
+                return text
 
+            _record_failure(provider, model, start, r.status_code)
             if _should_fallback(r.status_code, data):
+                if r.status_code == 429:
+                    continue  # quota is per model → try the next one
                 # Same key will fail on all models → bail out entirely
                 return None
 
-        except Exception:
-            pass  # network error → try next provider
+        except httpx.TimeoutException:
+            _record_failure(provider, model, start, "timeout")
+        except Exception as e:
+            # network error / malformed payload → try next model
+            _record_failure(provider, model, start, "error", e)
+        finally:
+            scheduler.settle_rate(provider.name, reserved, prompt, text)
 
     return None  # all models exhausted / skipped
 
 
-def _try_openai_compat(
-    prompt: str,
-    api_key: str,
-    base_url: str,
-    model: str,
-    provider_name: str,
-) -> str | None:
+async def _try_openai_compat(client: httpx.AsyncClient, provider: Provider, prompt: str,
+                             priority: int = STANDARD) -> str | None:
     """Try an OpenAI-compatible endpoint. Returns answer text, or None to fall through."""
+    model = provider.models[0]
+    if not health.available(provider.name, model):
+        return None  # breaker open → don't pay the timeout again
+    reserved = await _acquire_rate(provider, prompt, priority)
+    if reserved is None:
+        return None
+    start = time.perf_counter()
+    text = None
     try:
         headers = {
-            "Authorization": f"Bearer {api_key}",
+            "Authorization": f"Bearer {provider.api_key}",
             "Content-Type": "application/json",
         }
         payload = {
             "model": model,
             "messages": [{"role": "user", "content": prompt}],
         }
-        timeout = 25 if "groq" in base_url else 10
-        r = req.post(base_url, headers=headers, json=payload, timeout=timeout)
+        r = await client.post(provider.base_url, headers=headers, json=payload, timeout=provider.timeout)
         data = r.json()
 
         if r.status_code == 200:
-            return data["choices"][0]["message"]["content"]
+            text = data["choices"][0]["message"]["content"]
+            _record_success(provider, model, start)
+            return text
 
+        _record_failure(provider, model, start, r.status_code)
         if _should_fallback(r.status_code, data):
             return None  # try next provider
 
         # Unexpected error — surface it
         msg = data.get("error", {}).get("message", str(data))
-        return f"AI Error ({provider_name}): {msg}"
+        return f"AI Error ({provider.name}): {msg}"
 
+    except httpx.TimeoutException:
+        _record_failure(provider, model, start, "timeout")
+        return None
     except Exception as e:
+        _record_failure(provider, model, start, "error", e)
         return None  # network issue → try next provider
+    finally:
+        scheduler.settle_rate(provider.name, reserved, prompt, text)
 
 
-# ── Public API ──────────────────────────────────────────────────────────────
-def ask_gemini(prompt: str) -> str:
-    """
-    Send a prompt through the AI provider chain:
-        Gemini 2.0/1.5 → OpenAI GPT-4o-mini → Groq Llama3
-    Returns the first successful response, or a user-friendly error.
-    """
-    env = _read_env()
+# Wire protocol → caller; add a kind here to plug in a new provider type
+_CALLERS = {
+    "gemini": _try_gemini,
+    "openai": _try_openai_compat,
+}
 
-    # 1️⃣  Gemini
-    gemini_key = env.get("GEMINI_API_KEY", "").strip()
-    if gemini_key:
-        result = _try_gemini(prompt, gemini_key)
-        if result is not None:
-            return result
 
-    # 2️⃣  OpenAI
-    openai_key = env.get("OPENAI_API_KEY", "").strip()
-    if openai_key:
-        result = _try_openai_compat(prompt, openai_key, OPENAI_BASE, OPENAI_MODEL, "OpenAI")
-        if result is not None:
-            return result
+async def _call_provider(client: httpx.AsyncClient, provider: Provider, prompt: str, priority: int) -> str | None:
+    """One provider's attempts (each within its rate limits); None to fall through."""
+    _failure_reason.set(None)
+    result = await _CALLERS[provider.kind](client, provider, prompt, priority)
+    if result is None:
+        # No attempt recorded → every model was skipped on an open breaker
+        metrics.fallbacks.inc(provider.name, str(_failure_reason.get() or "breaker_open"))
+    return result
+
 
-    # 3️⃣  Groq (your gsk_ key)
-    grok_key = env.get("GROK_API_KEY", "").strip()
-    if grok_key:
-        result = _try_openai_compat(prompt, grok_key, GROK_BASE, GROK_MODEL, "Groq")
+async def _call_chain(client: httpx.AsyncClient, providers: list, prompt: str,
+                      priority: int = STANDARD) -> str | None:
+    for provider in providers:
+        result = await _call_provider(client, provider, prompt, priority)
         if result is not None:
             return result
+    return None
+
+
+def _hedge_settings() -> tuple:
+    routes = registry.get("HEDGE_ROUTES")
+    routes = {r.strip() for r in routes.split(",") if r.strip()} if routes else HEDGE_ROUTES
+    try:
+        percentile = float(registry.get("HEDGE_PERCENTILE") or HEDGE_PERCENTILE)
+        max_inflight = int(registry.get("HEDGE_MAX_INFLIGHT") or HEDGE_MAX_INFLIGHT)
+    except ValueError:
+        percentile, max_inflight = HEDGE_PERCENTILE, HEDGE_MAX_INFLIGHT
+    return routes, percentile, max_inflight
+
+
+async def _call_hedged(client: httpx.AsyncClient, providers: list, prompt: str,
+                       percentile: float, max_inflight: int, priority: int = STANDARD) -> str | None:
+    """
+    Start the primary provider; if it hasn't answered by its observed
+    latency percentile, race the rest of the chain against it and keep
+    whichever answers first (the loser is cancelled).
+    """
+    global _hedges_in_flight
+    primary, rest = providers[0], providers[1:]
+    primary_task = asyncio.create_task(_call_provider(client, primary, prompt, priority))
+    wait = health.latency_percentile(primary.name, percentile) or HEDGE_DEFAULT_WAIT
+    done, _ = await asyncio.wait({primary_task}, timeout=wait)
+
+    if done or _hedges_in_flight >= max_inflight:
+        result = await primary_task
+        return result if result is not None else await _call_chain(client, rest, prompt, priority)
+
+    _hedges_in_flight += 1
+    backup_task = asyncio.create_task(_call_chain(client, rest, prompt, priority))
+    pending = {primary_task, backup_task}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                if result is not None:
+                    return result
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+        _hedges_in_flight -= 1
+
+
+async def _run_chain(client: httpx.AsyncClient, prompt: str, route: str = "", hedge: bool | None = None,
+                     priority: int = STANDARD) -> str:
+    # Healthy providers first, fastest first; open breakers are skipped
+    providers = health.rank(registry.providers())
+    routes, percentile, max_inflight = _hedge_settings()
+    if hedge is None:
+        hedge = route in routes
+
+    if hedge and len(providers) > 1:
+        result = await _call_hedged(client, providers, prompt, percentile, max_inflight, priority)
+    else:
+        result = await _call_chain(client, providers, prompt, priority)
+    if result is not None:
+        return result
+
+    wait = scheduler.rate_wait([p.name for p in providers], prompt, priority)
+    if wait is not None:   # every provider is out of rate budget, not failing
+        raise LLMOverloaded(math.ceil(wait), "provider rate limits")
 
     return (
         "AI Error: All AI providers failed or are rate-limited. "
         "Please check your API keys in backend/.env and try again."
     )
+
+
+# ── Streaming ───────────────────────────────────────────────────────────────
+class _StreamUnavailable(Exception):
+    """Raised before the first token so the chain can fall through."""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _gemini_stream_request(provider: Provider, model: str, prompt: str) -> dict:
+    return {
+        "url": f"{provider.base_url}/{model}:streamGenerateContent?alt=sse&key={provider.api_key}",
+        "json": {"contents": [{"parts": [{"text": prompt}]}]},
+    }
+
+
+def _openai_stream_request(provider: Provider, model: str, prompt: str) -> dict:
+    return {
+        "url": provider.base_url,
+        "headers": {"Authorization": f"Bearer {provider.api_key}", "Content-Type": "application/json"},
+        "json": {"model": model, "messages": [{"role": "user", "content": prompt}], "stream": True},
+    }
+
+
+def _gemini_stream_text(event: dict) -> str:
+    parts = event.get("candidates", [{}])[0].get("content", {}).get("parts", [])
+    return "".join(p.get("text", "") for p in parts)
+
+
+def _openai_stream_text(event: dict) -> str:
+    choices = event.get("choices") or [{}]
+    return choices[0].get("delta", {}).get("content") or ""
+
+
+# Wire protocol → (request builder, SSE chunk → text, models to try)
+_STREAMERS = {
+    "gemini": (_gemini_stream_request, _gemini_stream_text, lambda p: p.models),
+    "openai": (_openai_stream_request, _openai_stream_text, lambda p: p.models[:1]),
+}
+
+
+async def _stream_model(client: httpx.AsyncClient, provider: Provider, model: str, prompt: str):
+    """Yield text chunks from one provider/model; _StreamUnavailable if nothing was produced."""
+    build, extract, _ = _STREAMERS[provider.kind]
+    start = time.perf_counter()
+    started = False
+    try:
+        async with client.stream("POST", timeout=provider.timeout, **build(provider, model, prompt)) as r:
+            if r.status_code != 200:
+                await r.aread()
+                _record_failure(provider, model, start, r.status_code)
+                raise _StreamUnavailable(r.status_code)
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                text = extract(json.loads(data))
+                if text:
+                    started = True
+                    yield text
+        if not started:
+            raise _StreamUnavailable("empty")
+        _record_success(provider, model, start)
+    except _StreamUnavailable:
+        raise
+    except Exception as e:
+        reason = "timeout" if isinstance(e, httpx.TimeoutException) else "error"
+        _record_failure(provider, model, start, reason, None if reason == "timeout" else e)
+        if not started:
+            raise _StreamUnavailable(reason)
+        yield "\n\n[AI Error: response stream was interrupted]"
+
+
+async def _stream_chain(client: httpx.AsyncClient, prompt: str, priority: int = STANDARD):
+    for provider in health.rank(registry.providers()):
+        models = [m for m in _STREAMERS[provider.kind][2](provider) if health.available(provider.name, m)]
+        if not models:
+            metrics.fallbacks.inc(provider.name, "breaker_open")
+            continue
+        reason = "empty"
+        for model in models:
+            reserved = await _acquire_rate(provider, prompt, priority)
+            if reserved is None:
+                reason = "rate_limited"
+                break  # no rate budget left → next provider
+            streamed = []
+            try:
+                async for chunk in _stream_model(client, provider, model, prompt):
+                    streamed.append(chunk)
+                    yield chunk
+                return
+            except _StreamUnavailable as e:
+                reason = e.reason
+                if e.reason in (400, 401, 403):
+                    break  # bad key / request → same for every model of this provider
+            finally:
+                scheduler.settle_rate(provider.name, reserved, prompt, "".join(streamed))
+        metrics.fallbacks.inc(provider.name, str(reason))
+    yield (
+        "AI Error: All AI providers failed or are rate-limited. "
+        "Please check your API keys in backend/.env and try again."
+    )
+
+
+# ── Public API ──────────────────────────────────────────────────────────────
+async def _single_flight(prompt: str, route: str, call):
+    """Await `call()` — or, if the same normalized prompt is already in flight, its result."""
+    loop = asyncio.get_running_loop()
+    key = (loop, prompt_key(prompt))
+    task = _inflight.get(key)
+    if task is None:
+        task = loop.create_task(call())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+        _flight_stats["upstream"] += 1
+        metrics.llm_requests.inc(route, "upstream")
+    else:
+        _flight_stats["coalesced"] += 1
+        metrics.llm_requests.inc(route, "coalesced")
+    # Shielded so one caller going away doesn't cancel the call for the rest
+    return await asyncio.shield(task)
+
+
+def single_flight_snapshot() -> dict:
+    calls = _flight_stats["upstream"] + _flight_stats["coalesced"]
+    return {
+        **_flight_stats,
+        "in_flight": len(_inflight),
+        "coalesced_rate": round(_flight_stats["coalesced"] / calls, 3) if calls else 0.0,
+    }
+
+
+async def ask_gemini_async(prompt: str, route: str = "", hedge: bool | None = None,
+                           cache_fields: dict | None = None, refresh: bool = False,
+                           priority: int | None = None) -> str:
+    """
+    Send a prompt through the AI provider chain (see agents/providers.py):
+        Gemini 2.0/1.5 → OpenAI GPT-4o-mini → Groq Llama3
+    Returns the first successful response, or a user-friendly error.
+    `route` is the calling endpoint's path; it selects per-route policies
+    such as hedging (on for HEDGE_ROUTES unless `hedge` is given) and the
+    response-cache TTL (see agents/llm_cache.py). `cache_fields` holds the
+    variable parts of the prompt for near-duplicate lookups
+    (see agents/semantic_cache.py). `refresh=True` skips the cache lookups
+    but still stores the new response. Concurrent calls with the same
+    normalized prompt share one upstream request.
+    Upstream calls go through the scheduler (see agents/llm_scheduler.py)
+    in the route's priority class unless `priority` is given; raises
+    LLMOverloaded when it has no capacity.
+    """
+    if priority is None:
+        priority = route_priority(route)
+    ttl = route_ttl(route)
+    semantic = bool(ttl and cache_fields and semantic_cache.enabled(route))
+    if ttl and not refresh:
+        cached = cache.get_memory(prompt)
+        if cached is None:   # SQLite tier stays off the event loop
+            cached = await anyio.to_thread.run_sync(cache.get_disk, prompt)
+        if cached is not None:
+            metrics.llm_requests.inc(route, "exact_cache")
+            return cached
+        cached = semantic_cache.get(route, cache_fields) if semantic else None
+        if cached is not None:
+            metrics.llm_requests.inc(route, "semantic_cache")
+            return cached
+
+    async def call() -> str:
+        start = time.perf_counter()
+        metrics.prompt_chars.observe(len(prompt), route)
+        metrics.prompt_tokens.observe(estimate_tokens(prompt), route)
+        try:
+            async with scheduler.slot(priority):
+                if _client is None:
+                    # Outside the app (scripts, REPL) — use a short-lived client
+                    async with _new_client() as client:
+                        result = await _run_chain(client, prompt, route, hedge, priority)
+                else:
+                    result = await _run_chain(_client, prompt, route, hedge, priority)
+        except LLMOverloaded:
+            metrics.llm_results.inc(route, "overloaded")
+            raise
+        metrics.llm_latency.observe(time.perf_counter() - start, route)
+        metrics.llm_results.inc(route, "ai_error" if result.startswith("AI Error") else "ok")
+        metrics.response_chars.observe(len(result), route)
+        metrics.response_tokens.observe(estimate_tokens(result), route)
+
+        # Stored once by the shared call, before any waiter is released
+        if ttl and not result.startswith("AI Error"):
+            await anyio.to_thread.run_sync(cache.set, prompt, result, ttl)
+            if semantic:
+                semantic_cache.set(route, cache_fields, result, ttl)
+        return result
+
+    return await _single_flight(prompt, route, call)
+
+
+async def stream_gemini(prompt: str, route: str = ""):
+    """
+    Async iterator of response text chunks from the first provider that
+    starts streaming. Falls through to the next provider/model if a
+    stream fails before its first token. The stream holds a scheduler slot
+    until it ends; if none is available it yields an error message instead.
+    """
+    priority = route_priority(route)
+    metrics.llm_requests.inc(route, "stream")
+    metrics.prompt_chars.observe(len(prompt), route)
+    metrics.prompt_tokens.observe(estimate_tokens(prompt), route)
+    try:
+        async with scheduler.slot(priority):
+            if _client is None:
+                async with _new_client() as client:
+                    async for chunk in _stream_chain(client, prompt, priority):
+                        yield chunk
+                return
+            async for chunk in _stream_chain(_client, prompt, priority):
+                yield chunk
+    except LLMOverloaded as e:
+        yield e.message
+
+
+def run_sync(coro):
+    """
+    Run a coroutine from sync code. Inside the app it is scheduled on the
+    main event loop (so it shares the pooled client); in scripts it gets
+    its own loop.
+    """
+    loop = _loop
+    if loop is not None and loop.is_running():
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coro.close()
+            raise RuntimeError("blocking AI call made on the event loop — await the async variant instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+    return asyncio.run(coro)
+
+
+def ask_gemini(prompt: str, route: str = "", hedge: bool | None = None,
+               cache_fields: dict | None = None) -> str:
+    """Blocking wrapper around ask_gemini_async() for sync route handlers."""
+    return run_sync(ask_gemini_async(prompt, route, hedge, cache_fields))
@@ -0,0 +1,201 @@
+"""
+cohort_store.py – Peer cohorts for benchmarking, as streaming quantile sketches.
+Every submitted profile is added to one t-digest per (role, branch,
+dimension), plus the role-wide and global cohorts, so a lookup returns
+the true empirical percentile among real peers in constant memory.
+Sketches live in SQLite (WAL). Each worker buffers its new values in
+local delta sketches and periodically merges them into the stored ones
+inside a write transaction, so all uvicorn workers share one cohort.
+User submissions carry a contributor key (a hash of the normalized
+profile), and a key already seen is not counted again, so resubmitting
+the same profile can't skew a cohort.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from agents.tdigest import TDigest
+
+DEFAULT_DB_PATH  = Path(__file__).parent.parent / ".cache" / "cohorts.sqlite3"
+DIMENSIONS       = ("skills_count", "experience_years", "projects_count", "certifications")
+ALL              = "*"
+MIN_COHORT_SIZE  = 30     # peers needed before a cohort's percentiles are used
+FLUSH_EVERY      = 50     # buffered profiles before deltas are merged to disk
+FLUSH_INTERVAL   = 10.0   # … or seconds since the last flush
+REFRESH_INTERVAL = 10.0   # seconds before stored sketches are re-read (other workers' data)
+
+
+def role_key(role: str) -> str:
+    return " ".join(role.lower().split()) or ALL
+
+
+def branch_key(branch: str) -> str:
+    return " ".join(branch.upper().split()) or ALL
+
+
+def contributor_key(profile: dict) -> str:
+    """Stable key for a submitted profile: same normalized fields → same key."""
+    fields = {k: " ".join(str(v).lower().split()) for k, v in profile.items()}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+
+class CohortStore:
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH):
+        self.db_path = Path(db_path)
+        self._lock = threading.RLock()
+        self._db: sqlite3.Connection | None = None
+        self._views: dict = {}     # key → (stored + local) sketch used for lookups
+        self._loaded_at: dict = {}
+        self._pending: dict = {}   # key → local delta not yet merged to disk
+        self._pending_profiles = 0
+        self._flushed_at = time.time()
+        self._contributors: set = set()   # used only while the database is unavailable
+
+    def _conn(self) -> sqlite3.Connection | None:
+        if self._db is None:
+            try:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5, isolation_level=None)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS sketches ("
+                    "role TEXT NOT NULL, branch TEXT NOT NULL, dimension TEXT NOT NULL, "
+                    "sketch TEXT NOT NULL, count REAL NOT NULL, updated_at REAL NOT NULL, "
+                    "PRIMARY KEY (role, branch, dimension))"
+                )
+                db.execute("CREATE TABLE IF NOT EXISTS contributors (key TEXT PRIMARY KEY, added_at REAL NOT NULL)")
+                self._db = db
+            except sqlite3.Error:
+                return None  # disk unavailable → this worker's profiles only
+        return self._db
+
+    def _stored(self, key: tuple) -> TDigest:
+        db = self._conn()
+        row = None
+        if db is not None:
+            try:
+                row = db.execute(
+                    "SELECT sketch FROM sketches WHERE role = ? AND branch = ? AND dimension = ?", key).fetchone()
+            except sqlite3.Error:
+                pass
+        return TDigest.from_dict(json.loads(row[0])) if row else TDigest()
+
+    def _view(self, key: tuple) -> TDigest:
+        now = time.time()
+        if now - self._loaded_at.get(key, 0.0) > REFRESH_INTERVAL:
+            view = self._stored(key)
+            if key in self._pending:
+                view.merge(TDigest.from_dict(self._pending[key].to_dict()))
+            self._views[key] = view
+            self._loaded_at[key] = now
+        return self._views[key]
+
+    # ── Ingestion ───────────────────────────────────────────────────────────
+    def add(self, role: str, branch: str, values: dict, contributor: str | None = None) -> bool:
+        """Record one profile ({dimension: value}) in its role/branch cohorts; False if already counted."""
+        return self.add_many([(role, branch, values)], None if contributor is None else [contributor]) == 1
+
+    def _claim(self, contributor: str) -> bool:
+        """True the first time a contributor key is seen (by any worker)."""
+        db = self._conn()
+        if db is not None:
+            try:
+                return db.execute("INSERT OR IGNORE INTO contributors (key, added_at) VALUES (?, ?)",
+                                  (contributor, time.time())).rowcount == 1
+            except sqlite3.Error:
+                pass
+        if contributor in self._contributors:
+            return False
+        self._contributors.add(contributor)
+        return True
+
+    def add_many(self, profiles: list, contributors: list | None = None) -> int:
+        """
+        Record [(role, branch, {dimension: value})]. With `contributors`
+        (one key per profile), profiles whose key was seen before are
+        skipped. Returns how many were added.
+        """
+        with self._lock:
+            if contributors is not None:
+                profiles = [p for p, key in zip(profiles, contributors) if self._claim(key)]
+            for role, branch, values in profiles:
+                r, b = role_key(role), branch_key(branch)
+                for cohort in {(r, b), (r, ALL), (ALL, ALL)}:
+                    for dim in DIMENSIONS:
+                        if values.get(dim) is None:
+                            continue
+                        key = (*cohort, dim)
+                        view = self._view(key)   # (re)load before the delta grows, or the value counts twice
+                        view.add(values[dim])
+                        self._pending.setdefault(key, TDigest()).add(values[dim])
+            self._pending_profiles += len(profiles)
+            if self._pending_profiles >= FLUSH_EVERY or time.time() - self._flushed_at > FLUSH_INTERVAL:
+                self.flush()
+            return len(profiles)
+
+    def flush(self) -> None:
+        """Merge local deltas into the stored sketches (read-merge-write in one transaction)."""
+        with self._lock:
+            db = self._conn()
+            if db is None or not self._pending:
+                self._flushed_at = time.time()
+                return
+            now = time.time()
+            try:
+                db.execute("BEGIN IMMEDIATE")
+                for key, delta in self._pending.items():
+                    merged = self._stored(key).merge(delta)
+                    db.execute(
+                        "INSERT OR REPLACE INTO sketches (role, branch, dimension, sketch, count, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (*key, json.dumps(merged.to_dict()), merged.count, now),
+                    )
+                    self._views[key] = merged
+                    self._loaded_at[key] = now
+                db.execute("COMMIT")
+            except sqlite3.Error:
+                if db.in_transaction:
+                    db.execute("ROLLBACK")
+                return  # keep the deltas and retry on the next flush
+            self._pending = {}
+            self._pending_profiles = 0
+            self._flushed_at = now
+
+    # ── Lookup ──────────────────────────────────────────────────────────────
+    def cohort(self, role: str, branch: str) -> tuple:
+        """
+        ({dimension: sketch}, cohort label) for the most specific cohort with
+        at least MIN_COHORT_SIZE peers — role+branch, then role, then everyone.
+        Returns ({}, None) while no cohort is large enough. The sketches are
+        copies, so callers can query them outside the lock.
+        """
+        r, b = role_key(role), branch_key(branch)
+        with self._lock:
+            for cohort, label in (((r, b), f"{r} / {b}"), ((r, ALL), r), ((ALL, ALL), "all roles")):
+                sketches = {dim: self._view((*cohort, dim)) for dim in DIMENSIONS}
+                if min(s.count for s in sketches.values()) >= MIN_COHORT_SIZE:
+                    return {dim: TDigest.from_dict(s.to_dict()) for dim, s in sketches.items()}, label
+            return {}, None
+
+    def stats(self) -> dict:
+        with self._lock:
+            db = self._conn()
+            rows = []
+            if db is not None:
+                try:
+                    rows = db.execute(
+                        "SELECT role, branch, MAX(count) FROM sketches GROUP BY role, branch "
+                        "ORDER BY MAX(count) DESC LIMIT 50").fetchall()
+                except sqlite3.Error:
+                    pass
+            return {
+                "cohorts": [{"role": r, "branch": b, "profiles": int(n)} for r, b, n in rows],
+                "pending_profiles": self._pending_profiles,
+            }
+
+
+cohort_store = CohortStore()
@@ -0,0 +1,145 @@
+"""
+health.py – Per-provider / per-model health for the AI helper chain.
+Circuit breakers open on quota, auth and timeout failures and close again
+after a cooldown; EWMA latency and success rate reorder the chain so
+requests go straight to the fastest healthy provider.
+"""
+
+import threading
+import time
+from collections import deque
+
+EWMA_ALPHA        = 0.3     # weight of the newest sample
+BASE_COOLDOWN     = 30.0    # seconds a breaker stays open after its first trip
+MAX_COOLDOWN      = 300.0   # cap for the exponential back-off
+FAILURES_TO_TRIP  = 3       # consecutive soft failures (5xx, bad payload) before opening
+PRIOR_LATENCY     = 2.0     # assumed latency (s) before any samples exist
+LATENCY_WINDOW    = 100     # recent successful latencies kept for percentiles
+
+# Failure reasons that open the breaker immediately
+_HARD_TRIPS     = {429, 401, 403, "timeout"}
+# Failure reasons that mean the key itself is bad → open the whole provider
+_PROVIDER_TRIPS = {401, 403}
+
+
+class HealthState:
+    """Breaker + EWMA stats for one provider or one provider/model pair."""
+
+    def __init__(self):
+        self.latency = PRIOR_LATENCY
+        self.success_rate = 1.0
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.last_reason = None
+        self.samples = deque(maxlen=LATENCY_WINDOW)
+
+    def is_open(self, now: float) -> bool:
+        return now < self.open_until
+
+    def success(self, latency: float) -> None:
+        self.latency += EWMA_ALPHA * (latency - self.latency)
+        self.success_rate += EWMA_ALPHA * (1.0 - self.success_rate)
+        self.samples.append(latency)
+        self.consecutive_failures = 0
+        self.trips = 0          # half-open trial succeeded → fully closed
+        self.open_until = 0.0
+
+    def failure(self, latency: float, reason, trip: bool, now: float) -> None:
+        self.latency += EWMA_ALPHA * (latency - self.latency)
+        self.success_rate += EWMA_ALPHA * (0.0 - self.success_rate)
+        self.consecutive_failures += 1
+        self.last_reason = reason
+        if trip or self.consecutive_failures >= FAILURES_TO_TRIP:
+            self.trips += 1
+            cooldown = min(BASE_COOLDOWN * (2 ** (self.trips - 1)), MAX_COOLDOWN)
+            self.open_until = now + cooldown
+
+    def percentile(self, q: float) -> float | None:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def score(self) -> float:
+        """Expected cost of trying this target — lower is better."""
+        return self.latency / max(self.success_rate, 0.05)
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            "state": "open" if self.is_open(now) else "closed",
+            "reopens_in": round(max(self.open_until - now, 0.0), 1),
+            "ewma_latency": round(self.latency, 3),
+            "success_rate": round(self.success_rate, 3),
+            "last_failure": self.last_reason,
+        }
+
+
+class HealthTracker:
+    """Thread-safe registry of HealthState keyed by "Provider" and "Provider/model"."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: dict = {}
+
+    def _state(self, key: str) -> HealthState:
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = HealthState()
+        return state
+
+    def available(self, provider: str, model: str | None = None) -> bool:
+        """False while the provider (or this model of it) has an open breaker."""
+        now = time.monotonic()
+        with self._lock:
+            if self._state(provider).is_open(now):
+                return False
+            return model is None or not self._state(f"{provider}/{model}").is_open(now)
+
+    def record_success(self, provider: str, model: str, latency: float) -> None:
+        with self._lock:
+            self._state(provider).success(latency)
+            self._state(f"{provider}/{model}").success(latency)
+
+    def record_failure(self, provider: str, model: str, latency: float, reason) -> None:
+        """reason: HTTP status code, "timeout" or "error"."""
+        now = time.monotonic()
+        trip = reason in _HARD_TRIPS
+        with self._lock:
+            self._state(f"{provider}/{model}").failure(latency, reason, trip, now)
+            self._state(provider).failure(latency, reason, reason in _PROVIDER_TRIPS, now)
+
+    def rank(self, providers: list) -> list:
+        """
+        Healthy providers (at least one closed model) ordered by score;
+        registry order breaks ties. If everything is open, the registry order
+        is returned and the per-model checks fail fast until a cooldown ends.
+        """
+        now = time.monotonic()
+        with self._lock:
+            healthy = []
+            for index, p in enumerate(providers):
+                if self._state(p.name).is_open(now):
+                    continue
+                if all(self._state(f"{p.name}/{m}").is_open(now) for m in p.models):
+                    continue
+                healthy.append((self._state(p.name).score(), index, p))
+        if not healthy:
+            return list(providers)
+        return [p for _, _, p in sorted(healthy, key=lambda t: (t[0], t[1]))]
+
+    def latency_percentile(self, provider: str, q: float, min_samples: int = 5) -> float | None:
+        """q-quantile of recent successful latencies, or None if too few samples."""
+        with self._lock:
+            state = self._states.get(provider)
+            if state is None or len(state.samples) < min_samples:
+                return None
+            return state.percentile(q)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {key: state.to_dict(now) for key, state in sorted(self._states.items())}
+
+
+health = HealthTracker()
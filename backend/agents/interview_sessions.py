@@ -0,0 +1,239 @@
+"""
+interview_sessions.py – Server-side mock-interview sessions.
+A session holds the transcript (question, answer, evaluation per turn), so
+clients send only the new answer instead of the whole history. Prompts use
+a rolling summary of older turns plus the last few turns verbatim: once a
+turn leaves the verbatim window it is folded into the summary by a
+background LLM call, so the prompt size per question stays flat however
+long the interview runs. Sessions live in memory (LRU) and on disk as one
+JSON file each, so they survive restarts and are visible to every worker.
+"""
+
+import asyncio
+import json
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from weakref import WeakValueDictionary
+
+from agents.ai_helper import ask_gemini_async
+from agents.llm_scheduler import LLMOverloaded
+from agents.prompt_budget import Slot, fit_prompt
+
+DEFAULT_STORE_DIR   = Path(__file__).parent.parent / ".cache" / "interviews"
+SESSION_TTL         = 24 * 3600
+MAX_MEMORY_SESSIONS = 1000
+VERBATIM_TURNS      = 3      # most recent turns always sent word-for-word
+SUMMARY_MAX_CHARS   = 1500
+DIGEST_CHARS        = 160    # per-field cut of the extractive fallback summary
+SUMMARY_ROUTE       = "/api/interview/summary"
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+_SCORE      = re.compile(r"OVERALL SCORE:\s*([\d.]+)\s*/\s*10", re.IGNORECASE)
+
+
+@dataclass
+class InterviewSession:
+    id: str
+    role: str
+    experience_level: str = "Fresher"
+    interview_type: str = "Technical"
+    turns: list = field(default_factory=list)   # [{"question", "answer", "evaluation"}]
+    question: str = ""                          # asked, not answered yet
+    summary: str = ""                           # rolling summary of turns[:summarized]
+    summarized: int = 0
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def question_number(self) -> int:
+        return len(self.turns) + 1
+
+    def recent_turns(self) -> tuple:
+        """(index of the first unsummarized turn, those turns)."""
+        return self.summarized, self.turns[self.summarized:]
+
+    def scores(self) -> list:
+        """Per-answer OVERALL SCORE values parsed from the evaluations."""
+        found = (_SCORE.search(t.get("evaluation") or "") for t in self.turns)
+        return [float(m.group(1)) if m else None for m in found]
+
+
+def format_turns(turns: list, start: int = 0) -> str:
+    return "\n".join(f"Q{start + i + 1}: {t['question']}\nA: {t['answer']}" for i, t in enumerate(turns))
+
+
+def digest_turns(turns: list, start: int = 0) -> str:
+    """Extractive one-line-per-turn summary; used when no LLM summary is available."""
+    def cut(text: str) -> str:
+        text = " ".join(str(text).split())
+        return text if len(text) <= DIGEST_CHARS else text[:DIGEST_CHARS].rsplit(" ", 1)[0] + "…"
+    return "\n".join(f"- Q{start + i + 1}: {cut(t['question'])} → {cut(t['answer'])}" for i, t in enumerate(turns))
+
+
+def _tail(text: str, limit: int = SUMMARY_MAX_CHARS) -> str:
+    """Last `limit` chars of a line-oriented summary, cut on a line boundary."""
+    if len(text) <= limit:
+        return text
+    text = text[-limit:]
+    return text.split("\n", 1)[1] if "\n" in text else text
+
+
+def transcript_context(summary: str, turns: list, start: int) -> str:
+    """Rolling summary of older turns followed by the recent turns verbatim."""
+    parts = []
+    if summary:
+        parts.append(f"Summary of earlier questions (Q1-Q{start}):\n{summary}")
+    if turns:
+        parts.append(format_turns(turns, start))
+    return "\n\n".join(parts) or "(no questions asked yet)"
+
+
+def _summary_template(role: str, previous: str, new_turns: str) -> str:
+    return f"""You are keeping running notes on a mock interview for {role}.
+
+Notes so far:
+{previous}
+
+New questions and answers:
+{new_turns}
+
+Rewrite the notes to cover everything so far in at most 150 words: topics
+asked, how well each was answered, recurring strengths and gaps. Keep the
+question numbers. Return ONLY the notes."""
+
+
+def summary_prompt(session: InterviewSession, turns: list, start: int) -> str:
+    return fit_prompt(SUMMARY_ROUTE, _summary_template, role=session.role,
+                      previous=Slot(session.summary or "(none yet)", priority=2),
+                      new_turns=Slot(format_turns(turns, start), priority=1, dedupe=False))
+
+
+class SessionStore:
+    def __init__(self, store_dir: Path = DEFAULT_STORE_DIR, ttl: float = SESSION_TTL):
+        self.dir = Path(store_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._memory: OrderedDict = OrderedDict()   # id → (session, file mtime when loaded)
+        self._lock = threading.Lock()
+        self._compacting: set = set()
+        self._tasks: set = set()
+        self._turn_locks: WeakValueDictionary = WeakValueDictionary()
+
+    def _path(self, session_id: str) -> Path:
+        return self.dir / f"{session_id}.json"
+
+    def _remember(self, session: InterviewSession, mtime: float) -> None:
+        self._memory[session.id] = (session, mtime)
+        self._memory.move_to_end(session.id)
+        while len(self._memory) > MAX_MEMORY_SESSIONS:
+            self._memory.popitem(last=False)
+
+    def create(self, role: str, experience_level: str, interview_type: str) -> InterviewSession:
+        session = InterviewSession(secrets.token_urlsafe(16), role, experience_level, interview_type)
+        self.save(session)
+        return session
+
+    def get(self, session_id: str) -> InterviewSession | None:
+        if not _SESSION_ID.match(session_id):
+            return None
+        path = self._path(session_id)
+        with self._lock:
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                mtime = None
+            cached = self._memory.get(session_id)
+            # Reuse the in-memory copy unless another worker wrote a newer file
+            if cached is not None and (mtime is None or cached[1] >= mtime):
+                session = cached[0]
+            elif mtime is not None:
+                try:
+                    session = InterviewSession(**json.loads(path.read_text(encoding="utf-8")))
+                except (OSError, ValueError, TypeError):
+                    return None
+                self._remember(session, mtime)
+            else:
+                return None
+            if time.time() - session.updated_at > self.ttl:
+                return None
+            self._memory.move_to_end(session_id)
+            return session
+
+    def save(self, session: InterviewSession) -> None:
+        session.updated_at = time.time()
+        path = self._path(session.id)
+        with self._lock:
+            try:
+                tmp = path.with_suffix(".tmp")
+                tmp.write_text(json.dumps(asdict(session), ensure_ascii=False), encoding="utf-8")
+                tmp.replace(path)
+                mtime = path.stat().st_mtime
+            except OSError:
+                mtime = time.time()   # disk unavailable → this worker's memory only
+            self._remember(session, mtime)
+
+    def delete(self, session_id: str) -> bool:
+        if not _SESSION_ID.match(session_id):
+            return False
+        with self._lock:
+            self._memory.pop(session_id, None)
+            path = self._path(session_id)
+            existed = path.exists()
+            path.unlink(missing_ok=True)
+            return existed
+
+    def purge_expired(self) -> int:
+        """Delete session files idle for longer than the TTL; returns how many."""
+        cutoff, removed = time.time() - self.ttl, 0
+        for f in self.dir.glob("*.json"):
+            try:
+                if f.stat().st_mtime < cutoff:
+                    f.unlink()
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def turn_lock(self, session_id: str) -> asyncio.Lock:
+        """Held while an answer is claimed in memory but not yet confirmed or undone."""
+        lock = self._turn_locks.get(session_id)
+        if lock is None:
+            lock = self._turn_locks[session_id] = asyncio.Lock()
+        return lock
+
+    # ── Rolling compaction ──────────────────────────────────────────────────
+    def schedule_compaction(self, session: InterviewSession) -> None:
+        """Fold turns that left the verbatim window into the summary, off the request path."""
+        if len(session.turns) - session.summarized <= VERBATIM_TURNS or session.id in self._compacting:
+            return
+        self._compacting.add(session.id)
+        task = asyncio.create_task(self._compact(session))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _compact(self, session: InterviewSession) -> None:
+        try:
+            start, end = session.summarized, len(session.turns) - VERBATIM_TURNS
+            turns = session.turns[start:end]
+            try:
+                summary = (await ask_gemini_async(summary_prompt(session, turns, start), route=SUMMARY_ROUTE)).strip()
+            except LLMOverloaded:
+                summary = ""
+            if not summary or summary.startswith("AI Error"):
+                summary = "\n".join(filter(None, [session.summary, digest_turns(turns, start)]))
+            # Saving mid-answer would persist the claimed turn before its calls succeed
+            async with self.turn_lock(session.id):
+                if session.summarized == start:   # nobody compacted meanwhile
+                    session.summary = _tail(summary)
+                    session.summarized = end
+                    self.save(session)
+        finally:
+            self._compacting.discard(session.id)
+
+
+session_store = SessionStore()
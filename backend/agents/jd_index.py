@@ -0,0 +1,233 @@
+"""
+jd_index.py – Persistent job-description index for top-k resume retrieval.
+
+Postings live in SQLite (text, metadata, keywords); term vectors live in a
+docs × features sparse matrix saved as .npy arrays and memory-mapped on
+load. The matrix is kept in CSC form, so each feature column is the
+posting list of an inverted index and a query only reads the columns of
+its own terms. Features are hashed, so there is no vocabulary and adds
+never trigger a refit: new postings go to an in-memory delta, deletes are
+tombstones, and both are folded into the on-disk arrays by compact().
+Every posting is written to SQLite first, so the delta is rebuilt on load,
+and a search first pulls in rows other workers added since it last looked.
+Deletes by another worker are filtered by get() until the next reload.
+IDF comes from live document frequencies; per-document norms are frozen
+at insert time and refreshed on compaction.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+
+DEFAULT_INDEX_DIR = Path(__file__).parent.parent / ".cache" / "jd_index"
+N_FEATURES        = 2 ** 20
+COMPACT_EVERY     = 2000   # delta rows before they are merged into the mmapped arrays
+
+_vectorizer = HashingVectorizer(
+    stop_words="english",
+    ngram_range=(1, 2),
+    n_features=N_FEATURES,
+    alternate_sign=False,
+    norm=None,
+)
+
+
+def _term_rows(texts: list) -> sp.csr_matrix:
+    """Sublinear term-frequency rows (1 + log tf)."""
+    rows = _vectorizer.transform(texts).tocsr()
+    rows.data = 1.0 + np.log(rows.data)
+    return rows
+
+
+class JDIndex:
+    def __init__(self, index_dir: Path = DEFAULT_INDEX_DIR):
+        self.dir = Path(index_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.dir / "jobs.sqlite3", check_same_thread=False, timeout=5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, company TEXT, "
+            "text TEXT NOT NULL, keywords TEXT NOT NULL, deleted INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._load()
+
+    # ── Persistence ─────────────────────────────────────────────────────────
+    def _load(self) -> None:
+        files = {name: self.dir / f"{name}.npy" for name in ("data", "indices", "indptr", "ids", "norms")}
+        if all(f.exists() for f in files.values()):
+            arrays = {name: np.load(f, mmap_mode="r") for name, f in files.items()}
+            self._ids = arrays["ids"]
+            self._norms = arrays["norms"]
+            self._main = sp.csc_matrix(
+                (arrays["data"], arrays["indices"], arrays["indptr"]),
+                shape=(len(self._ids), N_FEATURES), copy=False,
+            )
+        else:
+            self._ids = np.empty(0, dtype=np.int64)
+            self._norms = np.empty(0)
+            self._main = sp.csc_matrix((0, N_FEATURES))
+
+        # Document frequency per feature = nnz per column of the main matrix
+        self._df = np.diff(self._main.indptr).astype(np.int64)
+        self._delta_rows, self._delta_ids, self._delta_norms = [], [], []
+        self._delta_csc = None
+
+        # Tombstones still present in the arrays; rows dropped by compact() no longer count
+        indexed_max = int(self._ids.max()) if len(self._ids) else 0
+        tombstoned = [row[0] for row in self._db.execute(
+            "SELECT id FROM jobs WHERE deleted = 1 AND id <= ?", (indexed_max,))]
+        positions = np.flatnonzero(np.isin(self._ids, tombstoned))
+        self._deleted = {int(self._ids[i]) for i in positions}
+        if len(positions):
+            np.subtract.at(self._df, self._main.tocsr()[positions].indices, 1)
+        self._n_docs = len(self._ids) - len(self._deleted)
+
+        # Postings ingested after the last compaction → rebuild the delta
+        self._seen_max = indexed_max
+        self._catch_up()
+
+    def _catch_up(self) -> None:
+        """Add postings written to SQLite (by this or another worker) since the last look."""
+        pending = self._db.execute(
+            "SELECT id, text FROM jobs WHERE deleted = 0 AND id > ? ORDER BY id", (self._seen_max,)).fetchall()
+        if pending:
+            self._add_vectors([r[0] for r in pending], _term_rows([r[1] for r in pending]))
+
+    def compact(self) -> None:
+        """Merge the delta, drop tombstones, refresh norms and rewrite the arrays."""
+        with self._lock:
+            self._catch_up()
+            blocks = [self._main.tocsr()] + self._delta_rows
+            matrix = sp.vstack(blocks, format="csr") if blocks else sp.csr_matrix((0, N_FEATURES))
+            ids = np.concatenate([np.asarray(self._ids), np.asarray(self._delta_ids, dtype=np.int64)])
+            keep = np.flatnonzero(~np.isin(ids, list(self._deleted)))
+            matrix, ids = matrix[keep], ids[keep]
+
+            df = np.bincount(matrix.indices, minlength=N_FEATURES)
+            idf = np.log((1 + len(ids)) / (1 + df)) + 1.0
+            weighted = matrix.multiply(idf).tocsr()
+            norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+
+            csc = matrix.tocsc()
+            for name, array in (("data", csc.data), ("indices", csc.indices), ("indptr", csc.indptr),
+                                ("ids", ids), ("norms", norms)):
+                tmp = self.dir / f"{name}.tmp.npy"
+                np.save(tmp, array)
+                tmp.replace(self.dir / f"{name}.npy")
+            self._load()
+
+    # ── Mutations ───────────────────────────────────────────────────────────
+    def _idf(self) -> np.ndarray:
+        return np.log((1 + self._n_docs) / (1 + self._df)) + 1.0
+
+    def _add_vectors(self, ids: list, rows: sp.csr_matrix) -> None:
+        np.add.at(self._df, rows.indices, 1)
+        self._n_docs += len(ids)
+        weighted = rows.multiply(self._idf()).tocsr()
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        self._delta_rows.append(rows)
+        self._delta_csc = None
+        self._delta_ids.extend(ids)
+        self._delta_norms.extend(norms.tolist())
+        self._seen_max = max(self._seen_max, max(ids))
+
+    def add(self, jobs: list) -> list:
+        """jobs: [{"text", "title", "company", "keywords"}] → assigned ids."""
+        with self._lock:
+            with self._db:
+                ids = [self._db.execute(
+                    "INSERT INTO jobs (title, company, text, keywords) VALUES (?, ?, ?, ?)",
+                    (j.get("title", ""), j.get("company", ""), j["text"], json.dumps(sorted(j.get("keywords", [])))),
+                ).lastrowid for j in jobs]
+            self._catch_up()
+            if len(self._delta_ids) >= COMPACT_EVERY:
+                self.compact()
+            return ids
+
+    def delete(self, job_id: int) -> bool:
+        with self._lock:
+            self._catch_up()
+            row = self._db.execute("SELECT text FROM jobs WHERE id = ? AND deleted = 0", (job_id,)).fetchone()
+            if row is None:
+                return False
+            with self._db:
+                self._db.execute("UPDATE jobs SET deleted = 1 WHERE id = ?", (job_id,))
+            self._deleted.add(job_id)
+            np.subtract.at(self._df, np.unique(_term_rows([row[0]]).indices), 1)
+            self._n_docs -= 1
+            return True
+
+    # ── Query ───────────────────────────────────────────────────────────────
+    def search(self, text: str, top_k: int = 10) -> list:
+        """[(job_id, cosine score)] for the top_k live postings."""
+        with self._lock:
+            self._catch_up()
+            q = _term_rows([text])
+            if q.nnz == 0 or self._n_docs <= 0:
+                return []
+            idf = self._idf()
+            q_weights = q.data * idf[q.indices]
+            q_norm = np.linalg.norm(q_weights)
+            # dot(doc, query) in tf-idf space = Σ tf_doc · idf² · tf_query over the query's terms
+            col_weights = q.data * idf[q.indices] ** 2
+
+            ids, scores = [], []
+            if self._main.shape[0]:
+                dots = np.asarray(self._main[:, q.indices] @ col_weights).ravel()
+                ids.append(np.asarray(self._ids))
+                scores.append(dots / (np.maximum(self._norms, 1e-12) * q_norm))
+            if self._delta_rows:
+                if self._delta_csc is None:
+                    self._delta_csc = sp.vstack(self._delta_rows, format="csc")
+                dots = np.asarray(self._delta_csc[:, q.indices] @ col_weights).ravel()
+                ids.append(np.asarray(self._delta_ids, dtype=np.int64))
+                scores.append(dots / (np.maximum(self._delta_norms, 1e-12) * q_norm))
+
+            ids, scores = np.concatenate(ids), np.concatenate(scores)
+            if self._deleted:
+                scores[np.isin(ids, list(self._deleted))] = -1.0
+            k = min(top_k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(int(ids[i]), float(scores[i])) for i in top if scores[i] > 0]
+
+    def get(self, job_ids: list) -> dict:
+        """id → {"id", "title", "company", "text", "keywords"} for live postings."""
+        if not job_ids:
+            return {}
+        marks = ",".join("?" * len(job_ids))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, title, company, text, keywords FROM jobs WHERE deleted = 0 AND id IN ({marks})",
+                list(job_ids)).fetchall()
+        return {r[0]: {"id": r[0], "title": r[1], "company": r[2], "text": r[3], "keywords": json.loads(r[4])}
+                for r in rows}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "postings": self._n_docs,
+                "indexed": int(self._main.shape[0]),
+                "pending": len(self._delta_ids),
+                "tombstones": len(self._deleted),
+            }
+
+
+_index: JDIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> JDIndex:
+    """Open the shared index lazily (first use), so app startup stays fast."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = JDIndex()
+        return _index
@@ -0,0 +1,159 @@
+"""
+llm_cache.py – Two-tier response cache for ask_gemini.
+Tier 1 is a bounded in-process LRU; tier 2 is an on-disk SQLite store in
+WAL mode that survives restarts and is shared by all uvicorn workers.
+Entries are keyed by a hash of the normalized prompt and expire per route.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from agents.providers import parse_route_ints, registry
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / ".cache" / "llm_cache.sqlite3"
+MEMORY_ENTRIES  = 512
+
+# Seconds a response stays fresh, per calling route. Routes not listed
+# (interview questions, pipeline runs, …) are never cached.
+ROUTE_TTLS = {
+    "/api/jobmarket/insights":   6 * 3600,
+    "/api/jobmarket/structured": 6 * 3600,
+    "/api/career/guidance":      24 * 3600,
+    "/api/skills/analyze":       24 * 3600,
+    "/api/roadmap/generate":     24 * 3600,
+    "/api/resume/evaluate":      24 * 3600,
+}
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so cosmetic differences hit the same entry."""
+    return _WS.sub(" ", prompt).strip()
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """In-memory LRU in front of a SQLite table; both tiers honour expiry."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH, max_entries: int = MEMORY_ENTRIES):
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self._memory: OrderedDict = OrderedDict()  # key → (value, expires_at)
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def _conn(self) -> sqlite3.Connection | None:
+        if self._db is None:
+            try:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._db = db
+            except sqlite3.Error:
+                return None  # disk tier unavailable → memory only
+        return self._db
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, prompt: str) -> str | None:
+        value = self.get_memory(prompt)
+        return value if value is not None else self.get_disk(prompt)
+
+    def get_memory(self, prompt: str) -> str | None:
+        """Tier 1 only; cheap enough to call on the event loop."""
+        key = prompt_key(prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+            return None
+
+    def get_disk(self, prompt: str) -> str | None:
+        """Tier 2 after a memory miss; blocking, so async callers run it in a thread."""
+        key = prompt_key(prompt)
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            if db is not None:
+                try:
+                    row = db.execute(
+                        "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+                        (key, now),
+                    ).fetchone()
+                except sqlite3.Error:
+                    row = None
+                if row is not None:
+                    self._remember(key, row[0], row[1])
+                    self.stats["disk_hits"] += 1
+                    return row[0]
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, prompt: str, value: str, ttl: float) -> None:
+        key = prompt_key(prompt)
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self.stats["stores"] += 1
+            db = self._conn()
+            if db is not None:
+                try:
+                    with db:
+                        db.execute(
+                            "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                            (key, value, expires_at),
+                        )
+                except sqlite3.Error:
+                    pass
+
+    def purge_expired(self) -> int:
+        """Drop expired rows from disk; returns how many were removed."""
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return 0
+            with db:
+                return db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = lookups - self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+def route_ttl(route: str) -> int:
+    """Cache TTL for a route; LLM_CACHE_TTLS in .env overrides ROUTE_TTLS."""
+    overrides = parse_route_ints(registry.get("LLM_CACHE_TTLS"))
+    return overrides.get(route, ROUTE_TTLS.get(route, 0))
+
+
+cache = LLMCache(registry.get("LLM_CACHE_PATH") or DEFAULT_DB_PATH)
@@ -0,0 +1,339 @@
+"""
+llm_scheduler.py – Admission control and rate limits for LLM calls.
+Every upstream call made by ask_gemini first takes a slot. Slots are
+handed out by priority class (interactive > standard > batch), and the
+lower classes may only use part of them, so a burst of pipeline or bulk
+work can't starve the interview routes. Waiting calls sit in a bounded
+priority queue. When the queue is full, a new call is rejected at once
+with LLMOverloaded (HTTP 429 + Retry-After), or a queued batch call is
+shed to make room for a more urgent one.
+Providers can also be given token buckets for requests/min and
+tokens/min (LLM_RATE_LIMITS in .env; off by default), charged once per
+model attempt, so calls spread across the chain instead of tripping
+provider 429s.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from agents.prompt_budget import estimate_tokens
+from agents.providers import parse_route_ints, registry
+
+INTERACTIVE, STANDARD, BATCH = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", STANDARD: "standard", BATCH: "batch"}
+
+# Priority class per calling route; unlisted routes are STANDARD
+ROUTE_PRIORITIES = {
+    "/api/interview/start":            INTERACTIVE,
+    "/api/interview/next-question":    INTERACTIVE,
+    "/api/interview/evaluate-answer":  INTERACTIVE,
+    "/api/interview/final-report":     INTERACTIVE,
+    "/api/interview/summary":          BATCH,
+    "/api/pipeline/run":               BATCH,
+    "/api/resume/bulk":                BATCH,
+    "/api/matcher/match-batch":        BATCH,
+    "/api/benchmarking/compare-batch": BATCH,
+}
+
+MAX_CONCURRENCY = 16                                     # upstream calls in flight
+CLASS_SHARE     = {INTERACTIVE: 1.0, STANDARD: 0.75, BATCH: 0.5}   # of the slots a class may fill
+MAX_QUEUE       = 64                                     # calls waiting for a slot
+MAX_QUEUE_WAIT  = {INTERACTIVE: 10.0, STANDARD: 20.0, BATCH: 60.0}   # seconds before giving up
+
+# Provider name → (requests/min, tokens/min). Empty → no client-side limits;
+# set them to your plan's quotas, e.g. LLM_RATE_LIMITS=Gemini=15/1000000,Groq=30/6000
+RATE_LIMITS: dict = {}
+EXPECTED_OUTPUT_TOKENS = 800   # reserved per call on top of the prompt, settled afterwards
+RATE_RESERVE           = {INTERACTIVE: 0.0, STANDARD: 0.1, BATCH: 0.25}   # bucket share a class leaves untouched
+MAX_RATE_WAIT          = {INTERACTIVE: 1.0, STANDARD: 5.0, BATCH: 30.0}   # seconds before trying the next provider
+PRIOR_CALL_SECONDS     = 5.0   # assumed slot hold time before any calls finished
+
+
+class LLMOverloaded(Exception):
+    """No capacity for an LLM call; `retry_after` is a hint in whole seconds."""
+
+    def __init__(self, retry_after: int, reason: str = "queue full"):
+        super().__init__(f"LLM scheduler saturated ({reason})")
+        self.retry_after = retry_after
+        self.reason = reason
+
+    @property
+    def message(self) -> str:
+        return f"AI Error: the AI service is busy right now. Please retry in {self.retry_after}s."
+
+
+def route_priority(route: str) -> int:
+    """Priority class for a route; LLM_ROUTE_PRIORITIES in .env overrides ROUTE_PRIORITIES."""
+    overrides = parse_route_ints(registry.get("LLM_ROUTE_PRIORITIES"))
+    if route in overrides:
+        return min(max(overrides[route], INTERACTIVE), BATCH)
+    return ROUTE_PRIORITIES.get(route, STANDARD)
+
+
+def parse_rate_limits(spec: str) -> dict:
+    """Parse "Provider=rpm/tpm,…" (the LLM_RATE_LIMITS setting); 0 means unlimited."""
+    limits = {}
+    for item in spec.split(","):
+        if "=" in item and "/" in item:
+            name, values = item.split("=", 1)
+            rpm, tpm = values.split("/", 1)
+            try:
+                limits[name.strip()] = (float(rpm), float(tpm))
+            except ValueError:
+                pass
+    return limits
+
+
+def _setting(name: str, default: float) -> float:
+    try:
+        return float(registry.get(name) or default)
+    except ValueError:
+        return default
+
+
+class TokenBucket:
+    """Continuously refilling bucket; `level` may go negative while reserved."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_for(self, amount: float, floor: float) -> float:
+        """Seconds until `amount` can be taken while leaving `floor` in the bucket."""
+        missing = amount + floor - self.level
+        return max(0.0, missing * 60.0 / self.capacity)
+
+
+class ProviderLimiter:
+    """Requests/min and tokens/min buckets for one provider."""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.limits = (rpm, tpm)
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.throttled = 0
+
+    def _buckets(self, tokens: float) -> list:
+        pairs = []
+        if self.requests:
+            pairs.append((self.requests, 1.0))
+        if self.tokens:
+            pairs.append((self.tokens, min(tokens, self.tokens.capacity)))
+        return pairs
+
+    def wait_time(self, tokens: float, priority: int) -> float:
+        """Seconds until one call fits, leaving the class's reserve share in each bucket."""
+        now = time.monotonic()
+        wait = 0.0
+        for bucket, amount in self._buckets(tokens):
+            bucket.refill(now)
+            wait = max(wait, bucket.wait_for(amount, bucket.capacity * RATE_RESERVE[priority]))
+        return wait
+
+    def take(self, tokens: float) -> None:
+        for bucket, amount in self._buckets(tokens):
+            bucket.level -= amount
+
+    def settle(self, reserved: float, used: float) -> None:
+        """Give back (or charge) the difference between reserved and actual tokens."""
+        if self.tokens:
+            self.tokens.refill(time.monotonic())
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + min(reserved, self.tokens.capacity) - used)
+
+
+class LLMScheduler:
+    def __init__(self):
+        self._lock = threading.Lock()    # guards the rate buckets (shared by every loop / thread)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._active = 0
+        self._queue: list = []           # heap of [priority, seq, future]
+        self._seq = itertools.count()
+        self._limiters: dict = {}
+        self._limits_spec: str | None = None
+        self._call_seconds = PRIOR_CALL_SECONDS
+        self.stats = {name: {"admitted": 0, "queued": 0, "rejected": 0, "shed": 0, "timed_out": 0}
+                      for name in PRIORITY_NAMES.values()}
+
+    def bind(self, loop: asyncio.AbstractEventLoop | None) -> None:
+        """Admission control applies to calls on this loop (the app's); scripts bypass it."""
+        self._loop = loop
+
+    @staticmethod
+    def _concurrency() -> int:
+        return max(1, int(_setting("LLM_MAX_CONCURRENCY", MAX_CONCURRENCY)))
+
+    def _may_start(self, priority: int) -> bool:
+        return self._active < max(1, math.floor(self._concurrency() * CLASS_SHARE[priority]))
+
+    def retry_after(self) -> int:
+        """Rough seconds until a new call would get a slot."""
+        backlog = len(self._queue) + 1
+        return max(1, math.ceil(self._call_seconds * backlog / self._concurrency()))
+
+    # ── Admission ───────────────────────────────────────────────────────────
+    def _enqueue(self, priority: int) -> asyncio.Future:
+        stats = self.stats[PRIORITY_NAMES[priority]]
+        if len(self._queue) >= max(0, int(_setting("LLM_MAX_QUEUE", MAX_QUEUE))):
+            worst = max(self._queue, default=None)
+            if worst is None or worst[0] <= priority:
+                stats["rejected"] += 1
+                raise LLMOverloaded(self.retry_after())
+            # Shed the least urgent, most recent waiter to make room
+            self._queue.remove(worst)
+            heapq.heapify(self._queue)
+            self.stats[PRIORITY_NAMES[worst[0]]]["shed"] += 1
+            if not worst[2].done():
+                worst[2].set_exception(LLMOverloaded(self.retry_after(), "shed for a higher-priority call"))
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, [priority, next(self._seq), future])
+        stats["queued"] += 1
+        return future
+
+    def _wake(self) -> None:
+        while self._queue and self._may_start(self._queue[0][0]):
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                self._active += 1   # the slot passes straight to the waiter
+                future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: int):
+        """Hold one upstream-call slot; raises LLMOverloaded if none can be had in time."""
+        try:
+            bound = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            bound = False
+        if not bound:
+            yield
+            return
+
+        name = PRIORITY_NAMES[priority]
+        queued_ahead = self._queue and self._queue[0][0] <= priority
+        if queued_ahead or not self._may_start(priority):
+            future = self._enqueue(priority)
+            try:
+                await asyncio.wait_for(asyncio.shield(future), MAX_QUEUE_WAIT[priority])
+            except asyncio.TimeoutError:
+                self._abandon(future)
+                self.stats[name]["timed_out"] += 1
+                raise LLMOverloaded(self.retry_after(), "queue wait timed out")
+            except asyncio.CancelledError:
+                self._abandon(future)
+                raise
+        else:
+            self._active += 1
+        self.stats[name]["admitted"] += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._call_seconds += 0.2 * (time.monotonic() - start - self._call_seconds)
+            self._release()
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        """Leave the queue; a slot handed over just as the caller gave up is passed on."""
+        entry = next((e for e in self._queue if e[2] is future), None)
+        if entry is not None:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+        if future.done() and not future.cancelled() and future.exception() is None:
+            self._release()
+        else:
+            future.cancel()
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._wake()
+
+    # ── Provider rate limits ────────────────────────────────────────────────
+    def _current_limiters(self) -> dict:
+        spec = registry.get("LLM_RATE_LIMITS")
+        if spec != self._limits_spec:   # .env changed → rebuild the buckets
+            self._limits_spec = spec
+            limits = {**RATE_LIMITS, **parse_rate_limits(spec)}
+            self._limiters = {name: ProviderLimiter(rpm, tpm) for name, (rpm, tpm) in limits.items()
+                              if rpm > 0 or tpm > 0}
+        return self._limiters
+
+    async def acquire_rate(self, provider: str, prompt: str, priority: int) -> float | None:
+        """
+        Wait for the provider's rate budget for one model attempt. Returns
+        the tokens reserved (pass them to settle_rate), or None if the provider has no capacity
+        within the class's wait limit and the next one should be tried.
+        Interactive and standard calls reserve capacity ahead and sleep
+        until it is theirs; batch calls wait without holding a reservation.
+        """
+        tokens = estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS
+        deadline = time.monotonic() + MAX_RATE_WAIT[priority]
+        while True:
+            with self._lock:
+                limiter = self._current_limiters().get(provider)
+                if limiter is None:
+                    return 0.0
+                wait = limiter.wait_time(tokens, priority)
+                if time.monotonic() + wait > deadline:
+                    limiter.throttled += 1
+                    return None
+                if wait == 0.0 or priority != BATCH:
+                    limiter.take(tokens)
+            if wait == 0.0:
+                return tokens
+            await asyncio.sleep(wait)
+            if priority != BATCH:
+                return tokens
+
+    def rate_wait(self, providers: list, prompt: str, priority: int) -> float | None:
+        """Seconds until any of `providers` has rate budget for this call; None if one has it now."""
+        tokens = estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS
+        with self._lock:
+            limiters = self._current_limiters()
+            waits = []
+            for name in providers:
+                limiter = limiters.get(name)
+                if limiter is None:
+                    return None
+                waits.append(limiter.wait_time(tokens, priority))
+        wait = min(waits, default=0.0)
+        return wait if wait > 0 else None
+
+    def settle_rate(self, provider: str, reserved: float, prompt: str, response: str | None) -> None:
+        if not reserved:
+            return
+        with self._lock:
+            limiter = self._current_limiters().get(provider)
+            if limiter is not None:
+                limiter.settle(reserved, estimate_tokens(prompt) + estimate_tokens(response or ""))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            providers = {}
+            now = time.monotonic()
+            for name, limiter in self._current_limiters().items():
+                entry = {"requests_per_min": limiter.limits[0], "tokens_per_min": limiter.limits[1],
+                         "throttled": limiter.throttled}
+                for label, bucket in (("requests_available", limiter.requests), ("tokens_available", limiter.tokens)):
+                    if bucket:
+                        bucket.refill(now)
+                        entry[label] = round(bucket.level, 1)
+                providers[name] = entry
+        return {
+            "active": self._active,
+            "queued": len(self._queue),
+            "max_concurrency": self._concurrency(),
+            "avg_call_seconds": round(self._call_seconds, 2),
+            "classes": self.stats,
+            "providers": providers,
+        }
+
+
+scheduler = LLMScheduler()
@@ -0,0 +1,389 @@
+"""
+market_store.py – Precomputed job-market payloads with a background warmer.
+The /api/jobmarket endpoints are asked about a small, predictable set of
+(role, location) pairs, so their payloads are computed ahead of time and
+kept in SQLite (WAL, shared by all uvicorn workers) with an in-process
+copy in front. Requests are answered from the stored payload; once it is
+older than the freshness window it is still served while a background
+refresh runs (stale-while-revalidate).
+The warmer is opt-in (PRECOMPUTE_ENABLED=1 in .env). It keeps the
+configured roles × locations plus the most requested pairs fresh, at a
+limited call rate and in the scheduler's batch class, in whichever worker
+holds the lease — or in a separate process: `python -m agents.market_store`.
+Without it, payloads are computed on first request and refreshed in the
+background when they go stale.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from agents.providers import registry
+
+DEFAULT_DB_PATH   = Path(__file__).parent.parent / ".cache" / "market.sqlite3"
+DEFAULT_ROLES     = ("AI/ML Engineer", "Full Stack Developer", "DevOps Engineer", "Data Scientist",
+                     "Cloud Architect", "Cybersecurity Analyst")
+DEFAULT_LOCATIONS = ("India",)
+FRESH_FOR         = 6 * 3600        # seconds before a payload is refreshed
+MAX_STALE         = 7 * 24 * 3600   # older payloads are not served at all
+CALLS_PER_MINUTE  = 4               # producer calls the warmer may make
+TOP_REQUESTED     = 10              # most requested pairs kept warm besides the configured ones
+MAX_DEMAND_ROWS   = 1000            # request counts kept for ranking (one-off pairs drop out)
+DEMAND_BUFFER     = 100             # buffered (role, location) pairs before counts are written out
+DEMAND_INTERVAL   = 60              # … or seconds since the last write
+CYCLE_INTERVAL    = 300             # seconds between warmer passes
+STARTUP_DELAY     = 60              # seconds before the first pass, so startup traffic goes first
+LEASE_SECONDS     = 900
+
+
+def _key(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _setting_list(name: str, default: tuple) -> list:
+    value = registry.get(name)
+    return [v.strip() for v in value.split(",") if v.strip()] if value else list(default)
+
+
+def _setting_number(name: str, default: float) -> float:
+    try:
+        return float(registry.get(name) or default)
+    except ValueError:
+        return default
+
+
+def configured_roles() -> list:
+    return _setting_list("PRECOMPUTE_ROLES", DEFAULT_ROLES)
+
+
+def configured_locations() -> list:
+    return _setting_list("PRECOMPUTE_LOCATIONS", DEFAULT_LOCATIONS)
+
+
+class MarketStore:
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._memory: dict = {}      # (kind, role key, location key) → (payload, refreshed_at)
+        self._producers: dict = {}   # kind → async (role, location) → payload dict, or None on failure
+        self._demand: dict = {}      # (role key, location key) → (role, location, requests not yet persisted)
+        self._demand_flushed = time.monotonic()
+        self._refreshing: set = set()
+        self._tasks: set = set()
+        self._last_call = 0.0
+        self._throttle: asyncio.Lock | None = None
+        self._warmer: asyncio.Task | None = None
+        self._owner = f"{os.getpid()}-{id(self)}"
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0,
+                      "last_cycle": None}
+
+    def _conn(self) -> sqlite3.Connection | None:
+        if self._db is None:
+            try:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5, isolation_level=None)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS payloads ("
+                    "kind TEXT NOT NULL, role_key TEXT NOT NULL, location_key TEXT NOT NULL, "
+                    "role TEXT NOT NULL, location TEXT NOT NULL, payload TEXT NOT NULL, "
+                    "refreshed_at REAL NOT NULL, PRIMARY KEY (kind, role_key, location_key))"
+                )
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS demand ("
+                    "role_key TEXT NOT NULL, location_key TEXT NOT NULL, role TEXT NOT NULL, "
+                    "location TEXT NOT NULL, requests INTEGER NOT NULL, PRIMARY KEY (role_key, location_key))"
+                )
+                db.execute("CREATE TABLE IF NOT EXISTS lease (id INTEGER PRIMARY KEY, owner TEXT, expires_at REAL)")
+                self._db = db
+            except sqlite3.Error:
+                return None  # disk unavailable → this worker's memory only
+        return self._db
+
+    def register(self, kind: str, producer) -> None:
+        """`producer(role, location)` computes a fresh payload (None if it failed)."""
+        self._producers[kind] = producer
+
+    @staticmethod
+    def fresh_for() -> float:
+        return _setting_number("PRECOMPUTE_FRESH_FOR", FRESH_FOR)
+
+    # ── Reads ───────────────────────────────────────────────────────────────
+    def _load(self, key: tuple) -> tuple | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            # A stale copy is re-read in case another worker refreshed it already
+            if entry is not None and time.time() - entry[1] <= self.fresh_for():
+                return entry
+            db = self._conn()
+            if db is None:
+                return entry
+            try:
+                row = db.execute(
+                    "SELECT payload, refreshed_at FROM payloads WHERE kind = ? AND role_key = ? AND location_key = ?",
+                    key).fetchone()
+            except sqlite3.Error:
+                return entry
+            if row is None:
+                return entry
+            entry = self._memory[key] = (json.loads(row[0]), row[1])
+            return entry
+
+    def get(self, kind: str, role: str, location: str) -> dict | None:
+        """
+        Stored payload for a request, or None on a miss. A payload past its
+        freshness window is still returned and refreshed in the background.
+        """
+        key = (kind, _key(role), _key(location))
+        self._note_demand(role, location)
+        entry = self._load(key)
+        age = time.time() - entry[1] if entry else None
+        if entry is None or age > MAX_STALE:
+            self.stats["misses"] += 1
+            return None
+        if age > self.fresh_for():
+            self.stats["stale_hits"] += 1
+            self._revalidate(kind, role, location)
+        else:
+            self.stats["hits"] += 1
+        return entry[0]
+
+    def put(self, kind: str, role: str, location: str, payload: dict) -> None:
+        key = (kind, _key(role), _key(location))
+        now = time.time()
+        with self._lock:
+            self._memory[key] = (payload, now)
+            db = self._conn()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO payloads (kind, role_key, location_key, role, location, payload, refreshed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (*key, role, location, json.dumps(payload, ensure_ascii=False), now),
+                )
+            except sqlite3.Error:
+                pass
+
+    def payloads(self, kind: str, location: str, roles: list | None = None) -> list:
+        """
+        [(role, payload)] of every stored, servable `kind` payload for a
+        location. With `roles`, only those roles, named as given there.
+        """
+        db = self._conn()
+        if db is None:
+            return []
+        with self._lock:
+            try:
+                rows = db.execute(
+                    "SELECT role, payload FROM payloads WHERE kind = ? AND location_key = ? AND refreshed_at > ?",
+                    (kind, _key(location), time.time() - MAX_STALE)).fetchall()
+            except sqlite3.Error:
+                return []
+        if roles is None:
+            return [(role, json.loads(payload)) for role, payload in rows]
+        wanted = {_key(r): r for r in roles}
+        return [(wanted[_key(role)], json.loads(payload)) for role, payload in rows if _key(role) in wanted]
+
+    # ── Refreshing ──────────────────────────────────────────────────────────
+    async def _call_slot(self) -> None:
+        """Wait until the warmer may make its next producer call."""
+        if self._throttle is None:
+            self._throttle = asyncio.Lock()
+        async with self._throttle:
+            spacing = 60.0 / max(_setting_number("PRECOMPUTE_CALLS_PER_MINUTE", CALLS_PER_MINUTE), 0.01)
+            wait = self._last_call + spacing - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_call = time.monotonic()
+
+    async def refresh(self, kind: str, role: str, location: str) -> bool:
+        """Recompute one payload within the call rate; keeps the old one if the producer fails."""
+        producer = self._producers.get(kind)
+        key = (kind, _key(role), _key(location))
+        if producer is None or key in self._refreshing:
+            return False
+        self._refreshing.add(key)
+        try:
+            await self._call_slot()
+            payload = await producer(role, location)
+        except Exception:
+            payload = None
+        finally:
+            self._refreshing.discard(key)
+        if payload is None:
+            self.stats["refresh_errors"] += 1
+            return False
+        self.put(kind, role, location, payload)
+        self.stats["refreshes"] += 1
+        return True
+
+    def _revalidate(self, kind: str, role: str, location: str) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop here (sync caller) — the warmer will get to it
+        task = loop.create_task(self.refresh(kind, role, location))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # ── Demand ──────────────────────────────────────────────────────────────
+    def _note_demand(self, role: str, location: str) -> None:
+        key = (_key(role), _key(location))
+        with self._lock:
+            _, _, n = self._demand.get(key, (role, location, 0))
+            self._demand[key] = (role, location, n + 1)
+            due = len(self._demand) >= DEMAND_BUFFER or time.monotonic() - self._demand_flushed > DEMAND_INTERVAL
+        if due:   # written out as requests arrive, whether or not this process runs the warmer
+            self._flush_demand()
+
+    def _flush_demand(self) -> None:
+        with self._lock:
+            self._demand_flushed = time.monotonic()
+            db = self._conn()
+            if db is None or not self._demand:
+                self._cap_demand()
+                return
+            try:
+                db.executemany(
+                    "INSERT INTO demand (role_key, location_key, role, location, requests) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (role_key, location_key) DO UPDATE SET requests = requests + excluded.requests",
+                    [(*key, role, location, n) for key, (role, location, n) in self._demand.items()],
+                )
+                db.execute("DELETE FROM demand WHERE rowid NOT IN "
+                           "(SELECT rowid FROM demand ORDER BY requests DESC LIMIT ?)", (MAX_DEMAND_ROWS,))
+            except sqlite3.Error:
+                self._cap_demand()
+                return
+            self._demand = {}
+
+    def _cap_demand(self) -> None:
+        """Disk unavailable → keep only the most requested pairs in memory."""
+        if len(self._demand) > MAX_DEMAND_ROWS:
+            top = sorted(self._demand.items(), key=lambda item: -item[1][2])[:MAX_DEMAND_ROWS]
+            self._demand = dict(top)
+
+    def most_requested(self, limit: int = TOP_REQUESTED) -> list:
+        """[(role, location)] with the most requests across all workers."""
+        self._flush_demand()
+        db = self._conn()
+        if db is None:
+            return []
+        with self._lock:
+            try:
+                return db.execute("SELECT role, location FROM demand ORDER BY requests DESC LIMIT ?",
+                                  (limit,)).fetchall()
+            except sqlite3.Error:
+                return []
+
+    # ── Warmer ──────────────────────────────────────────────────────────────
+    def targets(self) -> list:
+        """(role, location) pairs kept warm: the configured ones, then the most requested."""
+        pairs = [(r, l) for r in configured_roles() for l in configured_locations()]
+        top = int(_setting_number("PRECOMPUTE_TOP_REQUESTED", TOP_REQUESTED))
+        if top > 0:
+            pairs += self.most_requested(top)
+        seen, unique = set(), []
+        for role, location in pairs:
+            key = (_key(role), _key(location))
+            if key not in seen:
+                seen.add(key)
+                unique.append((role, location))
+        return unique
+
+    def _acquire_lease(self) -> bool:
+        """One warmer at a time across workers; True if this one holds the lease."""
+        db = self._conn()
+        if db is None:
+            return True
+        now = time.time()
+        with self._lock:
+            try:
+                db.execute("BEGIN IMMEDIATE")
+                row = db.execute("SELECT owner, expires_at FROM lease WHERE id = 1").fetchone()
+                mine = row is None or row[0] == self._owner or row[1] < now
+                if mine:
+                    db.execute("INSERT OR REPLACE INTO lease (id, owner, expires_at) VALUES (1, ?, ?)",
+                               (self._owner, now + LEASE_SECONDS))
+                db.execute("COMMIT")
+                return mine
+            except sqlite3.Error:
+                if db.in_transaction:
+                    db.execute("ROLLBACK")
+                return False
+
+    async def warm(self) -> int:
+        """One pass: refresh every missing or expired target payload. Returns how many were refreshed."""
+        refreshed = 0
+        for role, location in self.targets():
+            for kind in self._producers:
+                entry = self._load((kind, _key(role), _key(location)))
+                if entry is not None and time.time() - entry[1] < self.fresh_for():
+                    continue
+                if not self._acquire_lease():
+                    return refreshed   # another worker took over
+                refreshed += await self.refresh(kind, role, location)
+        self.stats["last_cycle"] = time.time()
+        return refreshed
+
+    async def run(self, delay: float = 0.0) -> None:
+        """Warm forever: one pass per cycle while this process holds the lease."""
+        await asyncio.sleep(delay)
+        while True:
+            if self._acquire_lease():
+                await self.warm()
+            self._flush_demand()
+            await asyncio.sleep(_setting_number("PRECOMPUTE_CYCLE_INTERVAL", CYCLE_INTERVAL))
+
+    def start(self) -> None:
+        """Run the warmer on the current loop if PRECOMPUTE_ENABLED=1 in .env."""
+        if self._warmer is None and registry.get("PRECOMPUTE_ENABLED") == "1":
+            delay = _setting_number("PRECOMPUTE_STARTUP_DELAY", STARTUP_DELAY)
+            self._warmer = asyncio.create_task(self.run(delay))
+
+    async def stop(self) -> None:
+        if self._warmer is not None:
+            self._warmer.cancel()
+            try:
+                await self._warmer
+            except asyncio.CancelledError:
+                pass
+            self._warmer = None
+        self._flush_demand()
+
+    def snapshot(self) -> dict:
+        db = self._conn()
+        stored, lease = 0, None
+        if db is not None:
+            with self._lock:
+                try:
+                    stored = db.execute("SELECT COUNT(*) FROM payloads").fetchone()[0]
+                    lease = db.execute("SELECT owner, expires_at FROM lease WHERE id = 1").fetchone()
+                except sqlite3.Error:
+                    pass
+        return {
+            **self.stats,
+            "stored": stored,
+            "warmer_running": self._warmer is not None,
+            "lease_held": bool(lease and lease[0] == self._owner and lease[1] > time.time()),
+            "targets": len(self.targets()),
+        }
+
+
+market_store = MarketStore()
+
+
+if __name__ == "__main__":
+    # Standalone warmer: keeps the shared store fresh while the API workers only read it
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    import routers.jobmarket  # noqa: F401  (registers the payload producers)
+    from agents.market_store import market_store as shared   # the instance the router registered with
+
+    asyncio.run(shared.run())
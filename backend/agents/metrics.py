@@ -0,0 +1,212 @@
+"""
+metrics.py – Prometheus metrics for the API and the AI provider chain.
+Counters and histograms are plain dicts behind a lock, so recording one
+sample costs a tuple lookup and an add. Values that already live
+elsewhere (cache counters, scheduler queue, breakers, threadpool) are not
+duplicated: collectors read them when /metrics is scraped. render() emits
+the Prometheus text exposition format (0.0.4), with no client library needed.
+MetricsMiddleware times every HTTP request by its route template.
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+
+PREFIX = "vidyaguide_"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 60)
+CHAR_BUCKETS    = (256, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+TOKEN_BUCKETS   = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+UNMATCHED_ROUTE = "<unmatched>"   # 404s etc., so random paths don't create new series
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name, self.help, self.labelnames = PREFIX + name, help_text, labels
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def lines(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = PREFIX + name, help_text, labels
+        self.buckets = tuple(buckets)
+        self._values: dict = {}   # labels → [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][i] += 1
+            entry[1] += value
+
+    def lines(self) -> list:
+        with self._lock:
+            items = [(k, list(counts), total) for k, (counts, total) in self._values.items()]
+        out = []
+        for k, counts, total in items:
+            running = 0
+            for bound, n in zip((*self.buckets, math.inf), counts):
+                running += n
+                le = 'le="%s"' % _number(bound)
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, k, le)} {running}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, k)} {_number(total)}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, k)} {running}")
+        return out
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list = []
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        """
+        Register `fn()` → [(name, kind, help, [({label: value}, number), …]), …],
+        called on every scrape for values kept elsewhere. Usable as a decorator.
+        """
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        out = []
+        for metric in self._metrics:
+            out += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.kind}", *metric.lines()]
+        for fn in self._collectors:
+            try:
+                families = fn()
+            except Exception:
+                continue   # a broken collector must not take the whole scrape down
+            for name, kind, help_text, samples in families:
+                out += [f"# HELP {PREFIX}{name} {help_text}", f"# TYPE {PREFIX}{name} {kind}"]
+                for labels, value in samples:
+                    out.append(f"{PREFIX}{name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+        return "\n".join(out) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# ── HTTP ────────────────────────────────────────────────────────────────────
+http_requests = metrics.counter("http_requests_total", "HTTP requests by route template and status.",
+                                ("method", "route", "status"))
+http_latency = metrics.histogram("http_request_duration_seconds",
+                                 "HTTP request latency until the last body chunk was sent.", ("method", "route"))
+_http_in_flight = 0
+
+# ── LLM calls ───────────────────────────────────────────────────────────────
+llm_requests = metrics.counter("llm_requests_total",
+                               "ask_gemini calls by route and how they were answered "
+                               "(exact_cache, semantic_cache, coalesced, upstream, stream).", ("route", "source"))
+llm_results = metrics.counter("llm_upstream_results_total",
+                              "Upstream LLM calls by route and result (ok, ai_error, overloaded).", ("route", "result"))
+llm_latency = metrics.histogram("llm_upstream_duration_seconds",
+                                "Upstream LLM call latency per route, including fallbacks.", ("route",))
+provider_calls = metrics.counter("llm_provider_calls_total",
+                                 "Provider/model attempts by outcome (ok, HTTP status, timeout, error).",
+                                 ("provider", "model", "outcome"))
+provider_latency = metrics.histogram("llm_provider_duration_seconds", "Latency of each provider/model attempt.",
+                                     ("provider", "model"))
+provider_errors = metrics.counter("llm_provider_exceptions_total",
+                                  "Exceptions raised during provider calls, by exception type.",
+                                  ("provider", "model", "exception"))
+fallbacks = metrics.counter("llm_fallbacks_total",
+                            "Times the chain moved past a provider, by the reason it gave up.", ("provider", "reason"))
+prompt_chars = metrics.histogram("llm_prompt_chars", "Prompt size in characters per route.", ("route",), CHAR_BUCKETS)
+prompt_tokens = metrics.histogram("llm_prompt_tokens", "Estimated prompt tokens per route.", ("route",), TOKEN_BUCKETS)
+response_chars = metrics.histogram("llm_response_chars", "Response size in characters per route.", ("route",),
+                                   CHAR_BUCKETS)
+response_tokens = metrics.histogram("llm_response_tokens", "Estimated response tokens per route.", ("route",),
+                                    TOKEN_BUCKETS)
+
+
+@metrics.collector
+def _http_gauges() -> list:
+    return [("http_requests_in_flight", "gauge", "HTTP requests being handled.", [({}, _http_in_flight)])]
+
+
+def route_template(scope: dict) -> str:
+    """
+    "/api/interview/sessions/{session_id}/answer" for a matched request.
+    Rebuilt from the path and its path params, because a route's own
+    `path` lacks the prefix it was included under.
+    """
+    if "endpoint" not in scope:
+        return UNMATCHED_ROUTE
+    params = {str(v): k for k, v in scope.get("path_params", {}).items()}
+    if not params:
+        return scope["path"]
+    return "/".join("{%s}" % params[seg] if seg in params else seg for seg in scope["path"].split("/"))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware), so streaming responses pass straight through."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        global _http_in_flight
+        start = time.perf_counter()
+        status = 500
+
+        async def send_and_record(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        _http_in_flight += 1
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            _http_in_flight -= 1
+            route = route_template(scope)
+            http_latency.observe(time.perf_counter() - start, scope["method"], route)
+            http_requests.inc(scope["method"], route, str(status))
@@ -0,0 +1,86 @@
+"""
+pdf_extract.py – Resume PDF text extraction off the event loop.
+PyMuPDF parsing is CPU-bound, so it runs in a small process pool; the
+event loop only awaits the result. Extraction is bounded by file size,
+page count and gathered text, and stops early once enough text is found.
+A worker that crashes (a malformed PDF segfaulting or exhausting memory
+in the parser) breaks the whole pool, so it is replaced, and the files
+that were in flight are re-run one at a time, so only the culprit fails.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+MAX_PDF_BYTES  = 10 * 1024 * 1024   # reject larger uploads outright
+MAX_PDF_PAGES  = 20                 # resumes beyond this are almost always scans/portfolios
+MAX_TEXT_CHARS = 30_000             # plenty for any prompt; stop reading pages after this
+PDF_WORKERS    = min(4, os.cpu_count() or 1)
+
+_pool: ProcessPoolExecutor | None = None
+_slots: asyncio.Semaphore | None = None
+
+
+def extract_pdf_text(contents: bytes, max_pages: int = MAX_PDF_PAGES, max_chars: int = MAX_TEXT_CHARS) -> dict:
+    """Runs in a worker process. Returns {"text", "pages", "pages_read", "truncated"}."""
+    import fitz  # PyMuPDF
+
+    parts, gathered = [], 0
+    with fitz.open(stream=contents, filetype="pdf") as doc:
+        pages = doc.page_count
+        pages_read = 0
+        for page in doc:
+            if pages_read >= max_pages or gathered >= max_chars:
+                break
+            text = page.get_text()
+            parts.append(text)
+            gathered += len(text)
+            pages_read += 1
+
+    text = "".join(parts)
+    return {
+        "text": text[:max_chars],
+        "pages": pages,
+        "pages_read": pages_read,
+        "truncated": pages_read < pages or len(text) > max_chars,
+    }
+
+
+async def extract_pdf(contents: bytes) -> dict:
+    """Extract text in the process pool; at most 2 × PDF_WORKERS uploads are admitted at once."""
+    global _pool, _slots
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        _slots = asyncio.Semaphore(PDF_WORKERS * 2)
+    loop = asyncio.get_running_loop()
+    async with _slots:
+        pool = _pool
+        try:
+            return await loop.run_in_executor(pool, extract_pdf_text, contents)
+        except BrokenProcessPool:
+            _replace_pool(pool)
+        # Every file in flight fails with the crash; re-run this one alone to see if it was the cause
+        solo = ProcessPoolExecutor(max_workers=1)
+        try:
+            return await loop.run_in_executor(solo, extract_pdf_text, contents)
+        except BrokenProcessPool as e:
+            raise RuntimeError("the PDF parser crashed on this file") from e
+        finally:
+            solo.shutdown(wait=False)
+
+
+def _replace_pool(broken: ProcessPoolExecutor) -> None:
+    """Swap in a fresh pool once per crash (the first caller to notice does it)."""
+    global _pool
+    if _pool is broken:
+        broken.shutdown(wait=False, cancel_futures=True)
+        _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+
+
+def shutdown() -> None:
+    global _pool, _slots
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+    _slots = None
@@ -1,24 +1,125 @@
-from agents.ai_helper import ask_gemini
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass
+
+from agents.ai_helper import ask_gemini, ask_gemini_async, run_sync
+from agents.prompt_budget import Slot, fit_prompt
+
+PIPELINE_ROUTE     = "/api/pipeline/run"
+FUSED_BUDGET_ROUTE = "/api/pipeline/fused"   # token budget of one fused prompt
+
+_FENCE = re.compile(r"```(?:json)?", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class AgentNode:
+    """
+    One agent in the pipeline DAG. `deps` are the agents whose output it
+    reads; `brief` is what its section must cover in fused mode.
+    """
+    key: str
+    name: str
+    icon: str
+    deps: tuple = ()
+    brief: str = ""
+
+
+def _section_text(value) -> str | None:
+    """A fused section as markdown text, or None if it is unusable."""
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, list) and value:
+        return "\n".join(f"- {_section_text(v) or ''}" for v in value)
+    if isinstance(value, dict) and value:
+        return "\n".join(f"**{k}**: {_section_text(v) or ''}" for k, v in value.items())
+    return None
+
+
+def parse_sections(raw: str, keys: tuple) -> dict:
+    """
+    Sections of a fused JSON reply. Falls back to the outermost {...} and
+    then to pulling each "key": "string" pair out on its own, so one
+    malformed section doesn't discard the others.
+    """
+    text = _FENCE.sub("", raw).strip()
+    data = None
+    for candidate in (text, text[text.find("{"):text.rfind("}") + 1]):
+        try:
+            data = json.loads(candidate, strict=False)
+            break
+        except ValueError:
+            continue
+    sections = {}
+    for key in keys:
+        value = _section_text(data.get(key)) if isinstance(data, dict) else None
+        if value is None:
+            m = re.search(rf'"{key}"\s*:\s*"((?:[^"\\]|\\.)*)"(?=\s*[,}}])', text, re.DOTALL)
+            if m:
+                try:
+                    value = _section_text(json.loads(f'"{m.group(1)}"', strict=False))
+                except ValueError:
+                    value = None
+        if value is not None:
+            sections[key] = value
+    return sections
+
 
 class AgentPipeline:
     """
-    Multi-agent orchestration pipeline.
-    Chains: Resume → Career → Skill Gap → Roadmap → Interview Coach
-    Each agent receives context from the previous one.
+    Multi-agent orchestration pipeline, scheduled as a DAG:
+        Resume → Career → Skill Gap → (Roadmap ∥ Interview Coach)
+    Every agent whose dependencies are done runs concurrently. To add an
+    agent, declare an AgentNode in AGENTS and a build_<name>_prompt method.
+
+    Fused mode produces all sections in one (or two) calls returning JSON,
+    for throughput-sensitive batch runs; sections that come back missing or
+    malformed are re-run through their normal agent prompt.
     """
 
+    AGENTS = (
+        AgentNode("resume_agent",    "Resume Agent",              "📄", (),
+                  "Resume Score (0-100), top 3 strengths, top 3 weaknesses, ATS score estimate, "
+                  "key missing keywords for the role"),
+        AgentNode("career_agent",    "Career Intelligence Agent", "🧭", ("resume_agent",),
+                  "best 2 career paths, market demand (High/Medium/Low + reason), alternative roles, "
+                  "timeline to reach the role, top 3 companies to target"),
+        AgentNode("skill_gap_agent", "Skill Gap Agent",           "🎯", ("resume_agent", "career_agent"),
+                  "current skills from the resume, top 10 required skills, missing skills in priority order, "
+                  "skill gap score (0-100, higher = bigger gap), quick wins (learnable in < 2 weeks)"),
+        AgentNode("roadmap_agent",   "Roadmap Planner Agent",     "🗺️", ("skill_gap_agent",),
+                  "12-week roadmap in 2-week blocks, each a topic + mini project (weeks 11-12: portfolio "
+                  "project), plus 3 free resources (YouTube/Coursera/GitHub)"),
+        AgentNode("interview_agent", "Interview Coach Agent",     "🎤", ("skill_gap_agent",),
+                  "top 5 technical questions, top 3 behavioral questions (STAR), common mistakes, "
+                  "top 5 preparation tips, estimated difficulty (Easy/Medium/Hard)"),
+    )
+
+    # Agents produced per fused call: everything at once, or split at the
+    # skill-gap agent so roadmap/interview read its finished output
+    FUSED_CALLS = {
+        1: (("resume_agent", "career_agent", "skill_gap_agent", "roadmap_agent", "interview_agent"),),
+        2: (("resume_agent", "career_agent", "skill_gap_agent"), ("roadmap_agent", "interview_agent")),
+    }
+
     def __init__(self, resume_text: str, target_role: str):
         self.resume_text = resume_text
         self.target_role = target_role
         self.results = {}
+        self.timings = {}   # key → {"start", "end", "duration"} in seconds from run start
+        self.repaired = []  # fused-mode sections that had to be re-run individually
 
-    def run_resume_agent(self) -> str:
-        prompt = f"""You are the Resume Agent in a multi-agent career AI system.
+    # Upstream outputs and the resume are budgeted slots (agents/prompt_budget.py),
+    # so a long resume or a verbose agent can't blow up every downstream prompt.
+    def build_resume_prompt(self) -> str:
+        def template(resume_text: str) -> str:
+            return f"""You are the Resume Agent in a multi-agent career AI system.
 
 Analyze this resume for the target role: "{self.target_role}"
 
 Resume:
-{self.resume_text}
+{resume_text}
 
 Provide a structured evaluation:
 1. Resume Score (0-100)
@@ -28,13 +129,11 @@ Provide a structured evaluation:
 5. Key missing keywords for {self.target_role}
 
 Be concise. Use bullet points."""
-        result = ask_gemini(prompt)
-        self.results["resume_agent"] = result
-        return result
+        return fit_prompt(PIPELINE_ROUTE, template, resume_text=Slot(self.resume_text))
 
-    def run_career_agent(self) -> str:
-        resume_context = self.results.get("resume_agent", "")
-        prompt = f"""You are the Career Intelligence Agent in a multi-agent career AI system.
+    def build_career_prompt(self) -> str:
+        def template(resume_context: str) -> str:
+            return f"""You are the Career Intelligence Agent in a multi-agent career AI system.
 
 Based on this resume analysis:
 {resume_context}
@@ -49,14 +148,11 @@ Provide:
 5. Top 3 companies to target
 
 Be concise. Use bullet points."""
-        result = ask_gemini(prompt)
-        self.results["career_agent"] = result
-        return result
+        return fit_prompt(PIPELINE_ROUTE, template, resume_context=Slot(self.results.get("resume_agent", "")))
 
-    def run_skill_gap_agent(self) -> str:
-        resume_context = self.results.get("resume_agent", "")
-        career_context = self.results.get("career_agent", "")
-        prompt = f"""You are the Skill Gap Agent in a multi-agent career AI system.
+    def build_skill_gap_prompt(self) -> str:
+        def template(resume_context: str, career_context: str) -> str:
+            return f"""You are the Skill Gap Agent in a multi-agent career AI system.
 
 Resume Analysis: {resume_context}
 Career Intelligence: {career_context}
@@ -70,13 +166,13 @@ Identify:
 5. Quick wins (skills to learn in < 2 weeks)
 
 Be concise. Use bullet points."""
-        result = ask_gemini(prompt)
-        self.results["skill_gap_agent"] = result
-        return result
+        return fit_prompt(PIPELINE_ROUTE, template,
+                          resume_context=Slot(self.results.get("resume_agent", ""), priority=2),
+                          career_context=Slot(self.results.get("career_agent", ""), priority=1))
 
-    def run_roadmap_agent(self) -> str:
-        skill_context = self.results.get("skill_gap_agent", "")
-        prompt = f"""You are the Roadmap Planner Agent in a multi-agent career AI system.
+    def build_roadmap_prompt(self) -> str:
+        def template(skill_context: str) -> str:
+            return f"""You are the Roadmap Planner Agent in a multi-agent career AI system.
 
 Skill Gap Analysis: {skill_context}
 Target Role: {self.target_role}
@@ -91,13 +187,11 @@ Create a 12-week learning roadmap:
 
 Also suggest 3 free resources (YouTube/Coursera/GitHub).
 Be concise and specific."""
-        result = ask_gemini(prompt)
-        self.results["roadmap_agent"] = result
-        return result
+        return fit_prompt(PIPELINE_ROUTE, template, skill_context=Slot(self.results.get("skill_gap_agent", "")))
 
-    def run_interview_agent(self) -> str:
-        skill_context = self.results.get("skill_gap_agent", "")
-        prompt = f"""You are the Interview Coach Agent in a multi-agent career AI system.
+    def build_interview_prompt(self) -> str:
+        def template(skill_context: str) -> str:
+            return f"""You are the Interview Coach Agent in a multi-agent career AI system.
 
 Target Role: {self.target_role}
 Skill Profile: {skill_context}
@@ -110,15 +204,138 @@ Generate:
 5. Estimated Interview Difficulty (Easy/Medium/Hard)
 
 Be concise. Use bullet points."""
-        result = ask_gemini(prompt)
-        self.results["interview_agent"] = result
+        return fit_prompt(PIPELINE_ROUTE, template, skill_context=Slot(self.results.get("skill_gap_agent", "")))
+
+    def _prompt_for(self, node: AgentNode) -> str:
+        return getattr(self, f"build_{node.key[:-len('_agent')]}_prompt")()
+
+    def build_fused_prompt(self, keys: tuple) -> str:
+        nodes = [n for n in self.AGENTS if n.key in keys]
+        # Upstream sections produced by an earlier fused call are passed in as context
+        upstream = dict.fromkeys(d for n in nodes for d in n.deps if d not in keys)
+        needs_resume = any(not n.deps for n in nodes)
+        schema = ",\n".join(f'  "{n.key}": "<{n.name}: {n.brief}>"' for n in nodes)
+
+        def template(resume_text: str, context: str) -> str:
+            resume_part = f"\nResume:\n{resume_text}\n" if needs_resume else ""
+            context_part = f"\nEarlier analysis:\n{context}\n" if context else ""
+            return f"""You are a multi-agent career AI system. Act as each agent below in turn for the
+target role "{self.target_role}"; each section builds on the ones before it.
+{resume_part}{context_part}
+Return ONLY a JSON object (no markdown fences, no commentary) with exactly these keys.
+Each value is a string of concise markdown bullet points covering what its agent produces:
+{{
+{schema}
+}}"""
+
+        context = "\n\n".join(f"{n.name}:\n{self.results.get(n.key, '')}" for n in self.AGENTS if n.key in upstream)
+        return fit_prompt(FUSED_BUDGET_ROUTE, template,
+                          resume_text=Slot(self.resume_text if needs_resume else "", priority=1),
+                          context=Slot(context, priority=2))
+
+    # ── Single-agent entry points (sync) ────────────────────────────────────
+    def run_agent(self, key: str) -> str:
+        node = next(n for n in self.AGENTS if n.key == key)
+        result = ask_gemini(self._prompt_for(node), route=PIPELINE_ROUTE)
+        self.results[key] = result
         return result
 
-    def run_all(self) -> dict:
-        """Run all agents in sequence and return combined results."""
-        self.run_resume_agent()
-        self.run_career_agent()
-        self.run_skill_gap_agent()
-        self.run_roadmap_agent()
-        self.run_interview_agent()
+    def run_resume_agent(self) -> str:
+        return self.run_agent("resume_agent")
+
+    def run_career_agent(self) -> str:
+        return self.run_agent("career_agent")
+
+    def run_skill_gap_agent(self) -> str:
+        return self.run_agent("skill_gap_agent")
+
+    def run_roadmap_agent(self) -> str:
+        return self.run_agent("roadmap_agent")
+
+    def run_interview_agent(self) -> str:
+        return self.run_agent("interview_agent")
+
+    # ── DAG scheduler ───────────────────────────────────────────────────────
+    async def _run_node(self, node: AgentNode, t0: float) -> AgentNode:
+        start = time.perf_counter() - t0
+        result = await ask_gemini_async(self._prompt_for(node), route=PIPELINE_ROUTE)
+        end = time.perf_counter() - t0
+        self.results[node.key] = result
+        self.timings[node.key] = {"start": round(start, 3), "end": round(end, 3), "duration": round(end - start, 3)}
+        return node
+
+    async def run_iter(self, keys: tuple | None = None, t0: float | None = None):
+        """
+        Run the DAG (or just the agents in `keys`), starting each agent as
+        soon as its dependencies finish, and yield each AgentNode as it completes.
+        """
+        t0 = time.perf_counter() if t0 is None else t0
+        waiting = {node.key: node for node in self.AGENTS if keys is None or node.key in keys}
+        running = set()
+        try:
+            while waiting or running:
+                for key, node in list(waiting.items()):
+                    if all(dep in self.results for dep in node.deps):
+                        del waiting[key]
+                        running.add(asyncio.create_task(self._run_node(node, t0)))
+                if not running:
+                    raise ValueError(f"Unsatisfiable agent dependencies: {sorted(waiting)}")
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in running:
+                task.cancel()  # consumer went away (e.g. SSE client disconnected)
+
+    async def run_fused_iter(self, calls: int = 1):
+        """
+        Fused mode: produce the sections in `calls` (1 or 2) JSON calls and
+        yield each AgentNode once its section is in. Missing or malformed
+        sections are repaired by running just those agents on the DAG.
+        """
+        t0 = time.perf_counter()
+        nodes = {n.key: n for n in self.AGENTS}
+        for keys in self.FUSED_CALLS.get(calls, self.FUSED_CALLS[1]):
+            start = time.perf_counter() - t0
+            raw = await ask_gemini_async(self.build_fused_prompt(keys), route=PIPELINE_ROUTE)
+            end = time.perf_counter() - t0
+            sections = parse_sections(raw, keys)
+            for key in keys:
+                if key in sections:
+                    self.results[key] = sections[key]
+                    self.timings[key] = {"start": round(start, 3), "end": round(end, 3),
+                                         "duration": round(end - start, 3)}
+                    yield nodes[key]
+            # Repaired before the next call, which may read these sections
+            missing = tuple(k for k in keys if k not in sections)
+            self.repaired.extend(missing)
+            if missing:
+                async for node in self.run_iter(missing, t0):
+                    yield node
+
+    def iter_agents(self, mode: str = "dag", fused_calls: int = 1):
+        """Async iterator of finished agents for the selected execution mode."""
+        return self.run_fused_iter(fused_calls) if mode == "fused" else self.run_iter()
+
+    async def run_all_async(self, mode: str = "dag", fused_calls: int = 1) -> dict:
+        """Run the whole pipeline ("dag" or "fused") and return combined results."""
+        async for _ in self.iter_agents(mode, fused_calls):
+            pass
         return self.results
+
+    def run_all(self) -> dict:
+        """Blocking variant of run_all_async()."""
+        return run_sync(self.run_all_async())
+
+    def critical_path(self) -> dict:
+        """Longest dependency chain of the last run (what bounds its latency)."""
+        if not self.timings:
+            return {"agents": [], "seconds": 0.0}
+        deps = {node.key: node.deps for node in self.AGENTS}
+        key = max(self.timings, key=lambda k: self.timings[k]["end"])
+        path = [key]
+        while deps[key]:
+            key = max(deps[key], key=lambda k: self.timings[k]["end"])
+            path.append(key)
+        path.reverse()
+        return {"agents": path, "seconds": self.timings[path[-1]]["end"]}
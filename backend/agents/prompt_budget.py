@@ -0,0 +1,191 @@
+"""
+prompt_budget.py – Token budgets for every prompt sent through ask_gemini.
+Prompts are built from a fixed template plus variable "slots" (resume
+text, job description, upstream agent output, …). fit_prompt() cleans
+each slot (whitespace, PDF boilerplate, repeated lines and sections),
+then trims slots in priority order until the prompt fits the route's
+token budget, and records the prompt size before and after per route.
+Token counts are a fast local estimate per provider kind, not a tokenizer.
+"""
+
+import math
+import re
+import threading
+from dataclasses import dataclass
+
+from agents.providers import parse_route_ints, registry
+
+# Rough characters per token for ASCII text, by provider kind. Non-ASCII
+# text (Devanagari, emoji, …) tokenizes much denser.
+CHARS_PER_TOKEN     = {"gemini": 4.0, "openai": 3.7}
+NON_ASCII_PER_TOKEN = 1.5
+
+DEFAULT_BUDGET = 3000   # input tokens per prompt unless the route says otherwise
+ROUTE_BUDGETS = {
+    "/api/resume/evaluate":        4000,
+    "/api/resume/upload":          4000,
+    "/api/resume/bulk":            4000,
+    "/api/matcher/match":          5000,
+    "/api/matcher/match-batch":    5000,
+    "/api/pipeline/run":           2500,   # per agent
+    "/api/pipeline/fused":         3500,   # all agents in one prompt
+    "/api/interview/final-report": 4000,
+}
+
+MIN_SLOT_TOKENS  = 32    # never trim a slot below this (unless it is shorter)
+DEDUPE_MIN_CHARS = 20    # shorter repeated lines ("Python", "-") are kept
+TRIM_MARKER      = " …[trimmed]"
+
+_BOILERPLATE = re.compile(
+    r"^(page\s*\d+(\s*(of|/)\s*\d+)?|\d+\s*/\s*\d+|[-_=*•·.~|]{3,}|"
+    r"references (are )?available (up)?on request\.?|curriculum vitae|confidential)$",
+    re.IGNORECASE,
+)
+_HSPACE = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+_SENTENCE_END = re.compile(r"[.!?\n]\s")
+
+
+@dataclass
+class Slot:
+    """
+    Variable prompt input. Lower `priority` is trimmed first; `keep_tail`
+    trims from the front instead and `dedupe=False` keeps repeated lines
+    (transcripts, where the latest turns matter and answers may repeat).
+    """
+    text: str
+    priority: int = 1
+    min_tokens: int = MIN_SLOT_TOKENS
+    keep_tail: bool = False
+    dedupe: bool = True
+
+
+def estimate_tokens(text: str, kind: str | None = None) -> int:
+    """Approximate token count; `kind=None` uses the most conservative provider ratio."""
+    if not text:
+        return 0
+    ratio = CHARS_PER_TOKEN.get(kind, min(CHARS_PER_TOKEN.values()))
+    non_ascii = len(text) - len(text.encode("ascii", "ignore"))
+    return math.ceil((len(text) - non_ascii) / ratio + non_ascii / NON_ASCII_PER_TOKEN)
+
+
+def normalize_text(text: str, dedupe: bool = True) -> str:
+    """Collapse whitespace, drop boilerplate lines and repeated lines / paragraphs."""
+    lines, seen = [], set()
+    for raw in str(text).replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        line = _HSPACE.sub(" ", raw).strip()
+        if _BOILERPLATE.match(line):
+            continue
+        key = line.lower()
+        if dedupe and len(key) >= DEDUPE_MIN_CHARS:
+            if key in seen:
+                continue   # repeated header/footer or copy-pasted section line
+            seen.add(key)
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def trim_to_tokens(text: str, max_tokens: int, kind: str | None = None, keep_tail: bool = False) -> str:
+    """
+    Keep the head (or tail) of `text` within `max_tokens`, cut at a
+    sentence or line boundary when one is close enough.
+    """
+    if estimate_tokens(text, kind) <= max_tokens:
+        return text
+    part = (lambda n: text[len(text) - n:]) if keep_tail else (lambda n: text[:n])
+    lo, hi = 0, len(text)
+    while lo < hi:   # longest part that fits (token estimate is monotonic in length)
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(part(mid), kind) + 4 <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    kept = part(lo)
+    if keep_tail:
+        cut = kept.find("\n")
+        if 0 <= cut < lo * 0.3:
+            kept = kept[cut + 1:]
+        return TRIM_MARKER.strip() + " " + kept.lstrip()
+    ends = [m.end() for m in _SENTENCE_END.finditer(kept)]
+    if ends and ends[-1] > lo * 0.7:
+        kept = kept[:ends[-1]]
+    return kept.rstrip() + TRIM_MARKER
+
+
+def route_budget(route: str) -> int:
+    """Token budget for a route; PROMPT_BUDGETS / PROMPT_TOKEN_BUDGET in .env override the defaults."""
+    overrides = parse_route_ints(registry.get("PROMPT_BUDGETS"))
+    if route in overrides:
+        return overrides[route]
+    try:
+        default = int(registry.get("PROMPT_TOKEN_BUDGET") or DEFAULT_BUDGET)
+    except ValueError:
+        default = DEFAULT_BUDGET
+    return ROUTE_BUDGETS.get(route, default)
+
+
+class PromptStats:
+    """Per-route prompt sizes before and after budgeting."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: dict = {}
+
+    def record(self, route: str, before: int, after: int, trimmed: bool) -> None:
+        with self._lock:
+            s = self._routes.setdefault(route, {"prompts": 0, "tokens_before": 0, "tokens_after": 0,
+                                                "trimmed": 0, "max_before": 0, "max_after": 0})
+            s["prompts"] += 1
+            s["tokens_before"] += before
+            s["tokens_after"] += after
+            s["trimmed"] += trimmed
+            s["max_before"] = max(s["max_before"], before)
+            s["max_after"] = max(s["max_after"], after)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            out = {}
+            for route, s in self._routes.items():
+                n = s["prompts"]
+                out[route] = {
+                    **s,
+                    "avg_before": round(s["tokens_before"] / n),
+                    "avg_after": round(s["tokens_after"] / n),
+                    "saved_pct": round(100 * (1 - s["tokens_after"] / s["tokens_before"]), 1) if s["tokens_before"] else 0.0,
+                    "budget": route_budget(route),
+                }
+            return out
+
+
+prompt_stats = PromptStats()
+
+
+def fit_prompt(route: str, build, **slots) -> str:
+    """
+    Build a prompt within the route's token budget.
+    `build(**texts)` renders the template; each keyword is a Slot or plain
+    string (priority 1). Slots are normalized, then the lowest-priority
+    slots are trimmed until the whole prompt fits.
+    """
+    slots = {name: s if isinstance(s, Slot) else Slot(str(s)) for name, s in slots.items()}
+    raw = build(**{name: s.text for name, s in slots.items()})
+    texts = {name: normalize_text(s.text, s.dedupe) for name, s in slots.items()}
+
+    budget = route_budget(route)
+    fixed = estimate_tokens(build(**{name: "" for name in slots}))
+    sizes = {name: estimate_tokens(t) for name, t in texts.items()}
+    overflow = fixed + sum(sizes.values()) - budget
+    trimmed = False
+    for name in sorted(slots, key=lambda n: slots[n].priority):
+        if overflow <= 0:
+            break
+        floor = min(sizes[name], slots[name].min_tokens)
+        target = max(floor, sizes[name] - overflow)
+        if target < sizes[name]:
+            texts[name] = trim_to_tokens(texts[name], target, keep_tail=slots[name].keep_tail)
+            overflow -= sizes[name] - estimate_tokens(texts[name])
+            trimmed = True
+
+    prompt = build(**texts)
+    prompt_stats.record(route, estimate_tokens(raw), estimate_tokens(prompt), trimmed)
+    return prompt
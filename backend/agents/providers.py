@@ -0,0 +1,143 @@
+"""
+providers.py – Provider registry for the AI helper chain.
+Loads API keys, model lists and timeouts from backend/.env once and
+hot-reloads them only when the file's mtime changes (or reload() is called),
+so rotating keys needs no restart.
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+ENV_PATH = Path(__file__).parent.parent / ".env"
+
+# ── Defaults (overridable from .env) ───────────────────────────────────────
+GEMINI_BASE = "https://generativelanguage.googleapis.com/v1beta/models"
+OPENAI_BASE = "https://api.openai.com/v1/chat/completions"
+GROK_BASE   = "https://api.groq.com/openai/v1/chat/completions"
+
+GEMINI_MODELS = [
+    "gemini-2.0-flash",
+    "gemini-1.5-flash",
+    "gemini-1.5-flash-8b",
+]
+OPENAI_MODEL = "gpt-4o-mini"
+GROK_MODEL   = "llama-3.1-8b-instant"  # llama3-8b-8192 is decommissioned
+
+
+@dataclass
+class Provider:
+    """One entry in the fallback chain. `kind` selects the wire protocol."""
+    name: str
+    kind: str            # "gemini" | "openai"  (OpenAI-compatible chat API)
+    base_url: str
+    models: list = field(default_factory=list)
+    timeout: float = 10.0
+    api_key: str = ""
+
+
+# Ordered chain: name, kind, key env var, base url, models env var, default models, timeout env var, default timeout
+PROVIDER_SPECS = [
+    ("Gemini", "gemini", "GEMINI_API_KEY", GEMINI_BASE, "GEMINI_MODELS", GEMINI_MODELS, "GEMINI_TIMEOUT", 8),   # fail fast on bad key
+    ("OpenAI", "openai", "OPENAI_API_KEY", OPENAI_BASE, "OPENAI_MODEL", [OPENAI_MODEL], "OPENAI_TIMEOUT", 10),
+    ("Groq",   "openai", "GROK_API_KEY",   GROK_BASE,   "GROK_MODEL",   [GROK_MODEL],   "GROK_TIMEOUT",   25),
+]
+
+
+def _parse_env_file(path: Path) -> dict:
+    """Parse a KEY=VALUE file and return key→value dict."""
+    keys: dict = {}
+    try:
+        for line in path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if "=" in line and not line.startswith("#"):
+                k, v = line.split("=", 1)
+                keys[k.strip()] = v.strip()
+    except Exception:
+        pass
+    return keys
+
+
+def parse_route_ints(spec: str) -> dict:
+    """Parse a "route=int,route=int" setting (LLM_CACHE_TTLS, PROMPT_BUDGETS, …)."""
+    values = {}
+    for item in spec.split(","):
+        if "=" in item:
+            route, value = item.split("=", 1)
+            try:
+                values[route.strip()] = int(value)
+            except ValueError:
+                pass
+    return values
+
+
+class ProviderRegistry:
+    """
+    Cached, ordered list of configured providers.
+    Values in backend/.env win over process environment variables.
+    """
+
+    def __init__(self, env_path: Path = ENV_PATH, specs: list = PROVIDER_SPECS):
+        self.env_path = env_path
+        self.specs = list(specs)
+        self._lock = threading.Lock()
+        self._mtime: float | None = None
+        self._env: dict = {}
+        self._providers: list = []
+        self.reload()
+
+    def _file_mtime(self) -> float | None:
+        try:
+            return self.env_path.stat().st_mtime
+        except OSError:
+            return None
+
+    def _lookup(self, key: str, default: str = "") -> str:
+        return (self._env.get(key) or os.environ.get(key, default)).strip()
+
+    def get(self, key: str, default: str = "") -> str:
+        """Look up a setting (file first, then process env)."""
+        self._maybe_reload()
+        return self._lookup(key, default)
+
+    def reload(self) -> list:
+        """Re-read the env file and rebuild the provider chain."""
+        with self._lock:
+            self._mtime = self._file_mtime()
+            self._env = _parse_env_file(self.env_path)
+            self._providers = [self._build(spec) for spec in self.specs]
+            return self._providers
+
+    def _build(self, spec: tuple) -> Provider:
+        name, kind, key_var, base_url, models_var, default_models, timeout_var, default_timeout = spec
+        models = [m.strip() for m in self._lookup(models_var).split(",") if m.strip()] or list(default_models)
+        try:
+            timeout = float(self._lookup(timeout_var) or default_timeout)
+        except ValueError:
+            timeout = float(default_timeout)
+        return Provider(name=name, kind=kind, base_url=base_url, models=models,
+                        timeout=timeout, api_key=self._lookup(key_var))
+
+    def _maybe_reload(self) -> None:
+        if self._file_mtime() != self._mtime:
+            self.reload()
+
+    def providers(self) -> list:
+        """Providers with an API key, in fallback order."""
+        self._maybe_reload()
+        return [p for p in self._providers if p.api_key]
+
+    def register(self, spec: tuple, index: int | None = None) -> None:
+        """Add a provider spec to the chain (appended unless index given)."""
+        self.specs.insert(len(self.specs) if index is None else index, spec)
+        self.reload()
+
+    def describe(self) -> list:
+        """Chain summary safe to return from an endpoint (no keys)."""
+        self._maybe_reload()
+        return [{"name": p.name, "models": p.models, "timeout": p.timeout, "configured": bool(p.api_key)}
+                for p in self._providers]
+
+
+registry = ProviderRegistry()
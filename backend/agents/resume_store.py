@@ -0,0 +1,91 @@
+"""
+resume_store.py – Content-addressed cache for uploaded resumes.
+Each upload is keyed by the SHA-256 of its bytes. The extracted text and
+every evaluation made for it (keyed by target role) live in one JSON file
+per hash; files are evicted least-recently-used once the directory grows
+past its size cap.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+DEFAULT_STORE_DIR = Path(__file__).parent.parent / ".cache" / "resumes"
+MAX_STORE_BYTES   = 200 * 1024 * 1024
+
+
+def content_hash(contents: bytes) -> str:
+    return hashlib.sha256(contents).hexdigest()
+
+
+def _role_key(target_role: str) -> str:
+    return " ".join(target_role.lower().split())
+
+
+class ResumeStore:
+    def __init__(self, store_dir: Path = DEFAULT_STORE_DIR, max_bytes: int = MAX_STORE_BYTES):
+        self.dir = Path(store_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = sum(f.stat().st_size for f in self.dir.glob("*.json"))
+
+    def _path(self, digest: str) -> Path:
+        return self.dir / f"{digest}.json"
+
+    def _read(self, digest: str) -> dict | None:
+        path = self._path(digest)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)  # mtime doubles as the LRU clock
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, digest: str, entry: dict) -> None:
+        path = self._path(digest)
+        old = path.stat().st_size if path.exists() else 0
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(path)
+        self._size += path.stat().st_size - old
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        files = sorted(self.dir.glob("*.json"), key=lambda f: f.stat().st_mtime)
+        for f in files:
+            if self._size <= self.max_bytes * 0.9:
+                break
+            size = f.stat().st_size
+            f.unlink(missing_ok=True)
+            self._size -= size
+
+    def get_extraction(self, digest: str) -> dict | None:
+        with self._lock:
+            entry = self._read(digest)
+            return entry["extraction"] if entry else None
+
+    def put_extraction(self, digest: str, extraction: dict) -> None:
+        with self._lock:
+            entry = self._read(digest) or {"evaluations": {}}
+            entry["extraction"] = extraction
+            self._write(digest, entry)
+
+    def get_evaluation(self, digest: str, target_role: str) -> str | None:
+        with self._lock:
+            entry = self._read(digest)
+            return entry["evaluations"].get(_role_key(target_role)) if entry else None
+
+    def put_evaluation(self, digest: str, target_role: str, evaluation: str) -> None:
+        with self._lock:
+            entry = self._read(digest)
+            if entry is None:
+                return  # extraction was evicted in between; nothing to attach to
+            entry["evaluations"][_role_key(target_role)] = evaluation
+            self._write(digest, entry)
+
+
+resume_store = ResumeStore()
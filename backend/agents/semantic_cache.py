@@ -0,0 +1,220 @@
+"""
+semantic_cache.py – Near-duplicate prompt cache (tier 3 behind llm_cache).
+Callers pass the variable parts of a prompt (role, location, skills, …).
+Only a route's free-text fields (ROUTE_FUZZY_FIELDS) are compared fuzzily:
+each is vectorized with character n-grams and compared against a
+precomputed sparse matrix per field, and a stored answer is served when
+the *weakest* field similarity passes the route's threshold, so
+"ML Engineer / Bengaluru" reuses "Machine Learning Engineer / Bangalore"
+but "Data Scientist / India" never answers for "Data Scientist / USA".
+Every other field (skill lists, experience level, numbers), plus any
+seniority words and numbers inside the free-text fields, must match
+exactly as a normalized token set: "Python, SQL" reuses "sql, python",
+but adding "AWS" or turning "Engineer" into "Senior Engineer" or
+"Engineer Intern" is a different question.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+
+# Minimum per-field cosine similarity to reuse an answer, per route.
+# Routes not listed only use the exact-match cache.
+ROUTE_THRESHOLDS = {
+    "/api/jobmarket/insights":   0.85,
+    "/api/jobmarket/structured": 0.85,
+    "/api/career/guidance":      0.92,
+    "/api/skills/analyze":       0.92,
+    "/api/roadmap/generate":     0.92,
+}
+
+# Fields compared by n-gram similarity; all other fields must match exactly
+ROUTE_FUZZY_FIELDS = {
+    "/api/jobmarket/insights":   ("role", "location"),
+    "/api/jobmarket/structured": ("role", "location"),
+    "/api/career/guidance":      ("current_role",),
+    "/api/skills/analyze":       ("target_role",),
+    "/api/roadmap/generate":     ("target_role",),
+}
+
+# Words that change the question even inside a free-text field
+QUALIFIERS = {
+    "intern", "internship", "trainee", "apprentice", "fresher", "entry", "junior", "associate", "mid",
+    "senior", "lead", "staff", "principal", "head", "chief", "director", "manager", "vp", "ii", "iii", "iv",
+}
+
+MAX_ENTRIES_PER_ROUTE = 20000
+MAX_GROUPS            = 50000   # distinct exact-field combinations kept (LRU)
+MERGE_EVERY           = 32      # pending rows folded into the main matrix in batches
+
+# Common spellings folded together before vectorizing
+ALIASES = {
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "swe": "software engineer",
+    "sde": "software engineer",
+    "dev": "developer",
+    "sr": "senior",
+    "jr": "junior",
+    "bengaluru": "bangalore",
+    "mumbai": "bombay",
+    "gurugram": "gurgaon",
+    "us": "usa",
+    "united states": "usa",
+    "uk": "united kingdom",
+}
+
+_TOKEN = re.compile(r"[a-z0-9+#./]+")
+
+# Stateless vectorizer → no fit step, so adds never trigger a refit
+_vectorizer = HashingVectorizer(
+    analyzer="char_wb",
+    ngram_range=(2, 4),
+    n_features=2 ** 18,
+    alternate_sign=False,
+    norm="l2",
+)
+
+
+def normalize_field(value) -> str:
+    text = str(value).lower()
+    for phrase, canonical in ALIASES.items():
+        if " " in phrase:
+            text = text.replace(phrase, canonical)
+    tokens = (tok.rstrip(".") for tok in _TOKEN.findall(text))   # "Sr." → "sr", "node.js" kept
+    return " ".join(ALIASES.get(tok, tok) for tok in tokens if tok) or "<empty>"
+
+
+def token_set(value) -> frozenset:
+    """Order-insensitive exact form: "Python, SQL" == "sql python"."""
+    return frozenset(normalize_field(value).split())
+
+
+def _qualifiers(value) -> frozenset:
+    return frozenset(t for t in token_set(value) if t in QUALIFIERS or t.replace(".", "").isdigit())
+
+
+class _RouteIndex:
+    """
+    Sparse matrices (one per fuzzy field) plus answers and expiry for the
+    entries of one route that share the same exact fields.
+    Matrices are kept in CSC form so a lookup only touches the columns of
+    the n-grams present in the query.
+    """
+
+    def __init__(self, fields: tuple):
+        self.fields = fields
+        self.matrices = {f: sp.csc_matrix((0, _vectorizer.n_features)) for f in fields}
+        self.answers: list = []
+        self.expires = np.empty(0)
+        self.pending: list = []   # (vectors-by-field, answer, expires_at)
+
+    def merge(self) -> None:
+        if not self.pending:
+            return
+        for f in self.fields:
+            self.matrices[f] = sp.vstack([self.matrices[f]] + [p[0][f] for p in self.pending], format="csc")
+        self.answers.extend(p[1] for p in self.pending)
+        self.expires = np.concatenate([self.expires, [p[2] for p in self.pending]])
+        self.pending = []
+
+        # Drop expired rows, then the oldest if still over the cap
+        keep = np.flatnonzero(self.expires > time.time())[-MAX_ENTRIES_PER_ROUTE:]
+        if len(keep) < len(self.answers):
+            for f in self.fields:
+                self.matrices[f] = self.matrices[f][keep]
+            self.answers = [self.answers[i] for i in keep]
+            self.expires = self.expires[keep]
+
+    def best(self, query: dict) -> tuple:
+        """(similarity, answer) of the closest live entry, or (0.0, None)."""
+        if len(self.pending) >= MERGE_EVERY:
+            self.merge()
+        candidates = []
+        if self.answers:
+            candidates.append((self.matrices, self.answers, self.expires))
+        if self.pending:
+            pending_matrices = {f: sp.vstack([p[0][f] for p in self.pending], format="csr") for f in self.fields}
+            candidates.append((pending_matrices, [p[1] for p in self.pending], np.array([p[2] for p in self.pending])))
+
+        best_sim, best_answer, now = 0.0, None, time.time()
+        for matrices, answers, expires in candidates:
+            sims = np.ones(len(answers))   # no fuzzy fields → the exact key already matched
+            for f in self.fields:
+                q = query[f]
+                sims = np.minimum(sims, np.asarray(matrices[f][:, q.indices] @ q.data).ravel())
+            sims[expires <= now] = 0.0
+            i = int(np.argmax(sims))
+            if sims[i] > best_sim:
+                best_sim, best_answer = float(sims[i]), answers[i]
+        return best_sim, best_answer
+
+
+class SemanticCache:
+    def __init__(self, thresholds: dict = ROUTE_THRESHOLDS, fuzzy_fields: dict = ROUTE_FUZZY_FIELDS):
+        self.thresholds = thresholds
+        self.fuzzy_fields = fuzzy_fields
+        self._lock = threading.Lock()
+        self._routes: OrderedDict = OrderedDict()   # (route, field names, exact key) → _RouteIndex
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    def enabled(self, route: str) -> bool:
+        return route in self.thresholds
+
+    def _split(self, route: str, fields: dict) -> tuple:
+        """(index key, fuzzy fields) — the key holds everything that must match exactly."""
+        fuzzy = {n: v for n, v in fields.items() if n in self.fuzzy_fields.get(route, ())}
+        exact = tuple(sorted((n, token_set(v)) for n, v in fields.items() if n not in fuzzy))
+        qualifiers = tuple(sorted((n, _qualifiers(v)) for n, v in fuzzy.items()))
+        return (route, tuple(sorted(fields)), exact, qualifiers), fuzzy
+
+    @staticmethod
+    def _vectorize(fields: dict) -> dict:
+        names = sorted(fields)
+        if not names:
+            return {}
+        rows = _vectorizer.transform([normalize_field(fields[n]) for n in names])
+        return {n: rows[i] for i, n in enumerate(names)}
+
+    def get(self, route: str, fields: dict) -> str | None:
+        index_key, fuzzy = self._split(route, fields)
+        query = self._vectorize(fuzzy)
+        with self._lock:
+            index = self._routes.get(index_key)
+            sim, answer = index.best(query) if index is not None else (0.0, None)
+            if answer is not None and sim >= self.thresholds[route]:
+                self._routes.move_to_end(index_key)
+                self.stats["hits"] += 1
+                return answer
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, route: str, fields: dict, answer: str, ttl: float) -> None:
+        index_key, fuzzy = self._split(route, fields)
+        vectors = self._vectorize(fuzzy)
+        with self._lock:
+            index = self._routes.get(index_key)
+            if index is None:
+                index = self._routes[index_key] = _RouteIndex(tuple(sorted(fuzzy)))
+                while len(self._routes) > MAX_GROUPS:
+                    self._routes.popitem(last=False)
+            self._routes.move_to_end(index_key)
+            index.pending.append((vectors, answer, time.time() + ttl))
+            self.stats["stores"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": sum(len(i.answers) + len(i.pending) for i in self._routes.values()),
+            }
+
+
+semantic_cache = SemanticCache()
@@ -0,0 +1,193 @@
+"""
+skill_extractor.py – Shared multi-word skill extractor.
+A skill taxonomy (canonical name → synonyms) is compiled once into an
+Aho-Corasick automaton; one linear pass over the text finds every
+synonym, including multi-word and symbol-bearing ones ("machine learning",
+"ci/cd", "c++"), and maps it to its canonical skill.
+"""
+
+import re
+from collections import Counter, deque
+
+# Canonical skill → synonyms (matched case-insensitively on word boundaries).
+# Only the synonyms are matched, so names that are also plain English
+# ("go", "r", "node", "express", "spring", "swift", "excel", "spark") need
+# an explicit phrase ("golang", "node.js", "spring boot", "ms excel").
+SKILL_TAXONOMY = {
+    # Languages
+    "python": ["python", "python3"],
+    "java": ["java"],
+    "javascript": ["javascript", "js", "ecmascript", "es6"],
+    "typescript": ["typescript"],
+    "c": ["c language", "ansi c"],
+    "c++": ["c++", "cpp"],
+    "c#": ["c#", "csharp", "c sharp"],
+    "go": ["golang", "go lang"],
+    "rust": ["rust"],
+    "kotlin": ["kotlin"],
+    "swift": ["swift programming", "swift language", "swiftui", "swift 5"],
+    "scala": ["scala"],
+    "r": ["r programming", "r language", "rstudio"],
+    "php": ["php"],
+    "ruby": ["ruby"],
+    "bash": ["bash", "shell scripting", "shell script"],
+    "sql": ["sql", "t-sql", "pl/sql", "plsql"],
+    # Web / frameworks
+    "html": ["html", "html5"],
+    "css": ["css", "css3", "sass", "scss"],
+    "react": ["react", "react.js", "reactjs"],
+    "react native": ["react native"],
+    "angular": ["angular", "angularjs"],
+    "vue": ["vue", "vue.js", "vuejs"],
+    "next.js": ["next.js", "nextjs"],
+    "node.js": ["node.js", "nodejs", "node js"],
+    "express": ["express.js", "expressjs", "express js"],
+    "django": ["django"],
+    "flask": ["flask"],
+    "fastapi": ["fastapi"],
+    "spring boot": ["spring boot", "springboot", "spring framework", "spring mvc"],
+    ".net": [".net", "dotnet", "asp.net"],
+    "graphql": ["graphql"],
+    "rest api": ["rest api", "rest apis", "restful"],
+    "microservices": ["microservices", "microservice"],
+    # Data / ML
+    "machine learning": ["machine learning", "ml"],
+    "deep learning": ["deep learning"],
+    "artificial intelligence": ["artificial intelligence", "ai"],
+    "natural language processing": ["natural language processing", "nlp"],
+    "computer vision": ["computer vision", "opencv"],
+    "generative ai": ["generative ai", "genai", "gen ai", "llm", "llms", "large language models"],
+    "data analysis": ["data analysis", "data analytics"],
+    "data visualization": ["data visualization", "data visualisation"],
+    "statistics": ["statistics", "statistical analysis"],
+    "tensorflow": ["tensorflow", "tf2"],
+    "pytorch": ["pytorch"],
+    "keras": ["keras"],
+    "scikit-learn": ["scikit-learn", "sklearn", "scikit learn"],
+    "pandas": ["pandas"],
+    "numpy": ["numpy"],
+    "spark": ["apache spark", "pyspark", "spark sql", "spark streaming"],
+    "hadoop": ["hadoop"],
+    "kafka": ["kafka", "apache kafka"],
+    "airflow": ["airflow", "apache airflow"],
+    "etl": ["etl", "elt", "data pipelines", "data pipeline"],
+    "power bi": ["power bi", "powerbi"],
+    "tableau": ["tableau"],
+    "excel": ["ms excel", "microsoft excel", "advanced excel", "excel vba"],
+    # Databases
+    "postgresql": ["postgresql", "postgres"],
+    "mysql": ["mysql"],
+    "mongodb": ["mongodb", "mongo"],
+    "redis": ["redis"],
+    "elasticsearch": ["elasticsearch", "elastic search"],
+    "nosql": ["nosql"],
+    # Cloud / DevOps
+    "aws": ["aws", "amazon web services"],
+    "azure": ["azure", "microsoft azure"],
+    "gcp": ["gcp", "google cloud", "google cloud platform"],
+    "docker": ["docker", "containerization"],
+    "kubernetes": ["kubernetes", "k8s"],
+    "terraform": ["terraform"],
+    "ansible": ["ansible"],
+    "jenkins": ["jenkins"],
+    "ci/cd": ["ci/cd", "ci cd", "cicd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "git": ["git", "github", "gitlab", "version control"],
+    "linux": ["linux", "unix"],
+    "devops": ["devops"],
+    "mlops": ["mlops"],
+    # Security
+    "cybersecurity": ["cybersecurity", "cyber security", "information security", "infosec"],
+    "penetration testing": ["penetration testing", "pen testing", "pentesting", "ethical hacking"],
+    "networking": ["networking", "tcp/ip", "computer networks"],
+    # Practices / soft skills
+    "data structures": ["data structures", "dsa", "data structures and algorithms"],
+    "algorithms": ["algorithms"],
+    "system design": ["system design"],
+    "object-oriented programming": ["object-oriented programming", "object oriented programming", "oop", "oops"],
+    "agile": ["agile", "scrum", "kanban"],
+    "unit testing": ["unit testing", "unit tests", "pytest", "junit", "tdd"],
+    "communication": ["communication", "communication skills"],
+    "leadership": ["leadership", "team lead", "team leadership"],
+    "problem solving": ["problem solving", "problem-solving"],
+}
+
+_WS = re.compile(r"\s+")
+
+
+class SkillExtractor:
+    """Aho-Corasick automaton over the synonyms of a skill taxonomy."""
+
+    def __init__(self, taxonomy: dict = SKILL_TAXONOMY):
+        self._goto: list = [{}]      # state → {char: next state}
+        self._fail: list = [0]
+        self._out: list = [[]]       # state → [(pattern length, canonical)]
+        for canonical, synonyms in taxonomy.items():
+            for synonym in synonyms:
+                self._insert(_WS.sub(" ", synonym.lower()).strip(), canonical)
+        self._build_failure_links()
+
+    def _insert(self, pattern: str, canonical: str) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), canonical))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                if state == 0:
+                    continue  # depth-1 states fail to the root
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _matches(self, text: str) -> list:
+        """Non-overlapping (start, end, canonical), longest match first at each start."""
+        found = []
+        state = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, canonical in out[state]:
+                start, end = i - length + 1, i + 1
+                # Whole-word only: "java" must not match inside "javascript"
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    found.append((start, end, canonical))
+
+        found.sort(key=lambda m: (m[0], m[0] - m[1]))
+        result, last_end = [], -1
+        for start, end, canonical in found:
+            if start >= last_end:
+                result.append((start, end, canonical))
+                last_end = end
+        return result
+
+    def counts(self, text: str) -> Counter:
+        """Canonical skill → number of mentions."""
+        return Counter(c for _, _, c in self._matches(_WS.sub(" ", text.lower())))
+
+    def extract(self, text: str) -> list:
+        """Unique canonical skills in order of first mention."""
+        return list(dict.fromkeys(c for _, _, c in self._matches(_WS.sub(" ", text.lower()))))
+
+
+extractor = SkillExtractor()
+
+
+def extract_skills(text: str) -> list:
+    """Shared entry point for routers: canonical skills mentioned in `text`."""
+    return extractor.extract(text)
@@ -0,0 +1,20 @@
+"""
+sse.py – Server-Sent Events helpers shared by the streaming routes.
+"""
+
+import json
+from fastapi.responses import StreamingResponse
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one SSE frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(events) -> StreamingResponse:
+    """Wrap an (async) iterator of frames; disables proxy buffering."""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
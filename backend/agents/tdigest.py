@@ -0,0 +1,152 @@
+"""
+tdigest.py – Mergeable streaming quantile sketch (merging t-digest).
+Values are buffered and periodically folded into a sorted set of weighted
+centroids whose size is bounded by the compression parameter, so memory
+is constant no matter how many values are added. Centroids are small near
+the tails and large in the middle, which keeps extreme percentiles sharp.
+Two digests merge by pooling their centroids and re-compressing, so
+sketches built by different workers combine without the raw data.
+"""
+
+import math
+
+import numpy as np
+
+DEFAULT_COMPRESSION = 100
+BUFFER_FACTOR       = 5      # raw values buffered per unit of compression before folding
+
+
+class TDigest:
+    def __init__(self, compression: float = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: list = []
+
+    # ── Building ────────────────────────────────────────────────────────────
+    def add(self, value: float, weight: float = 1.0) -> None:
+        value = float(value)
+        self._buffer.append((value, weight))
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= BUFFER_FACTOR * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        """Fold another digest into this one (in place) and return self."""
+        other._compress()
+        if other.count:
+            self._compress(other.means, other.weights)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        return self
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q_limit(self, q: float) -> float:
+        """Largest quantile a centroid starting at q may reach (one unit of k)."""
+        k = self._k(q) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self, extra_means=None, extra_weights=None) -> None:
+        parts_m, parts_w = [self.means], [self.weights]
+        if self._buffer:
+            buffered = np.array(self._buffer)
+            parts_m.append(buffered[:, 0])
+            parts_w.append(buffered[:, 1])
+            self._buffer = []
+        if extra_means is not None:
+            parts_m.append(extra_means)
+            parts_w.append(extra_weights)
+        if len(parts_m) == 1:
+            return
+
+        means, weights = np.concatenate(parts_m), np.concatenate(parts_w)
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order].tolist(), weights[order].tolist()
+        total = sum(weights)
+
+        out_m, out_w = [], []
+        cur_m, cur_w = means[0], weights[0]
+        done = 0.0
+        limit = self._q_limit(0.0)
+        for m, w in zip(means[1:], weights[1:]):
+            # Equal values always share a centroid, so discrete data stays exact
+            if m == cur_m or (done + cur_w + w) / total <= limit:
+                cur_w += w
+                cur_m += (m - cur_m) * w / cur_w
+            else:
+                out_m.append(cur_m)
+                out_w.append(cur_w)
+                done += cur_w
+                limit = self._q_limit(done / total)
+                cur_m, cur_w = m, w
+        out_m.append(cur_m)
+        out_w.append(cur_w)
+        self.means, self.weights = np.array(out_m), np.array(out_w)
+
+    # ── Queries ─────────────────────────────────────────────────────────────
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum()) + sum(w for _, w in self._buffer)
+
+    def mean(self) -> float:
+        self._compress()
+        return float(self.means @ self.weights / self.weights.sum()) if len(self.means) else 0.0
+
+    def _curve(self) -> tuple:
+        """Interpolation knots (values, cumulative weight at each centroid's midpoint)."""
+        self._compress()
+        xs = self.means
+        ys = np.cumsum(self.weights) - self.weights / 2
+        if self.min < xs[0]:
+            xs, ys = np.concatenate([[self.min], xs]), np.concatenate([[0.0], ys])
+        if self.max > xs[-1]:
+            xs, ys = np.concatenate([xs, [self.max]]), np.concatenate([ys, [self.weights.sum()]])
+        return xs, ys
+
+    def cdf(self, values):
+        """
+        Fraction of the weight below each value, counting ties as half
+        (mid-rank). Accepts a scalar or an array; each lookup is a binary
+        search over the centroids.
+        """
+        if not self.count:
+            return np.full(np.shape(values), 0.5) if np.ndim(values) else 0.5
+        xs, ys = self._curve()
+        total = float(self.weights.sum())
+        result = np.interp(values, xs, ys, left=0.0, right=total) / total
+        return result if np.ndim(values) else float(result)
+
+    def quantile(self, q):
+        """Value at quantile q (scalar or array in [0, 1])."""
+        if not self.count:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else math.nan
+        xs, ys = self._curve()
+        result = np.interp(np.asarray(q) * float(self.weights.sum()), ys, xs)
+        return result if np.ndim(q) else float(result)
+
+    # ── Serialization ───────────────────────────────────────────────────────
+    def to_dict(self) -> dict:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TDigest":
+        digest = cls(data.get("compression", DEFAULT_COMPRESSION))
+        digest.means = np.array(data["means"], dtype=float)
+        digest.weights = np.array(data["weights"], dtype=float)
+        if len(digest.means):
+            digest.min, digest.max = data["min"], data["max"]
+        return digest
@@ -1,16 +1,42 @@
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import anyio.to_thread
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from agents import ai_helper, pdf_extract
+from agents.cohort_store import cohort_store
+from agents.health import health
+from agents.interview_sessions import session_store
+from agents.llm_cache import cache
+from agents.llm_scheduler import LLMOverloaded, scheduler
+from agents.market_store import market_store
+from agents.metrics import MetricsMiddleware, metrics
+from agents.prompt_budget import prompt_stats
+from agents.semantic_cache import semantic_cache
+from agents.providers import registry
 from routers import resume, career, skills, roadmap, jobmarket, interview, growth, benchmarking, matcher, pipeline
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ai_helper.startup()   # pooled keep-alive client for all LLM calls
+    session_store.purge_expired()
+    market_store.start()        # keeps common job-market payloads precomputed
+    yield
+    await market_store.stop()
+    await ai_helper.shutdown()
+    pdf_extract.shutdown()
+    cohort_store.flush()        # merge this worker's buffered peer profiles
+
 app = FastAPI(
     title="VidyaGuide AI API",
     description="Agentic AI backend for career planning, resume evaluation, and interview coaching — Multi-Agent Architecture",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -25,6 +51,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)   # outermost, so it times the whole request
+
+@app.exception_handler(LLMOverloaded)
+async def llm_overloaded(request: Request, exc: LLMOverloaded):
+    """The LLM scheduler is saturated: fail fast instead of hanging until a timeout."""
+    return JSONResponse(
+        {"error": "The AI service is busy right now. Please retry shortly.", "retry_after": exc.retry_after},
+        status_code=429,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 app.include_router(resume.router, prefix="/api/resume", tags=["Resume Agent"])
 app.include_router(career.router, prefix="/api/career", tags=["Career Intelligence"])
@@ -46,7 +82,102 @@ def root():
         "features": 10
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@metrics.collector
+def _service_metrics() -> list:
+    """Counters kept by the caches, scheduler and breakers, read at scrape time."""
+    llm, semantic, market = cache.snapshot(), semantic_cache.snapshot(), market_store.stats
+    flight, sched = ai_helper.single_flight_snapshot(), scheduler.snapshot()
+    breakers = health.snapshot()
+    return [
+        ("cache_lookups_total", "counter", "Cache lookups by cache and result.", [
+            ({"cache": "llm_exact", "result": "memory_hit"}, llm["memory_hits"]),
+            ({"cache": "llm_exact", "result": "disk_hit"}, llm["disk_hits"]),
+            ({"cache": "llm_exact", "result": "miss"}, llm["misses"]),
+            ({"cache": "llm_semantic", "result": "hit"}, semantic["hits"]),
+            ({"cache": "llm_semantic", "result": "miss"}, semantic["misses"]),
+            ({"cache": "market", "result": "hit"}, market["hits"]),
+            ({"cache": "market", "result": "stale_hit"}, market["stale_hits"]),
+            ({"cache": "market", "result": "miss"}, market["misses"]),
+        ]),
+        ("cache_hit_ratio", "gauge", "Hit rate since start per LLM cache tier.", [
+            ({"cache": "llm_exact"}, llm["hit_rate"]),
+            ({"cache": "llm_semantic"}, semantic["hit_rate"]),
+        ]),
+        ("llm_single_flight_total", "counter", "Upstream calls made vs. identical calls that joined one in flight.", [
+            ({"kind": "upstream"}, flight["upstream"]),
+            ({"kind": "coalesced"}, flight["coalesced"]),
+        ]),
+        ("llm_scheduler_slots", "gauge", "LLM call slots in use, waiting, and available.", [
+            ({"state": "active"}, sched["active"]),
+            ({"state": "queued"}, sched["queued"]),
+            ({"state": "max"}, sched["max_concurrency"]),
+        ]),
+        ("llm_scheduler_events_total", "counter", "Scheduler admissions, queueing and load shedding per class.", [
+            ({"class": name, "event": event}, n) for name, events in sched["classes"].items() for event, n in events.items()
+        ]),
+        ("llm_rate_limit_throttled_total", "counter", "Provider skips for lack of local rate budget.", [
+            ({"provider": name}, p["throttled"]) for name, p in sched["providers"].items()
+        ]),
+        ("llm_breaker_open", "gauge", "1 while the provider or provider/model circuit breaker is open.", [
+            ({"target": key}, state["state"] == "open") for key, state in breakers.items()
+        ]),
+        ("llm_ewma_latency_seconds", "gauge", "EWMA latency used to rank providers.", [
+            ({"target": key}, state["ewma_latency"]) for key, state in breakers.items()
+        ]),
+    ]
+
+@metrics.collector
+def _threadpool_metrics() -> list:
+    """Saturation of the threadpool that runs sync route handlers (read on the event loop)."""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return [
+        ("threadpool_threads", "gauge", "Worker threads busy and available for sync handlers.", [
+            ({"state": "busy"}, limiter.borrowed_tokens),
+            ({"state": "max"}, limiter.total_tokens),
+        ]),
+        ("threadpool_tasks_waiting", "gauge", "Sync handlers waiting for a free worker thread.", [
+            ({}, limiter.statistics().tasks_waiting),
+        ]),
+    ]
+
 @app.get("/debug/key")
 def debug_key():
     key = os.getenv("GEMINI_API_KEY", "NOT_SET")
     return {"key_length": len(key), "key_prefix": key[:8] if key != "NOT_SET" else "NOT_SET", "key_suffix": key[-4:] if key != "NOT_SET" else "NOT_SET"}
+
+@app.post("/debug/reload-providers")
+def reload_providers():
+    """Force a re-read of backend/.env (keys, models, timeouts) without a restart."""
+    registry.reload()
+    return {"providers": registry.describe()}
+
+@app.get("/debug/providers")
+def provider_health():
+    """Provider chain plus breaker state and EWMA latency / success rate."""
+    return {"providers": registry.describe(), "health": health.snapshot()}
+
+@app.get("/debug/cache")
+def cache_stats():
+    """LLM response cache hit/miss counters (exact and near-duplicate tiers) and coalesced calls."""
+    return {"llm_cache": cache.snapshot(), "semantic_cache": semantic_cache.snapshot(),
+            "single_flight": ai_helper.single_flight_snapshot()}
+
+@app.get("/debug/precompute")
+def precompute_stats():
+    """Precomputed job-market payloads: hits, stale serves, warmer refreshes."""
+    return {"market": market_store.snapshot()}
+
+@app.get("/debug/scheduler")
+def scheduler_stats():
+    """LLM call slots and queue per priority class, plus provider rate-limit buckets."""
+    return {"scheduler": scheduler.snapshot()}
+
+@app.get("/debug/prompts")
+def prompt_sizes():
+    """Estimated prompt tokens per route, before and after budgeting."""
+    return {"routes": prompt_stats.snapshot()}
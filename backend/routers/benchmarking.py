@@ -1,10 +1,22 @@
+import asyncio
 from fastapi import APIRouter
 from pydantic import BaseModel
-from agents.ai_helper import ask_gemini
+import numpy as np
+from agents.ai_helper import ask_gemini, ask_gemini_async
+from agents.cohort_store import DIMENSIONS, branch_key, cohort_store, contributor_key, role_key
+from agents.prompt_budget import Slot, fit_prompt
 
 router = APIRouter()
 
-# Role-specific cohort averages for realistic benchmarking
+RADAR_LABELS = {"skills_count": "Skills", "experience_years": "Experience",
+                "projects_count": "Projects", "certifications": "Certifications"}
+MAX_INGEST_PROFILES   = 10000
+MAX_BATCH_STUDENTS    = 2000
+MAX_BATCH_INSIGHTS    = 20
+BATCH_LLM_CONCURRENCY = 4
+
+# Cold-start priors: role-specific averages used only until a real peer
+# cohort (agents/cohort_store.py) has enough profiles
 COHORT_DATA = {
     "default": {"skills_count": 8, "experience_years": 1.5, "projects_count": 4, "certifications": 1},
     "ml engineer": {"skills_count": 12, "experience_years": 2.0, "projects_count": 5, "certifications": 2},
@@ -26,13 +38,102 @@ class BenchmarkRequest(BaseModel):
     certifications: int
     skills_count: int
     branch: str = "CSE"  # CSE / ECE / IT / MCA / Other
+    contribute: bool = False  # opt in: add this profile to the peer cohort after comparing
+
+class CohortProfile(BaseModel):
+    role: str
+    branch: str = "CSE"
+    skills_count: int
+    experience_years: float
+    projects_count: int
+    certifications: int
+
+class IngestProfilesRequest(BaseModel):
+    profiles: list[CohortProfile]
+
+class BatchBenchmarkRequest(BaseModel):
+    students: list[BenchmarkRequest]
+    insights_for: list[int] = []   # indices of the students who get AI insights
+
+def score_matrix(rows: list) -> np.ndarray:
+    """N × 4 matrix of the benchmarked stats, columns in DIMENSIONS order."""
+    return np.array([[getattr(r, dim) for dim in DIMENSIONS] for r in rows], dtype=float).reshape(len(rows), len(DIMENSIONS))
+
+def cohort_benchmark(role: str, branch: str, scores: np.ndarray) -> tuple:
+    """
+    (N × 4 dimension percentiles, N × 4 radar values, cohort metadata) for
+    rows that share one cohort. Uses true empirical percentiles from the
+    peer cohort's quantile sketches when it is big enough, and the static
+    role priors (sigmoid of the ratio to the average) until then.
+    """
+    sketches, label = cohort_store.cohort(role, branch)
+    if sketches:
+        cdf = np.column_stack([sketches[dim].cdf(scores[:, j]) for j, dim in enumerate(DIMENSIONS)])
+        percentiles = np.clip(np.rint(cdf * 100), 1, 99).astype(int)
+        return percentiles, percentiles, {   # radar on the percentile scale: the peer median sits at 50
+            "cohort_averages": {dim: round(sketches[dim].mean(), 1) for dim in DIMENSIONS},
+            "cohort_quantiles": {dim: dict(zip(("p25", "p50", "p75", "p90"),
+                                               (round(float(v), 1) for v in sketches[dim].quantile([0.25, 0.5, 0.75, 0.9]))))
+                                 for dim in DIMENSIONS},
+            "cohort_type": label,
+            "cohort_source": "peers",
+            "cohort_size": int(min(s.count for s in sketches.values())),
+        }
+
+    prior_key = role.lower().strip()
+    cohort_averages = COHORT_DATA.get(prior_key, COHORT_DATA["default"])
+    averages = np.array([cohort_averages[dim] for dim in DIMENSIONS], dtype=float)
+    ratio = scores / np.maximum(averages, 0.1)
+    percentiles = np.clip(np.trunc(50 * (1 + np.tanh(ratio - 1))), 5, 99).astype(int)
+
+    # Radar chart data (normalized 0-100); certifications are smoothed so 0 vs 0 isn't a zero score
+    radar_ratio = scores / averages
+    cert = DIMENSIONS.index("certifications")
+    radar_ratio[:, cert] = (scores[:, cert] + 0.5) / (averages[cert] + 0.5)
+    radar = np.minimum(np.trunc(radar_ratio * 50), 100).astype(int)
+    return percentiles, radar, {
+        "cohort_averages": cohort_averages,
+        "cohort_type": prior_key if prior_key in COHORT_DATA else "general",
+        "cohort_source": "prior",
+        "cohort_size": 0,
+    }
+
+def _insights_template(role: str, branch: str, skills: str, experience_years: str, projects_count: str,
+                       certifications: str, education: str, overall_percentile: int) -> str:
+    return f"""You are a career benchmarking expert specializing in {branch} students targeting {role}.
+
+A {branch} student targeting {role} has these stats:
+- Skills: {skills}
+- Experience: {experience_years} years
+- Projects: {projects_count}
+- Certifications: {certifications}
+- Education: {education}
+- Branch: {branch}
+
+They are in the {overall_percentile}th percentile among peers targeting {role}.
+
+Provide:
+1. Competitive Analysis (how they compare to {branch} peers targeting {role})
+2. Top 3 areas where they lead peers
+3. Top 3 areas where peers outperform them
+4. Specific actions to reach 80th percentile
+5. What top 10% candidates in {role} typically have
+
+Keep it motivating, specific, and relevant to {branch} students."""
+
+def insights_prompt(req: BenchmarkRequest, overall_percentile: int, route: str = "/api/benchmarking/compare") -> str:
+    fields = req.model_dump(include={"role", "branch", "experience_years", "projects_count", "certifications", "education"})
+    return fit_prompt(route, lambda **t: _insights_template(overall_percentile=overall_percentile, **t),
+                      skills=Slot(req.skills), **fields)
+
+def _contributor(req: BenchmarkRequest) -> str:
+    return contributor_key(req.model_dump(exclude={"contribute"}))
+
+def _radar(radar_row) -> list:
+    return [{"dimension": RADAR_LABELS[dim], "you": int(v), "peer_avg": 50} for dim, v in zip(DIMENSIONS, radar_row)]
 
 @router.post("/compare")
 def peer_benchmark(req: BenchmarkRequest):
-    # Get role-specific cohort or default
-    role_key = req.role.lower().strip()
-    cohort_averages = COHORT_DATA.get(role_key, COHORT_DATA["default"])
-
     your_scores = {
         "skills_count": req.skills_count,
         "experience_years": req.experience_years,
@@ -40,55 +141,115 @@ def peer_benchmark(req: BenchmarkRequest):
         "certifications": req.certifications,
     }
 
-    # Calculate percentiles per dimension
-    percentiles = {}
-    for key in cohort_averages:
-        ratio = your_scores[key] / max(cohort_averages[key], 0.1)
-        # Sigmoid-like mapping for more realistic percentiles
-        import math
-        percentile = int(50 * (1 + math.tanh(ratio - 1)))
-        percentile = min(max(percentile, 5), 99)
-        percentiles[key] = percentile
-
-    overall_percentile = int(sum(percentiles.values()) / len(percentiles))
-
-    # Radar chart data (normalized 0-100)
-    radar_data = [
-        {"dimension": "Skills", "you": min(int(req.skills_count / cohort_averages["skills_count"] * 50), 100), "peer_avg": 50},
-        {"dimension": "Experience", "you": min(int(req.experience_years / cohort_averages["experience_years"] * 50), 100), "peer_avg": 50},
-        {"dimension": "Projects", "you": min(int(req.projects_count / cohort_averages["projects_count"] * 50), 100), "peer_avg": 50},
-        {"dimension": "Certifications", "you": min(int((req.certifications + 0.5) / (cohort_averages["certifications"] + 0.5) * 50), 100), "peer_avg": 50},
-    ]
-
-    prompt = f"""You are a career benchmarking expert specializing in {req.branch} students targeting {req.role}.
-
-A {req.branch} student targeting {req.role} has these stats:
-- Skills: {req.skills}
-- Experience: {req.experience_years} years
-- Projects: {req.projects_count}
-- Certifications: {req.certifications}
-- Education: {req.education}
-- Branch: {req.branch}
-
-They are in the {overall_percentile}th percentile among peers targeting {req.role}.
-
-Provide:
-1. Competitive Analysis (how they compare to {req.branch} peers targeting {req.role})
-2. Top 3 areas where they lead peers
-3. Top 3 areas where peers outperform them
-4. Specific actions to reach 80th percentile
-5. What top 10% candidates in {req.role} typically have
+    percentiles, radar, cohort = cohort_benchmark(req.role, req.branch, score_matrix([req]))
+    dimension_percentiles = {dim: int(p) for dim, p in zip(DIMENSIONS, percentiles[0])}
+    overall_percentile = int(percentiles[0].mean())
 
-Keep it motivating, specific, and relevant to {req.branch} students."""
+    # Compared against peers first, then counted as one (once per distinct profile)
+    contributed = req.contribute and cohort_store.add(req.role, req.branch, your_scores, _contributor(req))
 
-    ai_insights = ask_gemini(prompt)
+    ai_insights = ask_gemini(insights_prompt(req, overall_percentile), route="/api/benchmarking/compare")
 
     return {
         "overall_percentile": overall_percentile,
-        "dimension_percentiles": percentiles,
-        "cohort_averages": cohort_averages,
+        "dimension_percentiles": dimension_percentiles,
+        **cohort,
         "your_stats": your_scores,
-        "radar_data": radar_data,
+        "radar_data": _radar(radar[0]),
         "ai_insights": ai_insights,
-        "cohort_type": role_key if role_key in COHORT_DATA else "general",
+        "contributed": contributed,
+    }
+
+def _summary(values: np.ndarray) -> dict:
+    p25, median, p75 = np.percentile(values, [25, 50, 75])
+    return {"mean": round(float(values.mean()), 1), "p25": round(float(p25), 1),
+            "median": round(float(median), 1), "p75": round(float(p75), 1),
+            "min": round(float(values.min()), 1), "max": round(float(values.max()), 1)}
+
+@router.post("/compare-batch")
+async def peer_benchmark_batch(req: BatchBenchmarkRequest):
+    """
+    Benchmark a whole class in one pass: percentiles for every student and
+    dimension are computed per cohort as array lookups, then ranked and
+    summarized. AI insights only for `insights_for`, under a concurrency cap.
+    """
+    students = req.students
+    if not students:
+        return {"error": "Provide at least one student."}
+    if len(students) > MAX_BATCH_STUDENTS:
+        return {"error": f"Too many students. Maximum is {MAX_BATCH_STUDENTS} per batch."}
+
+    scores = score_matrix(students)
+    percentiles = np.zeros(scores.shape, dtype=int)
+    radar = np.zeros(scores.shape, dtype=int)
+    groups = {}    # (role, branch) → row indices; one sketch lookup per cohort
+    for i, s in enumerate(students):
+        groups.setdefault((role_key(s.role), branch_key(s.branch)), []).append(i)
+    cohorts, cohort_of = [], {}
+    for (role, branch), rows in groups.items():
+        percentiles[rows], radar[rows], meta = cohort_benchmark(role, branch, scores[rows])
+        cohorts.append({"role": role, "branch": branch, "students": len(rows), **meta})
+        cohort_of.update((i, meta) for i in rows)
+
+    overall = np.trunc(percentiles.mean(axis=1)).astype(int)
+    ranking = np.argsort(-overall, kind="stable")
+
+    table = []
+    for rank, i in enumerate(ranking, start=1):
+        s = students[i]
+        table.append({
+            "rank": rank,
+            "index": int(i),
+            "role": s.role,
+            "branch": s.branch,
+            "overall_percentile": int(overall[i]),
+            "dimension_percentiles": {dim: int(p) for dim, p in zip(DIMENSIONS, percentiles[i])},
+            "your_stats": {dim: getattr(s, dim) for dim in DIMENSIONS},
+            "radar_data": _radar(radar[i]),
+            "cohort_type": cohort_of[int(i)]["cohort_type"],
+            "cohort_source": cohort_of[int(i)]["cohort_source"],
+        })
+
+    # Optional AI insights for selected students only
+    selected = list(dict.fromkeys(i for i in req.insights_for if 0 <= i < len(students)))[:MAX_BATCH_INSIGHTS]
+    slots = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+
+    async def insight(i: int) -> str:
+        async with slots:
+            return await ask_gemini_async(insights_prompt(students[i], int(overall[i]), "/api/benchmarking/compare-batch"),
+                                          route="/api/benchmarking/compare-batch")
+
+    insights = await asyncio.gather(*[insight(i) for i in selected])
+    by_index = {row["index"]: row for row in table}
+    for i, text in zip(selected, insights):
+        by_index[i]["ai_insights"] = text
+
+    contributors = [s for s in students if s.contribute]
+    if contributors:
+        cohort_store.add_many([(s.role, s.branch, {dim: getattr(s, dim) for dim in DIMENSIONS}) for s in contributors],
+                              [_contributor(s) for s in contributors])
+
+    histogram, _ = np.histogram(overall, bins=np.arange(0, 101, 10))
+    return {
+        "students": len(students),
+        "ranking": table,
+        "distribution": {
+            "overall_percentile": {**_summary(overall), "histogram": histogram.tolist()},
+            "dimension_percentiles": {dim: _summary(percentiles[:, j]) for j, dim in enumerate(DIMENSIONS)},
+            "stats": {dim: _summary(scores[:, j]) for j, dim in enumerate(DIMENSIONS)},
+        },
+        "cohorts": cohorts,
     }
+
+@router.post("/cohorts/ingest")
+def ingest_profiles(req: IngestProfilesRequest):
+    """Bulk-load historical profiles (e.g. past placement batches) into the peer cohorts."""
+    if len(req.profiles) > MAX_INGEST_PROFILES:
+        return {"error": f"Too many profiles. Maximum is {MAX_INGEST_PROFILES} per request."}
+    cohort_store.add_many([(p.role, p.branch, p.model_dump(include=set(DIMENSIONS))) for p in req.profiles])
+    cohort_store.flush()
+    return {"ingested": len(req.profiles), **cohort_store.stats()}
+
+@router.get("/cohorts")
+def cohort_stats():
+    return cohort_store.stats()
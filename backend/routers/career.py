@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from agents.ai_helper import ask_gemini
+from agents.prompt_budget import Slot, fit_prompt
 
 router = APIRouter()
 
@@ -11,16 +12,16 @@ class CareerRequest(BaseModel):
     interests: str
     target_company_type: str = "Product Startup"
 
-@router.post("/guidance")
-def career_guidance(req: CareerRequest):
-    prompt = f"""You are an expert career counselor and industry analyst.
+def career_prompt(current_role: str, skills: str, experience_years: str, interests: str,
+                  target_company_type: str) -> str:
+    return f"""You are an expert career counselor and industry analyst.
 
 Student Profile:
-- Current Role/Background: {req.current_role}
-- Skills: {req.skills}
-- Years of Experience: {req.experience_years}
-- Interests: {req.interests}
-- Target Company Type: {req.target_company_type}
+- Current Role/Background: {current_role}
+- Skills: {skills}
+- Years of Experience: {experience_years}
+- Interests: {interests}
+- Target Company Type: {target_company_type}
 
 Provide comprehensive career guidance including:
 1. Top 3 Recommended Career Paths (with reasoning)
@@ -32,5 +33,13 @@ Provide comprehensive career guidance including:
 7. Networking Strategy
 
 Be specific, actionable, and encouraging."""
-    result = ask_gemini(prompt)
+
+@router.post("/guidance")
+def career_guidance(req: CareerRequest):
+    prompt = fit_prompt("/api/career/guidance", career_prompt, **{
+        **req.model_dump(),
+        "skills": Slot(req.skills, priority=2),
+        "interests": Slot(req.interests, priority=1),
+    })
+    result = ask_gemini(prompt, route="/api/career/guidance", cache_fields=req.model_dump())
     return {"guidance": result}
@@ -15,43 +15,64 @@ class GrowthRequest(BaseModel):
     target_role: str
     market_demand_score: int = 70  # 0-100, user-set or auto
 
-def advanced_growth_model(req: GrowthRequest) -> dict:
-    """Enhanced ANN-like model with market demand integration."""
-    edu_map = {"Diploma": 0.5, "BTech": 0.7, "MTech": 0.85, "MBA": 0.8, "PhD": 1.0}
-    edu_score = edu_map.get(req.education_level, 0.7)
-
-    # Normalized feature vector
-    features = np.array([
-        min(req.skills_count / 20, 1.0),
-        min(req.experience_years / 10, 1.0),
-        edu_score,
-        min(req.certifications / 5, 1.0),
-        min(req.projects_count / 10, 1.0),
-        1.0 if req.github_active else 0.4,
-        req.market_demand_score / 100,
+EDU_SCORES = {"Diploma": 0.5, "BTech": 0.7, "MTech": 0.85, "MBA": 0.8, "PhD": 1.0}
+W1 = np.array([0.18, 0.22, 0.15, 0.12, 0.13, 0.10, 0.10])   # Layer 1 weights (simulated ANN)
+YEARS = np.arange(6)                                           # 5-year trajectory incl. year 0
+MAX_BATCH_PROFILES = 20000
+
+class BatchGrowthRequest(BaseModel):
+    profiles: list[GrowthRequest]
+    include_trajectory: bool = True
+
+def feature_matrix(reqs: list) -> tuple:
+    """(N × 7 normalized features, N × 5 raw columns) for a list of GrowthRequest."""
+    raw = np.array([
+        (r.skills_count, r.experience_years, r.certifications, r.projects_count, r.market_demand_score)
+        for r in reqs
+    ], dtype=float).reshape(len(reqs), 5)
+    skills, experience, certs, projects, demand = raw.T
+    edu = np.array([EDU_SCORES.get(r.education_level, 0.7) for r in reqs])
+    github = np.array([1.0 if r.github_active else 0.4 for r in reqs])
+
+    features = np.column_stack([
+        np.minimum(skills / 20, 1.0),
+        np.minimum(experience / 10, 1.0),
+        edu,
+        np.minimum(certs / 5, 1.0),
+        np.minimum(projects / 10, 1.0),
+        github,
+        demand / 100,
     ])
+    return features, raw
 
-    # Layer 1 weights (simulated ANN)
-    w1 = np.array([0.18, 0.22, 0.15, 0.12, 0.13, 0.10, 0.10])
-    score = float(np.dot(features, w1)) * 100
-    score = min(max(score, 20), 97)
+def growth_model_batch(reqs: list) -> dict:
+    """Score N profiles at once; every output is an array over the batch."""
+    features, raw = feature_matrix(reqs)
+    skills, experience, certs, _, demand = raw.T
 
-    # Salary calculation
-    base = 3.5 + (req.experience_years * 1.8) + (req.skills_count * 0.35) + (req.certifications * 0.6)
-    demand_multiplier = 1 + (req.market_demand_score / 500)
-    current = base * demand_multiplier
+    score = np.clip(features @ W1 * 100, 20, 97)
 
-    # 5-year trajectory
-    trajectory = []
-    for yr in range(6):
-        growth_rate = 0.12 + (score / 1000)
-        salary = current * ((1 + growth_rate) ** yr)
-        trajectory.append({"year": f"Year {yr}", "salary": round(salary, 1)})
+    # Salary calculation
+    base = 3.5 + experience * 1.8 + skills * 0.35 + certs * 0.6
+    current = base * (1 + demand / 500)
 
-    # Risk level
-    risk = "Low" if score > 70 else "Medium" if score > 45 else "High"
+    # N × 6 trajectory matrix
+    growth_rate = 0.12 + score / 1000
+    trajectory = current[:, None] * (1 + growth_rate[:, None]) ** YEARS
 
+    levels = np.array(["Low", "Medium", "High"])
+    band = (score > 45).astype(int) + (score > 70)   # 0 = ≤45, 1 = 45-70, 2 = >70
     return {
+        "score": score,
+        "current": current,
+        "trajectory": trajectory,
+        "readiness": levels[band],
+        "risk": levels[2 - band],
+    }
+
+def format_prediction(batch: dict, i: int, include_trajectory: bool = True) -> dict:
+    score, current = float(batch["score"][i]), float(batch["current"][i])
+    prediction = {
         "growth_score": round(score / 10, 1),  # 0-10 scale
         "growth_score_100": round(score, 1),
         "current_salary_estimate": f"₹{round(current, 1)} LPA",
@@ -59,15 +80,21 @@ def advanced_growth_model(req: GrowthRequest) -> dict:
         "projected_salary_3yr": f"₹{round(current * 1.48, 1)} LPA",
         "projected_salary_5yr": f"₹{round(current * 1.85, 1)} LPA",
         "promotion_probability": f"{round(score * 0.82, 1)}%",
-        "readiness_level": "High" if score > 70 else "Medium" if score > 45 else "Low",
-        "risk_level": risk,
-        "salary_trajectory": trajectory,
+        "readiness_level": str(batch["readiness"][i]),
+        "risk_level": str(batch["risk"][i]),
     }
+    if include_trajectory:
+        prediction["salary_trajectory"] = [
+            {"year": f"Year {yr}", "salary": round(float(salary), 1)}
+            for yr, salary in zip(YEARS, batch["trajectory"][i])
+        ]
+    return prediction
 
-@router.post("/predict")
-def predict_growth(req: GrowthRequest):
-    prediction = advanced_growth_model(req)
+def advanced_growth_model(req: GrowthRequest) -> dict:
+    """Enhanced ANN-like model with market demand integration (N=1 of the batch model)."""
+    return format_prediction(growth_model_batch([req]), 0)
 
+def growth_tips(req: GrowthRequest) -> list:
     tips = []
     if req.certifications < 2:
         tips.append("Get 1-2 industry certifications (AWS, Google Cloud, etc.) — boosts salary by 15-20%")
@@ -81,10 +108,53 @@ def predict_growth(req: GrowthRequest):
         tips.append("Consider pivoting to higher-demand adjacent roles for better growth")
     if req.experience_years < 2:
         tips.append("Focus on internships and freelance projects to build real-world experience")
+    return tips
 
+@router.post("/predict")
+def predict_growth(req: GrowthRequest):
     return {
-        "prediction": prediction,
-        "growth_tips": tips,
+        "prediction": advanced_growth_model(req),
+        "growth_tips": growth_tips(req),
         "target_role": req.target_role,
         "market_demand_score": req.market_demand_score,
     }
+
+@router.post("/predict-batch")
+def predict_growth_batch(req: BatchGrowthRequest):
+    """
+    Score a whole cohort in one pass: features, scores, salary bases and the
+    N × 6 trajectory matrix are computed as array operations.
+    """
+    profiles = req.profiles
+    if not profiles:
+        return {"error": "Provide at least one profile."}
+    if len(profiles) > MAX_BATCH_PROFILES:
+        return {"error": f"Too many profiles. Maximum is {MAX_BATCH_PROFILES} per batch."}
+
+    batch = growth_model_batch(profiles)
+    score, current = batch["score"], batch["current"]
+    levels, counts = np.unique(batch["risk"], return_counts=True)
+    return {
+        "count": len(profiles),
+        "summary": {
+            "growth_score_100": {
+                "mean": round(float(score.mean()), 1),
+                "median": round(float(np.median(score)), 1),
+                "p10": round(float(np.percentile(score, 10)), 1),
+                "p90": round(float(np.percentile(score, 90)), 1),
+            },
+            "current_salary_lpa": {
+                "mean": round(float(current.mean()), 1),
+                "median": round(float(np.median(current)), 1),
+            },
+            "risk_levels": {str(level): int(n) for level, n in zip(levels, counts)},
+        },
+        "predictions": [
+            {
+                "target_role": p.target_role,
+                "prediction": format_prediction(batch, i, req.include_trajectory),
+                "growth_tips": growth_tips(p),
+            }
+            for i, p in enumerate(profiles)
+        ],
+    }
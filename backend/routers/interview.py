@@ -1,6 +1,10 @@
+import asyncio
 from fastapi import APIRouter
 from pydantic import BaseModel
-from agents.ai_helper import ask_gemini
+from agents.ai_helper import ask_gemini, ask_gemini_async, stream_gemini
+from agents.interview_sessions import format_turns, session_store, transcript_context
+from agents.prompt_budget import Slot, fit_prompt
+from agents.sse import sse_event, sse_response
 
 router = APIRouter()
 
@@ -19,52 +23,67 @@ class NextQuestionRequest(BaseModel):
     history: list = []  # list of {"question": ..., "answer": ...}
     question_number: int = 1
 
-@router.post("/start")
-def start_interview(req: InterviewStartRequest):
-    """Generate the first interview question."""
-    prompt = f"""You are a professional technical interviewer at a top tech company.
+class SessionAnswerRequest(BaseModel):
+    answer: str
+    evaluate: bool = True  # also score this answer (runs alongside the next question)
 
-You are interviewing a {req.experience_level} candidate for the role of: {req.role}
-Interview Type: {req.interview_type}
+SESSION_NOT_FOUND = {"error": "Interview session not found or expired. Start a new one."}
 
-Ask the FIRST interview question. Make it appropriate for {req.experience_level} level.
+def _start_template(role: str, experience_level: str, interview_type: str) -> str:
+    return f"""You are a professional technical interviewer at a top tech company.
+
+You are interviewing a {experience_level} candidate for the role of: {role}
+Interview Type: {interview_type}
+
+Ask the FIRST interview question. Make it appropriate for {experience_level} level.
 - If Technical: ask a core concept or problem-solving question
 - If Behavioral: ask a STAR-format situational question
 - If Mixed: start with a warm-up technical question
 
 Return ONLY the question text. No preamble, no "Question 1:", just the question itself."""
-    question = ask_gemini(prompt)
+
+def start_prompt(req: InterviewStartRequest) -> str:
+    return fit_prompt("/api/interview/start", _start_template, **req.model_dump())
+
+@router.post("/start")
+def start_interview(req: InterviewStartRequest):
+    """Generate the first interview question."""
+    question = ask_gemini(start_prompt(req), route="/api/interview/start")
     return {"question": question.strip(), "question_number": 1}
 
-@router.post("/next-question")
-def next_question(req: NextQuestionRequest):
-    """Generate the next interview question based on conversation history."""
-    history_text = "\n".join([
-        f"Q{i+1}: {h['question']}\nA: {h['answer']}"
-        for i, h in enumerate(req.history)
-    ])
-    prompt = f"""You are a professional technical interviewer for {req.role}.
+def _next_question_template(role: str, question_number: int, transcript: str) -> str:
+    return f"""You are a professional technical interviewer for {role}.
 
 Previous Q&A:
-{history_text}
+{transcript}
 
-Ask question #{req.question_number}. 
+Ask question #{question_number}. 
 - Build on previous answers if relevant
 - Progressively increase difficulty
 - Mix technical and behavioral questions
 - After 5 questions, ask a final "Do you have any questions for us?" type closing
 
 Return ONLY the question text. No preamble."""
-    question = ask_gemini(prompt)
+
+def _next_question_prompt(role: str, question_number: int, transcript: str) -> str:
+    return fit_prompt("/api/interview/next-question",
+                      lambda **t: _next_question_template(question_number=question_number, **t),
+                      role=role, transcript=Slot(transcript, keep_tail=True, dedupe=False))
+
+def next_question_prompt(req: NextQuestionRequest) -> str:
+    return _next_question_prompt(req.role, req.question_number, format_turns(req.history))
+
+@router.post("/next-question")
+def next_question(req: NextQuestionRequest):
+    """Generate the next interview question based on conversation history."""
+    question = ask_gemini(next_question_prompt(req), route="/api/interview/next-question")
     return {"question": question.strip(), "question_number": req.question_number}
 
-@router.post("/evaluate-answer")
-def evaluate_answer(req: EvaluateAnswerRequest):
-    """Evaluate a single interview answer with detailed scoring."""
-    prompt = f"""You are an expert interview evaluator for {req.role} positions.
+def _evaluate_answer_template(role: str, question: str, answer: str) -> str:
+    return f"""You are an expert interview evaluator for {role} positions.
 
-Question: {req.question}
-Candidate's Answer: {req.answer}
+Question: {question}
+Candidate's Answer: {answer}
 
 Evaluate this answer and return a JSON-like structured response with:
 
@@ -82,21 +101,23 @@ FEEDBACK:
 ❌ What was missing: [2-3 points]
 💡 Ideal answer would include: [key points]
 🎯 Tip to improve: [one actionable tip]"""
-    evaluation = ask_gemini(prompt)
+
+def evaluate_answer_prompt(req: EvaluateAnswerRequest) -> str:
+    return fit_prompt("/api/interview/evaluate-answer", _evaluate_answer_template, role=req.role,
+                      question=Slot(req.question, priority=2), answer=Slot(req.answer, priority=1))
+
+@router.post("/evaluate-answer")
+def evaluate_answer(req: EvaluateAnswerRequest):
+    """Evaluate a single interview answer with detailed scoring."""
+    evaluation = ask_gemini(evaluate_answer_prompt(req), route="/api/interview/evaluate-answer")
     return {"evaluation": evaluation, "question": req.question}
 
-@router.post("/final-report")
-def final_report(req: NextQuestionRequest):
-    """Generate a final interview performance report."""
-    history_text = "\n".join([
-        f"Q{i+1}: {h['question']}\nA: {h['answer']}"
-        for i, h in enumerate(req.history)
-    ])
-    prompt = f"""You are an expert interview coach evaluating a complete mock interview for {req.role}.
+def _final_report_template(role: str, transcript: str, scores: str = "") -> str:
+    return f"""You are an expert interview coach evaluating a complete mock interview for {role}.
 
 Full Interview Transcript:
-{history_text}
-
+{transcript}
+{scores}
 Generate a comprehensive final report:
 
 ## 🎯 Overall Performance
@@ -114,5 +135,169 @@ Generate a comprehensive final report:
 ## ❌ Areas to Improve (3 points)
 ## 📚 Study Recommendations (top 5 topics to revise)
 ## 🚀 Next Steps to Get Interview-Ready"""
-    report = ask_gemini(prompt)
+
+def _final_report_prompt(role: str, transcript: str, scores: str = "") -> str:
+    return fit_prompt("/api/interview/final-report", _final_report_template, role=role,
+                      transcript=Slot(transcript, keep_tail=True, dedupe=False), scores=Slot(scores, priority=2))
+
+def final_report_prompt(req: NextQuestionRequest) -> str:
+    return _final_report_prompt(req.role, format_turns(req.history))
+
+@router.post("/final-report")
+def final_report(req: NextQuestionRequest):
+    """Generate a final interview performance report."""
+    report = ask_gemini(final_report_prompt(req), route="/api/interview/final-report")
     return {"report": report, "role": req.role}
+
+# ── Streaming variants (SSE: `token` events, then `done` with the full text) ──
+def _stream(prompt: str, route: str, extra: dict):
+    async def events():
+        chunks = []
+        async for chunk in stream_gemini(prompt, route=route):
+            chunks.append(chunk)
+            yield sse_event("token", {"text": chunk})
+        yield sse_event("done", {"text": "".join(chunks).strip(), **extra})
+    return sse_response(events())
+
+@router.post("/start/stream")
+async def start_interview_stream(req: InterviewStartRequest):
+    return _stream(start_prompt(req), "/api/interview/start", {"question_number": 1})
+
+@router.post("/next-question/stream")
+async def next_question_stream(req: NextQuestionRequest):
+    return _stream(next_question_prompt(req), "/api/interview/next-question", {"question_number": req.question_number})
+
+@router.post("/evaluate-answer/stream")
+async def evaluate_answer_stream(req: EvaluateAnswerRequest):
+    return _stream(evaluate_answer_prompt(req), "/api/interview/evaluate-answer", {"question": req.question})
+
+@router.post("/final-report/stream")
+async def final_report_stream(req: NextQuestionRequest):
+    return _stream(final_report_prompt(req), "/api/interview/final-report", {"role": req.role})
+
+# ── Server-side sessions: the client sends only the new answer ──────────────
+def _session_transcript(session) -> str:
+    start, turns = session.recent_turns()
+    return transcript_context(session.summary, turns, start)
+
+def session_final_report_prompt(session) -> str:
+    scores = [f"Q{i + 1}: {s:g}/10" for i, s in enumerate(session.scores()) if s is not None]
+    scores_text = f"\nPer-answer scores: {', '.join(scores)}\n" if scores else ""
+    return _final_report_prompt(session.role, _session_transcript(session), scores_text)
+
+@router.post("/sessions")
+async def start_session(req: InterviewStartRequest):
+    """Open a server-side interview session and ask the first question."""
+    session = session_store.create(req.role, req.experience_level, req.interview_type)
+    question = await ask_gemini_async(start_prompt(req), route="/api/interview/start")
+    _set_question(session, question)
+    return {"session_id": session.id, "question": question.strip(), "question_number": 1}
+
+def _set_question(session, question: str) -> None:
+    # A failed call leaves no pending question; /next-question retries it
+    session.question = "" if question.startswith("AI Error") else question.strip()
+    session_store.save(session)
+
+def _session_next_prompt(session) -> str:
+    return _next_question_prompt(session.role, session.question_number, _session_transcript(session))
+
+@router.post("/sessions/{session_id}/next-question")
+async def session_next_question(session_id: str):
+    """Ask (or re-ask after a failure) the pending question without recording an answer."""
+    session = session_store.get(session_id)
+    if session is None:
+        return SESSION_NOT_FOUND
+    async with session_store.turn_lock(session.id):   # an answer in flight settles the question first
+        if not session.question:
+            question = await ask_gemini_async(_session_next_prompt(session), route="/api/interview/next-question")
+            _set_question(session, question)
+            if not session.question:
+                return {"session_id": session.id, "question": question.strip(), "question_number": session.question_number}
+    return {"session_id": session.id, "question": session.question, "question_number": session.question_number}
+
+@router.post("/sessions/{session_id}/answer")
+async def answer_question(session_id: str, req: SessionAnswerRequest):
+    """Record the answer to the pending question; evaluate it and ask the next one concurrently."""
+    session = session_store.get(session_id)
+    if session is None:
+        return SESSION_NOT_FOUND
+    answered = len(session.turns)
+    # Held until the answer is confirmed or undone: a double submit waits here and then
+    # finds the question answered, and compaction never saves the claimed turn
+    async with session_store.turn_lock(session.id):
+        if not session.question or len(session.turns) != answered:
+            return {"error": "No question is waiting for an answer in this session."}
+
+        # Claimed in memory only; saved once both calls succeed
+        turn = {"question": session.question, "answer": req.answer, "evaluation": None}
+        session.turns.append(turn)
+        session.question = ""
+
+        calls = [ask_gemini_async(_session_next_prompt(session), route="/api/interview/next-question")]
+        if req.evaluate:
+            evaluation_req = EvaluateAnswerRequest(role=session.role, question=turn["question"], answer=req.answer)
+            calls.append(ask_gemini_async(evaluate_answer_prompt(evaluation_req), route="/api/interview/evaluate-answer"))
+        try:
+            question, *evaluation = await asyncio.gather(*calls)
+        except Exception:
+            _restore_question(session, turn)
+            raise
+        failed = next((r for r in (question, *evaluation) if r.startswith("AI Error")), None)
+        if failed is not None:
+            # Nothing is recorded; the same answer can be submitted again
+            _restore_question(session, turn)
+            return {"session_id": session.id, "error": failed, "question": session.question,
+                    "question_number": session.question_number}
+
+        turn["evaluation"] = evaluation[0] if evaluation else None
+        _set_question(session, question)
+    session_store.schedule_compaction(session)
+    return {
+        "session_id": session.id,
+        "evaluation": turn["evaluation"],
+        "question": question.strip(),
+        "question_number": session.question_number,
+    }
+
+def _restore_question(session, turn: dict) -> None:
+    """Undo an unsaved answer: drop its turn and put the question back as pending."""
+    if session.turns and session.turns[-1] is turn:
+        session.turns.pop()
+    session.question = turn["question"]
+    session_store.save(session)
+
+@router.get("/sessions/{session_id}")
+def get_session(session_id: str):
+    session = session_store.get(session_id)
+    if session is None:
+        return SESSION_NOT_FOUND
+    return {
+        "session_id": session.id,
+        "role": session.role,
+        "question": session.question,
+        "question_number": session.question_number,
+        "turns": session.turns,
+        "scores": session.scores(),
+        "summary": session.summary,
+        "summarized_turns": session.summarized,
+    }
+
+@router.post("/sessions/{session_id}/final-report")
+async def session_final_report(session_id: str):
+    session = session_store.get(session_id)
+    if session is None:
+        return SESSION_NOT_FOUND
+    report = await ask_gemini_async(session_final_report_prompt(session), route="/api/interview/final-report")
+    return {"report": report, "role": session.role, "questions_answered": len(session.turns)}
+
+@router.post("/sessions/{session_id}/final-report/stream")
+async def session_final_report_stream(session_id: str):
+    session = session_store.get(session_id)
+    if session is None:
+        return SESSION_NOT_FOUND
+    return _stream(session_final_report_prompt(session), "/api/interview/final-report",
+                   {"role": session.role, "questions_answered": len(session.turns)})
+
+@router.delete("/sessions/{session_id}")
+def end_session(session_id: str):
+    return {"deleted": session_store.delete(session_id)}
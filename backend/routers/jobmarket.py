@@ -1,7 +1,10 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
-from agents.ai_helper import ask_gemini
-import json, re
+from agents.ai_helper import ask_gemini_async
+from agents.llm_scheduler import BATCH
+from agents.market_store import configured_locations, configured_roles, market_store
+from agents.prompt_budget import fit_prompt
+import json, math, re
 
 router = APIRouter()
 
@@ -9,11 +12,10 @@ class JobMarketRequest(BaseModel):
     role: str
     location: str = "India"
 
-@router.post("/insights")
-def job_market_insights(req: JobMarketRequest):
-    prompt = f"""You are a real-time job market analyst with deep knowledge of the tech industry.
+def insights_prompt(role: str, location: str) -> str:
+    return f"""You are a real-time job market analyst with deep knowledge of the tech industry.
 
-Analyze the current job market for: {req.role} in {req.location}
+Analyze the current job market for: {role} in {location}
 
 Provide:
 1. Market Demand (High/Medium/Low with reasoning)
@@ -28,15 +30,32 @@ Provide:
 10. Quick Tips to Stand Out
 
 Use current 2024-2025 market data."""
-    result = ask_gemini(prompt)
+
+async def _insights(role: str, location: str, refresh: bool = False) -> dict:
+    prompt = fit_prompt("/api/jobmarket/insights", insights_prompt, role=role, location=location)
+    result = await ask_gemini_async(prompt, route="/api/jobmarket/insights",
+                                    cache_fields={"role": role, "location": location}, refresh=refresh,
+                                    priority=BATCH if refresh else None)
     return {"insights": result}
 
-@router.post("/structured")
-def job_market_structured(req: JobMarketRequest):
-    """Returns structured JSON data for chart rendering."""
-    prompt = f"""You are a job market data analyst. Return ONLY valid JSON (no markdown, no explanation).
+async def _precompute_insights(role: str, location: str) -> dict | None:
+    payload = await _insights(role, location, refresh=True)
+    return None if payload["insights"].startswith("AI Error") else payload
+
+@router.post("/insights")
+async def job_market_insights(req: JobMarketRequest):
+    # Precomputed for common roles (see agents/market_store.py); computed live otherwise
+    payload = market_store.get("insights", req.role, req.location)
+    if payload is None:
+        payload = await _insights(req.role, req.location)
+        if not payload["insights"].startswith("AI Error"):
+            market_store.put("insights", req.role, req.location, payload)
+    return payload
+
+def structured_prompt(role: str, location: str) -> str:
+    return f"""You are a job market data analyst. Return ONLY valid JSON (no markdown, no explanation).
 
-Analyze the job market for: {req.role} in {req.location}
+Analyze the job market for: {role} in {location}
 
 Return this exact JSON structure:
 {{
@@ -63,15 +82,24 @@ Return this exact JSON structure:
   "openings_estimate": "12,000+"
 }}
 
-Fill with real data for {req.role} in {req.location}. Return ONLY the JSON object."""
-    
-    raw = ask_gemini(prompt)
+Fill with real data for {role} in {location}. Return ONLY the JSON object."""
+
+# Fields the charts and /trending-roles read; a reply without them is not stored
+STRUCTURED_KEYS = ("demand_level", "demand_score", "top_skills", "salary_ranges")
+
+async def _structured(role: str, location: str, refresh: bool = False) -> dict:
+    prompt = fit_prompt("/api/jobmarket/structured", structured_prompt, role=role, location=location)
+    raw = await ask_gemini_async(prompt, route="/api/jobmarket/structured",
+                                 cache_fields={"role": role, "location": location}, refresh=refresh,
+                                 priority=BATCH if refresh else None)
     # Try to parse JSON from response
     try:
         # Strip markdown code blocks if present
         clean = re.sub(r'```json|```', '', raw).strip()
         data = json.loads(clean)
-        return {"structured": data, "role": req.role, "location": req.location}
+        if not isinstance(data, dict) or any(k not in data for k in STRUCTURED_KEYS):
+            raise ValueError("unexpected JSON shape")
+        return {"structured": data, "role": role, "location": location}
     except Exception:
         # Fallback structured data
         return {
@@ -98,19 +126,70 @@ Fill with real data for {req.role} in {req.location}. Return ONLY the JSON objec
                 "interview_difficulty": "Medium",
                 "openings_estimate": "8,000+"
             },
-            "role": req.role,
-            "location": req.location,
+            "role": role,
+            "location": location,
             "raw_ai": raw
         }
 
+async def _precompute_structured(role: str, location: str) -> dict | None:
+    payload = await _structured(role, location, refresh=True)
+    return None if "raw_ai" in payload else payload
+
+@router.post("/structured")
+async def job_market_structured(req: JobMarketRequest):
+    """Returns structured JSON data for chart rendering."""
+    payload = market_store.get("structured", req.role, req.location)
+    if payload is None:
+        payload = await _structured(req.role, req.location)
+        if "raw_ai" not in payload:   # the fallback sample data is never stored
+            market_store.put("structured", req.role, req.location, payload)
+    return {**payload, "role": req.role, "location": req.location}
+
+market_store.register("insights", _precompute_insights)
+market_store.register("structured", _precompute_structured)
+
+
+STATIC_TRENDING_ROLES = [
+    {"role": "AI/ML Engineer", "demand": "Very High", "growth": "+45%", "avg_salary": "₹12-25 LPA"},
+    {"role": "Full Stack Developer", "demand": "High", "growth": "+30%", "avg_salary": "₹8-20 LPA"},
+    {"role": "DevOps Engineer", "demand": "High", "growth": "+35%", "avg_salary": "₹10-22 LPA"},
+    {"role": "Data Scientist", "demand": "High", "growth": "+28%", "avg_salary": "₹10-24 LPA"},
+    {"role": "Cloud Architect", "demand": "Very High", "growth": "+40%", "avg_salary": "₹15-35 LPA"},
+    {"role": "Cybersecurity Analyst", "demand": "High", "growth": "+38%", "avg_salary": "₹8-18 LPA"},
+]
+MIN_WARM_SHARE = 0.5   # of the configured roles that must be precomputed before they replace the static list
+
+def _demand_score(data: dict) -> float:
+    try:
+        return float(data.get("demand_score") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def _trending_entry(role: str, data: dict) -> dict:
+    salary = data.get("salary_ranges")
+    salary = salary if isinstance(salary, dict) else {}
+    entry, mid = salary.get("entry"), salary.get("mid")
+    entry, mid = (entry if isinstance(entry, dict) else {}), (mid if isinstance(mid, dict) else {})
+    avg_salary = None
+    if "min" in entry and "max" in mid:
+        unit = entry.get("unit", "LPA")
+        avg_salary = f"₹{entry['min']}-{mid['max']} {unit}" if unit == "LPA" else f"{entry['min']}-{mid['max']} {unit}"
+    return {"role": role, "demand": data.get("demand_level"), "growth": data.get("growth_trend"),
+            "avg_salary": avg_salary}
+
 @router.get("/trending-roles")
-def trending_roles():
-    roles = [
-        {"role": "AI/ML Engineer", "demand": "Very High", "growth": "+45%", "avg_salary": "₹12-25 LPA"},
-        {"role": "Full Stack Developer", "demand": "High", "growth": "+30%", "avg_salary": "₹8-20 LPA"},
-        {"role": "DevOps Engineer", "demand": "High", "growth": "+35%", "avg_salary": "₹10-22 LPA"},
-        {"role": "Data Scientist", "demand": "High", "growth": "+28%", "avg_salary": "₹10-24 LPA"},
-        {"role": "Cloud Architect", "demand": "Very High", "growth": "+40%", "avg_salary": "₹15-35 LPA"},
-        {"role": "Cybersecurity Analyst", "demand": "High", "growth": "+38%", "avg_salary": "₹8-18 LPA"},
-    ]
-    return {"trending_roles": roles}
+def trending_roles(location: str = ""):
+    """
+    The configured roles (PRECOMPUTE_ROLES) ranked by demand score from the
+    precomputed market data; the static list until enough of them are warm.
+    Roles users ask about ad hoc are cached but never ranked here.
+    """
+    location = location or configured_locations()[0]
+    roles = configured_roles()
+    stored = [(role, p["structured"]) for role, p in market_store.payloads("structured", location, roles)
+              if isinstance(p, dict) and isinstance(p.get("structured"), dict)]
+    if not stored or len(stored) < math.ceil(len(roles) * MIN_WARM_SHARE):
+        return {"trending_roles": STATIC_TRENDING_ROLES, "source": "static"}
+    stored.sort(key=lambda item: -_demand_score(item[1]))
+    return {"trending_roles": [_trending_entry(role, data) for role, data in stored[:10]],
+            "location": location, "source": "precomputed"}
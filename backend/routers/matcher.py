@@ -1,58 +1,80 @@
 from fastapi import APIRouter
-from pydantic import BaseModel
-from agents.ai_helper import ask_gemini
+from pydantic import BaseModel, model_validator
+from agents.ai_helper import ask_gemini, ask_gemini_async
+from agents.jd_index import get_index
+from agents.prompt_budget import Slot, fit_prompt
+from agents.skill_extractor import extract_skills
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-import re
+import asyncio
+import numpy as np
 
 router = APIRouter()
 
+MAX_AI_TOP_K    = 10
+MAX_BATCH_PAIRS = 5000   # resumes × job descriptions per /match-batch call
+
 class MatchRequest(BaseModel):
     resume_text: str
     job_description: str
 
+class BatchMatchRequest(BaseModel):
+    resume_text: str = ""          # one resume …
+    resumes: list[str] = []        # … or several (N×M scoring)
+    job_descriptions: list[str]
+    ai_top_k: int = 0              # AI analysis only for the best k pairs
+
+    @model_validator(mode="after")
+    def _cap_pairs(self):
+        pairs = max(1, len(self.resumes)) * len(self.job_descriptions)
+        if pairs > MAX_BATCH_PAIRS:
+            raise ValueError(f"{pairs} resume/job pairs requested; at most {MAX_BATCH_PAIRS} per call")
+        return self
+
+class JobPosting(BaseModel):
+    text: str
+    title: str = ""
+    company: str = ""
+
+class IngestJobsRequest(BaseModel):
+    jobs: list[JobPosting]
+
+class JobSearchRequest(BaseModel):
+    resume_text: str
+    top_k: int = 10
+
+# Word uni/bigram analyzer of the TF-IDF stage, built once
+_word_analyzer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2)).build_analyzer()
+
 def extract_keywords(text: str) -> list:
-    """Extract meaningful keywords from text."""
-    # Common tech keywords pattern
-    words = re.findall(r'\b[A-Za-z][A-Za-z0-9+#.]*\b', text)
-    # Filter short words and common stopwords
-    stopwords = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-                 'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were', 'be', 'been',
-                 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
-                 'should', 'may', 'might', 'must', 'shall', 'can', 'need', 'dare',
-                 'we', 'you', 'they', 'he', 'she', 'it', 'this', 'that', 'these', 'those'}
-    keywords = [w.lower() for w in words if len(w) > 2 and w.lower() not in stopwords]
-    return list(set(keywords))
+    """Canonical skills mentioned in the text (see agents/skill_extractor.py)."""
+    return extract_skills(text)
 
-@router.post("/match")
-def match_resume_jd(req: MatchRequest):
-    # TF-IDF Cosine Similarity
-    try:
-        vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2))
-        tfidf_matrix = vectorizer.fit_transform([req.resume_text, req.job_description])
-        cosine_sim = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-        numeric_score = round(float(cosine_sim) * 100, 1)
-    except Exception:
-        numeric_score = 0.0
+def tfidf_tokens(text: str, skills: list) -> list:
+    """Word n-grams plus one token per canonical skill, so synonyms ("ML" / "machine learning") line up."""
+    return _word_analyzer(text) + [f"skill:{s}" for s in skills]
 
-    # Keyword analysis
-    resume_keywords = set(extract_keywords(req.resume_text))
-    jd_keywords = set(extract_keywords(req.job_description))
-    matched = sorted(list(resume_keywords & jd_keywords))
-    missing = sorted(list(jd_keywords - resume_keywords))
+def skill_vectorizer() -> TfidfVectorizer:
+    """TF-IDF over tokens prepared by tfidf_tokens()."""
+    return TfidfVectorizer(analyzer=lambda tokens: tokens)
 
-    # Filter to meaningful keywords (length > 3)
-    matched = [k for k in matched if len(k) > 3][:20]
-    missing = [k for k in missing if len(k) > 3][:20]
+def keyword_overlap(resume_keywords: set, jd_keywords: set) -> tuple:
+    """(matched, missing) skill lists, capped at 20 each."""
+    matched = sorted(resume_keywords & jd_keywords)[:20]
+    missing = sorted(jd_keywords - resume_keywords)[:20]
+    return matched, missing
 
-    # AI analysis for qualitative insights
-    prompt = f"""You are an expert ATS (Applicant Tracking System) and resume matching specialist.
+def match_grade(score: float) -> str:
+    return "Excellent" if score >= 75 else "Good" if score >= 55 else "Fair" if score >= 35 else "Poor"
+
+def _analysis_template(resume_text: str, job_description: str, numeric_score: float) -> str:
+    return f"""You are an expert ATS (Applicant Tracking System) and resume matching specialist.
 
 Job Description:
-{req.job_description}
+{job_description}
 
 Resume:
-{req.resume_text}
+{resume_text}
 
 The TF-IDF cosine similarity match score is: {numeric_score}%
 
@@ -66,14 +88,145 @@ Provide a structured analysis:
 
 Be precise and reference specific keywords from the JD."""
 
-    ai_analysis = ask_gemini(prompt)
+def analysis_prompt(resume_text: str, job_description: str, numeric_score: float,
+                    route: str = "/api/matcher/match") -> str:
+    # The JD defines what matters, so the resume is trimmed first
+    return fit_prompt(route, lambda **t: _analysis_template(numeric_score=numeric_score, **t),
+                      resume_text=Slot(resume_text, priority=1), job_description=Slot(job_description, priority=2))
+
+@router.post("/match")
+def match_resume_jd(req: MatchRequest):
+    # One skill-extraction pass per document, reused by TF-IDF and keyword analysis
+    resume_skills = extract_keywords(req.resume_text)
+    jd_skills = extract_keywords(req.job_description)
+
+    # TF-IDF Cosine Similarity
+    try:
+        tfidf_matrix = skill_vectorizer().fit_transform([tfidf_tokens(req.resume_text, resume_skills),
+                                                         tfidf_tokens(req.job_description, jd_skills)])
+        cosine_sim = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+        numeric_score = round(float(cosine_sim) * 100, 1)
+    except Exception:
+        numeric_score = 0.0
+
+    # Keyword analysis
+    matched, missing = keyword_overlap(set(resume_skills), set(jd_skills))
+
+    # AI analysis for qualitative insights
+    ai_analysis = ask_gemini(analysis_prompt(req.resume_text, req.job_description, numeric_score),
+                             route="/api/matcher/match")
 
     return {
         "match_score": numeric_score,
-        "match_grade": "Excellent" if numeric_score >= 75 else "Good" if numeric_score >= 55 else "Fair" if numeric_score >= 35 else "Poor",
+        "match_grade": match_grade(numeric_score),
         "matched_keywords": matched,
         "missing_keywords": missing,
         "matched_count": len(matched),
         "missing_count": len(missing),
         "ai_analysis": ai_analysis,
     }
+
+def _score_pairs(resumes: list, jds: list) -> list:
+    """Every resume × JD pair with score and keyword overlap, best first."""
+    resume_skills = [extract_keywords(r) for r in resumes]
+    jd_skills = [extract_keywords(j) for j in jds]
+
+    try:
+        docs = [tfidf_tokens(t, k) for t, k in zip(resumes + jds, resume_skills + jd_skills)]
+        tfidf = skill_vectorizer().fit_transform(docs)
+        # Rows are L2-normalised, so the dot product is the cosine similarity
+        scores = (tfidf[:len(resumes)] @ tfidf[len(resumes):].T).toarray() * 100
+    except ValueError:
+        scores = np.zeros((len(resumes), len(jds)))  # empty vocabulary
+
+    resume_kw = [set(k) for k in resume_skills]
+    jd_kw = [set(k) for k in jd_skills]
+
+    order = np.argsort(-scores, axis=None, kind="stable")
+    results = []
+    for flat in order:
+        i, j = divmod(int(flat), len(jds))
+        score = round(float(scores[i, j]), 1)
+        matched, missing = keyword_overlap(resume_kw[i], jd_kw[j])
+        results.append({
+            "resume_index": i,
+            "jd_index": j,
+            "match_score": score,
+            "match_grade": match_grade(score),
+            "matched_keywords": matched,
+            "missing_keywords": missing,
+            "matched_count": len(matched),
+            "missing_count": len(missing),
+        })
+    return results
+
+@router.post("/match-batch")
+async def match_batch(req: BatchMatchRequest):
+    """
+    Score one (or N) resumes against M job descriptions in one pass:
+    a single TF-IDF fit over all documents and one sparse matrix product.
+    Returns every pair ranked by score; AI analysis only for the top `ai_top_k`.
+    """
+    resumes = req.resumes or [req.resume_text]
+    jds = req.job_descriptions
+    if not jds or not any(r.strip() for r in resumes):
+        return {"error": "Provide at least one resume and one job description."}
+
+    # Skill extraction and the TF-IDF fit are CPU-bound → off the event loop
+    results = await asyncio.to_thread(_score_pairs, resumes, jds)
+    top = results[:max(0, min(req.ai_top_k, MAX_AI_TOP_K))]
+    analyses = await asyncio.gather(*[
+        ask_gemini_async(analysis_prompt(resumes[r["resume_index"]], jds[r["jd_index"]], r["match_score"],
+                                         route="/api/matcher/match-batch"),
+                         route="/api/matcher/match-batch")
+        for r in top
+    ])
+    for r, analysis in zip(top, analyses):
+        r["ai_analysis"] = analysis
+
+    return {"pairs": len(results), "resumes": len(resumes), "job_descriptions": len(jds), "results": results}
+
+# ── Persistent job-description index ────────────────────────────────────────
+@router.post("/jobs")
+def ingest_jobs(req: IngestJobsRequest):
+    """Add postings to the persistent index (no refit; see agents/jd_index.py)."""
+    jobs = [{**job.model_dump(), "keywords": extract_keywords(job.text)} for job in req.jobs if job.text.strip()]
+    ids = get_index().add(jobs) if jobs else []
+    return {"added": len(ids), "ids": ids, "index": get_index().stats()}
+
+@router.delete("/jobs/{job_id}")
+def delete_job(job_id: int):
+    return {"deleted": get_index().delete(job_id), "index": get_index().stats()}
+
+@router.post("/jobs/compact")
+def compact_jobs():
+    """Fold pending adds/deletes into the on-disk arrays and refresh IDF norms."""
+    get_index().compact()
+    return {"index": get_index().stats()}
+
+@router.post("/jobs/search")
+def search_jobs(req: JobSearchRequest):
+    """Top-k stored postings for a resume, with scores and keyword overlap."""
+    index = get_index()
+    hits = index.search(req.resume_text, top_k=max(1, min(req.top_k, 100)))
+    postings = index.get([job_id for job_id, _ in hits])
+    resume_keywords = set(extract_keywords(req.resume_text))
+
+    results = []
+    for job_id, score in hits:
+        job = postings.get(job_id)
+        if job is None:
+            continue
+        matched, missing = keyword_overlap(resume_keywords, set(job["keywords"]))
+        score = round(score * 100, 1)
+        results.append({
+            "job_id": job_id,
+            "title": job["title"],
+            "company": job["company"],
+            "match_score": score,
+            "match_grade": match_grade(score),
+            "matched_keywords": matched,
+            "missing_keywords": missing,
+            "snippet": job["text"][:200],
+        })
+    return {"results": results, "index": index.stats()}
@@ -1,31 +1,68 @@
+from typing import Literal
 from fastapi import APIRouter
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from agents.pipeline import AgentPipeline
+from agents.sse import sse_event, sse_response
 
 router = APIRouter()
 
 class PipelineRequest(BaseModel):
     resume_text: str
     target_role: str
+    mode: Literal["dag", "fused"] = "dag"     # one call per agent | all agents in 1-2 JSON calls
+    fused_calls: int = Field(1, ge=1, le=2)   # fused mode only: 2 splits after the skill-gap agent
 
 @router.post("/run")
-def run_pipeline(req: PipelineRequest):
+async def run_pipeline(req: PipelineRequest):
     """
     Run the full multi-agent pipeline:
-    Resume Agent → Career Agent → Skill Gap Agent → Roadmap Agent → Interview Coach Agent
+    Resume Agent → Career Agent → Skill Gap Agent → (Roadmap Agent ∥ Interview Coach Agent)
+    Independent agents run concurrently; the response reports the critical path.
+    With mode="fused" all agents share one or two structured calls instead.
     """
     pipeline = AgentPipeline(
         resume_text=req.resume_text,
         target_role=req.target_role
     )
-    results = pipeline.run_all()
+    results = await pipeline.run_all_async(req.mode, req.fused_calls)
     return {
         "target_role": req.target_role,
+        "mode": req.mode,
         "agents": [
-            {"name": "Resume Agent", "icon": "📄", "output": results["resume_agent"]},
-            {"name": "Career Intelligence Agent", "icon": "🧭", "output": results["career_agent"]},
-            {"name": "Skill Gap Agent", "icon": "🎯", "output": results["skill_gap_agent"]},
-            {"name": "Roadmap Planner Agent", "icon": "🗺️", "output": results["roadmap_agent"]},
-            {"name": "Interview Coach Agent", "icon": "🎤", "output": results["interview_agent"]},
-        ]
+            {"name": node.name, "icon": node.icon, "output": results[node.key]}
+            for node in AgentPipeline.AGENTS
+        ],
+        "timings": pipeline.timings,
+        "critical_path": pipeline.critical_path(),
+        "repaired_sections": pipeline.repaired,
     }
+
+@router.post("/run-stream")
+async def run_pipeline_stream(req: PipelineRequest):
+    """
+    Same pipeline as /run, streamed as Server-Sent Events:
+    one `agent` event per agent as it finishes, then a final `done` event.
+    """
+    pipeline = AgentPipeline(
+        resume_text=req.resume_text,
+        target_role=req.target_role
+    )
+
+    async def events():
+        yield sse_event("start", {"target_role": req.target_role, "agents": [n.key for n in AgentPipeline.AGENTS]})
+        try:
+            async for node in pipeline.iter_agents(req.mode, req.fused_calls):
+                yield sse_event("agent", {
+                    "key": node.key,
+                    "name": node.name,
+                    "icon": node.icon,
+                    "output": pipeline.results[node.key],
+                    "timing": pipeline.timings[node.key],
+                })
+        except Exception as e:
+            yield sse_event("error", {"error": f"Pipeline failed: {str(e)}"})
+            return
+        yield sse_event("done", {"timings": pipeline.timings, "critical_path": pipeline.critical_path(),
+                                 "repaired_sections": pipeline.repaired})
+
+    return sse_response(events())
@@ -1,20 +1,36 @@
-from fastapi import APIRouter, UploadFile, File
+import asyncio
+import csv
+import io
+import json
+import zipfile
+from fastapi import APIRouter, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from agents.ai_helper import ask_gemini
+import numpy as np
+from agents.ai_helper import ask_gemini, ask_gemini_async
+from agents.llm_scheduler import LLMOverloaded
+from agents.pdf_extract import MAX_PDF_BYTES, extract_pdf
+from agents.prompt_budget import Slot, fit_prompt
+from agents.resume_store import content_hash, resume_store
+from routers.matcher import extract_keywords, keyword_overlap, match_grade, skill_vectorizer, tfidf_tokens
 
 router = APIRouter()
 
+MAX_BULK_FILES       = 500
+MAX_BULK_BYTES       = 250 * 1024 * 1024   # total uncompressed PDF bytes per batch
+BULK_LLM_CONCURRENCY = 4
+READ_CHUNK           = 1024 * 1024
+
 class ResumeRequest(BaseModel):
     resume_text: str
     target_role: str = ""
 
-@router.post("/evaluate")
-def evaluate_resume(req: ResumeRequest):
-    prompt = f"""You are an expert resume reviewer and career coach.
-Analyze the following resume for the target role: "{req.target_role}".
+def _evaluation_template(resume_text: str, target_role: str) -> str:
+    return f"""You are an expert resume reviewer and career coach.
+Analyze the following resume for the target role: "{target_role}".
 
 Resume:
-{req.resume_text}
+{resume_text}
 
 Provide a structured evaluation with:
 1. Overall Score (out of 100)
@@ -25,45 +41,243 @@ Provide a structured evaluation with:
 6. Recommended Improvements (actionable, specific)
 
 Format your response as clear sections with headers."""
-    result = ask_gemini(prompt)
+
+def evaluation_prompt(resume_text: str, target_role: str, route: str = "/api/resume/evaluate") -> str:
+    return fit_prompt(route, _evaluation_template, resume_text=Slot(resume_text), target_role=target_role)
+
+async def _extract_cached(contents: bytes) -> tuple:
+    """(content hash, extraction, cache hit?) — parses only unseen files."""
+    digest = content_hash(contents)
+    extracted = resume_store.get_extraction(digest)
+    if extracted is not None:
+        return digest, extracted, True
+    # Parsed in a worker process so big PDFs don't block other requests
+    extracted = await extract_pdf(contents)
+    resume_store.put_extraction(digest, extracted)
+    return digest, extracted, False
+
+async def _evaluate_cached(digest: str, text: str, target_role: str, route: str) -> tuple:
+    """(evaluation, cache hit?) keyed by (content hash, target role)."""
+    evaluation = resume_store.get_evaluation(digest, target_role)
+    if evaluation is not None:
+        return evaluation, True
+    evaluation = await ask_gemini_async(evaluation_prompt(text, target_role, route), route=route)
+    if not evaluation.startswith("AI Error"):
+        resume_store.put_evaluation(digest, target_role, evaluation)
+    return evaluation, False
+
+@router.post("/evaluate")
+def evaluate_resume(req: ResumeRequest):
+    result = ask_gemini(evaluation_prompt(req.resume_text, req.target_role), route="/api/resume/evaluate")
     return {"evaluation": result}
 
 @router.post("/upload")
 async def upload_resume_pdf(file: UploadFile = File(...), target_role: str = ""):
     """Extract text from uploaded PDF and evaluate it."""
     try:
-        import fitz  # PyMuPDF
-        contents = await file.read()
-        doc = fitz.open(stream=contents, filetype="pdf")
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        doc.close()
+        contents = await file.read(MAX_PDF_BYTES + 1)
+        if len(contents) > MAX_PDF_BYTES:
+            return {"error": f"PDF too large. Maximum size is {MAX_PDF_BYTES // (1024 * 1024)} MB."}
+
+        # Same bytes → same text: skip parsing (and the LLM call) on re-uploads
+        digest, extracted, extraction_hit = await _extract_cached(contents)
+        text = extracted["text"]
 
         if not text.strip():
             return {"error": "Could not extract text from PDF. Try a text-based PDF."}
 
         # Run evaluation on extracted text
-        prompt = f"""You are an expert resume reviewer and career coach.
-Analyze the following resume for the target role: "{target_role}".
-
-Resume:
-{text}
-
-Provide a structured evaluation with:
-1. Overall Score (out of 100)
-2. Key Strengths (3-5 bullet points)
-3. Critical Weaknesses (3-5 bullet points)
-4. ATS Optimization Tips (3 tips)
-5. Missing Keywords for the target role
-6. Recommended Improvements (actionable, specific)
-
-Format your response as clear sections with headers."""
-        evaluation = ask_gemini(prompt)
+        evaluation, evaluation_hit = await _evaluate_cached(digest, text, target_role, "/api/resume/upload")
         return {"extracted_text": text[:500] + "..." if len(text) > 500 else text,
                 "evaluation": evaluation,
-                "pages": len(doc) if not doc.is_closed else "N/A"}
+                "pages": extracted["pages"],
+                "truncated": extracted["truncated"],
+                "content_hash": digest,
+                "cache": {"extraction": "hit" if extraction_hit else "miss",
+                          "evaluation": "hit" if evaluation_hit else "miss"}}
     except ImportError:
         return {"error": "PyMuPDF not installed. Run: pip install PyMuPDF"}
+    except LLMOverloaded:
+        raise  # answered with 429 + Retry-After (see main.py)
     except Exception as e:
         return {"error": f"Failed to process PDF: {str(e)}"}
+
+# ── Bulk ingestion (placement cells) ────────────────────────────────────────
+def _unpack_zip(data: bytes, budget: int, max_files: int) -> tuple:
+    """
+    ([(name, pdf bytes)], bytes used) from a ZIP, skipping non-PDFs and
+    oversized members. Stops before the uncompressed total passes `budget`;
+    member sizes are checked before they are read.
+    """
+    files, used = [], 0
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(".pdf") or info.file_size > MAX_PDF_BYTES:
+                continue
+            if len(files) >= max_files or used + info.file_size > budget:
+                break
+            files.append((info.filename, zf.read(info)))
+            used += info.file_size
+    return files, used
+
+async def _read_capped(upload: UploadFile, limit: int) -> bytes | None:
+    """The upload's bytes, or None as soon as it passes `limit` (the rest is never read)."""
+    chunks, size = [], 0
+    while chunk := await upload.read(READ_CHUNK):
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+async def _collect_pdfs(uploads: list) -> list:
+    """[(name, pdf bytes)] within MAX_BULK_FILES / MAX_BULK_BYTES; whatever does not fit is dropped."""
+    files, budget = [], MAX_BULK_BYTES
+    for upload in uploads:
+        if len(files) >= MAX_BULK_FILES or budget <= 0:
+            break
+        name = upload.filename or "upload"
+        if name.lower().endswith(".zip"):
+            data = await _read_capped(upload, budget)
+            if data is None:
+                break
+            members, used = await asyncio.to_thread(_unpack_zip, data, budget, MAX_BULK_FILES - len(files))
+            files.extend(members)
+            budget -= used
+        else:
+            data = await _read_capped(upload, MAX_PDF_BYTES)
+            if data is None:
+                continue
+            if len(data) > budget:
+                break
+            files.append((name, data))
+            budget -= len(data)
+    return files
+
+def _score_batch(texts: list, job_description: str) -> tuple:
+    """Vectorized TF-IDF scores of every resume against the JD, plus skill lists."""
+    skills = [extract_keywords(t) for t in texts]
+    jd_skills = extract_keywords(job_description)
+    if not job_description.strip():
+        return np.zeros(len(texts)), skills, jd_skills
+    try:
+        docs = [tfidf_tokens(t, k) for t, k in zip(texts, skills)] + [tfidf_tokens(job_description, jd_skills)]
+        tfidf = skill_vectorizer().fit_transform(docs)
+        scores = (tfidf[:-1] @ tfidf[-1].T).toarray().ravel() * 100
+    except ValueError:
+        scores = np.zeros(len(texts))
+    return scores, skills, jd_skills
+
+CSV_COLUMNS = ["rank", "file", "pages", "match_score", "match_grade", "matched_keywords", "missing_keywords",
+               "evaluation", "error"]
+
+def _csv_values(row: dict, evaluation: str = "") -> list:
+    return [row["rank"], row["file"], row["pages"], row["match_score"], row["match_grade"],
+            "; ".join(row["matched_keywords"]), "; ".join(row["missing_keywords"]), evaluation, ""]
+
+@router.post("/bulk")
+async def bulk_upload(
+    files: list[UploadFile] = File(...),
+    job_description: str = Form(""),
+    target_role: str = Form(""),
+    evaluate: bool = Form(False),
+    output: str = Form("ndjson"),   # "ndjson" | "csv"
+):
+    """
+    Screen a batch of resumes (PDFs and/or ZIPs of PDFs).
+    Text is extracted in parallel across the PDF process pool, all resumes
+    are scored against the JD in one vectorized TF-IDF pass, and optional
+    LLM evaluations run under a concurrency cap. Results stream as NDJSON
+    (progress events) or CSV (one row per resume, as it completes).
+    """
+    pdfs = await _collect_pdfs(files)
+    as_csv = output.lower() == "csv"
+
+    async def rows():
+        if as_csv:
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+
+            def csv_line(values: list) -> str:
+                buf.seek(0)
+                buf.truncate()
+                writer.writerow(values)
+                return buf.getvalue()
+
+            yield csv_line(CSV_COLUMNS)
+        else:
+            yield json.dumps({"type": "start", "files": len(pdfs)}) + "\n"
+
+        # 1) Parallel extraction
+        async def extract(i: int, name: str, data: bytes):
+            try:
+                digest, extracted, _ = await _extract_cached(data)
+                return i, name, digest, extracted, None
+            except Exception as e:
+                return i, name, None, None, f"Failed to process PDF: {str(e)}"
+
+        extracted = [None] * len(pdfs)
+        for done in asyncio.as_completed([extract(i, n, d) for i, (n, d) in enumerate(pdfs)]):
+            i, name, digest, result, error = await done
+            extracted[i] = (name, digest, result, error)
+            if not as_csv:
+                yield json.dumps({"type": "extracted", "index": i, "file": name,
+                                  "pages": result["pages"] if result else None, "error": error}) + "\n"
+
+        # 2) Vectorized scoring
+        ok = [i for i, e in enumerate(extracted) if e[2] and e[2]["text"].strip()]
+        scores, skills, jd_skills = await asyncio.to_thread(
+            _score_batch, [extracted[i][2]["text"] for i in ok], job_description)
+        ranking = [ok[j] for j in np.argsort(-scores, kind="stable")]
+        position = {i: j for j, i in enumerate(ok)}
+        scored = {}
+        for rank, i in enumerate(ranking, start=1):
+            j = position[i]
+            matched, missing = keyword_overlap(set(skills[j]), set(jd_skills))
+            score = round(float(scores[j]), 1)
+            scored[i] = {"rank": rank, "file": extracted[i][0], "pages": extracted[i][2]["pages"],
+                         "match_score": score, "match_grade": match_grade(score),
+                         "matched_keywords": matched, "missing_keywords": missing}
+            if not as_csv:
+                yield json.dumps({"type": "score", "index": i, **scored[i]}) + "\n"
+
+        failed = [i for i in range(len(extracted)) if i not in scored]
+        if as_csv:
+            for i in failed:
+                name, _, result, error = extracted[i]
+                yield csv_line(["", name, result["pages"] if result else "", "", "", "", "", "",
+                                error or "No extractable text"])
+
+        # 3) Capped LLM evaluations, streamed as they finish
+        if evaluate and scored:
+            slots = asyncio.Semaphore(BULK_LLM_CONCURRENCY)
+
+            async def run(i: int):
+                async with slots:
+                    _, digest, result, _ = extracted[i]
+                    try:
+                        evaluation, _ = await _evaluate_cached(digest, result["text"], target_role, "/api/resume/bulk")
+                    except LLMOverloaded as e:
+                        evaluation = e.message   # the stream has started; report it per row
+                    return i, evaluation
+
+            for done in asyncio.as_completed([run(i) for i in ranking]):
+                i, evaluation = await done
+                if as_csv:
+                    yield csv_line(_csv_values(scored[i], evaluation))
+                else:
+                    yield json.dumps({"type": "evaluation", "index": i, "file": scored[i]["file"],
+                                      "evaluation": evaluation}) + "\n"
+        elif as_csv:
+            for i in ranking:
+                yield csv_line(_csv_values(scored[i]))
+
+        if not as_csv:
+            yield json.dumps({"type": "done", "files": len(pdfs), "scored": len(scored),
+                              "failed": len(failed)}) + "\n"
+
+    return StreamingResponse(
+        rows(),
+        media_type="text/csv" if as_csv else "application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=resumes.csv"} if as_csv else {},
+    )
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from agents.ai_helper import ask_gemini
+from agents.prompt_budget import Slot, fit_prompt
 
 router = APIRouter()
 
@@ -12,17 +13,16 @@ class RoadmapRequest(BaseModel):
     daily_hours: float = 2.0
     timeline: str = "3 months"
 
-@router.post("/generate")
-def generate_roadmap(req: RoadmapRequest):
-    total_hours = int(req.daily_hours * 7 * req.duration_weeks)
-    prompt = f"""You are an expert learning roadmap planner and career coach.
+def roadmap_prompt(target_role: str, current_skills: str, duration_weeks: str, experience_level: str,
+                   daily_hours: str, timeline: str, total_hours: str) -> str:
+    return f"""You are an expert learning roadmap planner and career coach.
 
-Create a personalized {req.duration_weeks}-week learning roadmap for:
-- Target Role: {req.target_role}
-- Current Skills: {req.current_skills or "None specified"}
-- Experience Level: {req.experience_level}
-- Daily Study Time: {req.daily_hours} hours/day
-- Timeline: {req.timeline}
+Create a personalized {duration_weeks}-week learning roadmap for:
+- Target Role: {target_role}
+- Current Skills: {current_skills or "None specified"}
+- Experience Level: {experience_level}
+- Daily Study Time: {daily_hours} hours/day
+- Timeline: {timeline}
 - Total Study Hours Available: ~{total_hours} hours
 
 Generate a detailed week-by-week plan. For EACH week/phase include:
@@ -32,9 +32,15 @@ Generate a detailed week-by-week plan. For EACH week/phase include:
 📚 Resources: [free resource name + link type]
 ⏱️ Hours: [estimated hours for this phase]
 
-Make it realistic for {req.daily_hours} hours/day.
+Make it realistic for {daily_hours} hours/day.
 Start from basics if Fresher, skip basics if Senior.
 End with a capstone portfolio project in the final 2 weeks.
 Be specific with technology names, not generic."""
-    result = ask_gemini(prompt)
+
+@router.post("/generate")
+def generate_roadmap(req: RoadmapRequest):
+    total_hours = int(req.daily_hours * 7 * req.duration_weeks)
+    prompt = fit_prompt("/api/roadmap/generate", roadmap_prompt, total_hours=total_hours,
+                        **{**req.model_dump(), "current_skills": Slot(req.current_skills)})
+    result = ask_gemini(prompt, route="/api/roadmap/generate", cache_fields=req.model_dump())
     return {"roadmap": result, "total_hours": total_hours, "daily_hours": req.daily_hours}
@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from agents.ai_helper import ask_gemini
+from agents.prompt_budget import Slot, fit_prompt
+from agents.skill_extractor import extract_skills
 
 router = APIRouter()
 
@@ -9,14 +11,13 @@ class SkillGapRequest(BaseModel):
     target_role: str
     experience_level: str = "Fresher"
 
-@router.post("/analyze")
-def analyze_skill_gap(req: SkillGapRequest):
-    prompt = f"""You are a technical skills assessment expert.
+def skill_gap_prompt(current_skills: str, target_role: str, experience_level: str) -> str:
+    return f"""You are a technical skills assessment expert.
 
 Candidate Profile:
-- Current Skills: {req.current_skills}
-- Target Role: {req.target_role}
-- Experience Level: {req.experience_level}
+- Current Skills: {current_skills}
+- Target Role: {target_role}
+- Experience Level: {experience_level}
 
 Perform a detailed skill gap analysis:
 1. Skills You Already Have (matched to role requirements) ✅
@@ -28,5 +29,10 @@ Perform a detailed skill gap analysis:
 7. Free Resources for Each Missing Skill
 
 Be precise and technical."""
-    result = ask_gemini(prompt)
-    return {"analysis": result}
+
+@router.post("/analyze")
+def analyze_skill_gap(req: SkillGapRequest):
+    prompt = fit_prompt("/api/skills/analyze", skill_gap_prompt,
+                        **{**req.model_dump(), "current_skills": Slot(req.current_skills)})
+    result = ask_gemini(prompt, route="/api/skills/analyze", cache_fields=req.model_dump())
+    return {"analysis": result, "detected_skills": extract_skills(req.current_skills)}
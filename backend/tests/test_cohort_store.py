@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from agents import cohort_store as cs
+from agents.cohort_store import CohortStore, contributor_key
+from agents.tdigest import TDigest
+
+PROFILE = {"skills_count": 8, "experience_years": 1.0, "projects_count": 3, "certifications": 1}
+
+
+def test_tdigest_quantiles_track_exact_percentiles():
+    values = np.random.default_rng(7).lognormal(size=20000)
+    digest = TDigest()
+    for v in values:
+        digest.add(v)
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        assert digest.quantile(q) == pytest.approx(np.quantile(values, q), rel=0.03)
+    assert digest.cdf(np.median(values)) == pytest.approx(0.5, abs=0.01)
+
+
+def test_tdigest_merge_and_roundtrip():
+    left, right = TDigest(), TDigest()
+    for v in range(1000):
+        (left if v % 2 else right).add(v)
+    merged = TDigest.from_dict(left.merge(right).to_dict())
+    assert merged.count == 1000
+    assert (merged.min, merged.max) == (0, 999)
+    assert merged.quantile(0.5) == pytest.approx(499.5, rel=0.02)
+
+
+def test_cohort_needs_min_size_and_falls_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(cs, "MIN_COHORT_SIZE", 3)
+    store = CohortStore(tmp_path / "cohorts.sqlite3")
+    store.add_many([("Data Analyst", "ECE", PROFILE)] * 2)
+    assert store.cohort("Data Analyst", "ECE") == ({}, None)
+    store.add("Data Analyst", "CSE", PROFILE)
+    sketches, label = store.cohort("data  analyst", "ece")
+    assert label == "data analyst"
+    assert sketches["skills_count"].count == 3
+
+
+def test_flushed_cohorts_are_shared(tmp_path, monkeypatch):
+    monkeypatch.setattr(cs, "MIN_COHORT_SIZE", 2)
+    path = tmp_path / "cohorts.sqlite3"
+    writer = CohortStore(path)
+    writer.add_many([("SWE", "CSE", PROFILE), ("SWE", "CSE", {**PROFILE, "skills_count": 12})])
+    writer.flush()
+    sketches, label = CohortStore(path).cohort("SWE", "CSE")
+    assert label == "swe / CSE"
+    assert sketches["skills_count"].quantile(1.0) == 12
+
+
+def test_repeat_contributions_are_counted_once(tmp_path):
+    path = tmp_path / "cohorts.sqlite3"
+    store = CohortStore(path)
+    key = contributor_key({"role": "SWE", "skills": "Python, SQL", **PROFILE})
+    assert key == contributor_key({"role": " swe ", "skills": "python,  sql", **PROFILE})
+    assert store.add("SWE", "CSE", PROFILE, key)
+    assert not store.add("SWE", "CSE", PROFILE, key)
+    assert not CohortStore(path).add("SWE", "CSE", PROFILE, key)   # another worker
+    other = contributor_key({"role": "SWE", "skills": "Python, SQL, AWS", **PROFILE})
+    assert store.add_many([("SWE", "CSE", PROFILE)] * 2, [key, other]) == 1
+    store.flush()
+    assert store._view(("swe", "CSE", "skills_count")).count == 2
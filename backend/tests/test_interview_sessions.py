@@ -0,0 +1,45 @@
+import asyncio
+import json
+
+from agents import interview_sessions
+from agents.interview_sessions import VERBATIM_TURNS, SessionStore
+
+
+def _turn(i: int) -> dict:
+    return {"question": f"Question {i}?", "answer": f"Answer {i}.", "evaluation": None}
+
+
+def test_compaction_never_saves_an_unconfirmed_turn(tmp_path, monkeypatch):
+    store = SessionStore(tmp_path)
+    session = store.create("Backend Developer", "Fresher", "Technical")
+    session.turns = [_turn(i) for i in range(VERBATIM_TURNS + 2)]
+    session.question = "Question pending?"
+    store.save(session)
+
+    async def summarize(prompt, route=None):
+        return "- notes"
+
+    monkeypatch.setattr(interview_sessions, "ask_gemini_async", summarize)
+
+    def on_disk() -> dict:
+        return json.loads((tmp_path / f"{session.id}.json").read_text(encoding="utf-8"))
+
+    async def run():
+        async with store.turn_lock(session.id):
+            # What answer_question does while its LLM calls are in flight
+            claimed = {"question": session.question, "answer": "Pending answer.", "evaluation": None}
+            session.turns.append(claimed)
+            session.question = ""
+            store.schedule_compaction(session)
+            await asyncio.sleep(0.01)
+            assert on_disk()["summarized"] == 0   # compaction is waiting for the answer to settle
+            session.turns.pop()
+            session.question = claimed["question"]
+            store.save(session)
+        await asyncio.gather(*store._tasks)
+
+    asyncio.run(run())
+    saved = on_disk()
+    assert saved["summarized"] > 0 and saved["summary"] == "- notes"
+    assert len(saved["turns"]) == VERBATIM_TURNS + 2
+    assert saved["question"] == "Question pending?"
@@ -0,0 +1,57 @@
+from agents.jd_index import JDIndex
+
+JOBS = [
+    {"title": "Backend Engineer", "text": "python django postgres rest api backend services"},
+    {"title": "Data Scientist", "text": "python pandas machine learning statistics models"},
+    {"title": "Frontend Engineer", "text": "react typescript css frontend web components"},
+]
+
+
+def test_search_ranks_matching_posting_first(tmp_path):
+    index = JDIndex(tmp_path)
+    ids = index.add(JOBS)
+    hits = index.search("django rest api in python", top_k=2)
+    assert hits[0][0] == ids[0]
+    assert len(hits) <= 2
+
+
+def test_delete_hides_posting(tmp_path):
+    index = JDIndex(tmp_path)
+    ids = index.add(JOBS)
+    assert index.delete(ids[2])
+    assert not index.delete(ids[2])
+    assert ids[2] not in [job_id for job_id, _ in index.search("react typescript frontend")]
+    assert index.stats()["postings"] == 2
+
+
+def test_add_delete_compact_reopen_search(tmp_path):
+    index = JDIndex(tmp_path)
+    ids = index.add(JOBS)
+    index.delete(ids[1])
+    index.compact()
+
+    reopened = JDIndex(tmp_path)
+    assert reopened.stats() == {"postings": 2, "indexed": 2, "pending": 0, "tombstones": 0}
+    hits = reopened.search("python backend api")
+    assert hits and hits[0][0] == ids[0]
+
+    # A tombstone left in the arrays is counted once and its terms leave the IDF
+    reopened.delete(ids[0])
+    again = JDIndex(tmp_path)
+    assert again.stats()["postings"] == 1
+    assert again.stats()["tombstones"] == 1
+    assert again.search("react frontend")[0][0] == ids[2]
+
+
+def test_pending_adds_survive_reopen(tmp_path):
+    JDIndex(tmp_path).add(JOBS)
+    reopened = JDIndex(tmp_path)
+    assert reopened.stats()["pending"] == 3
+    assert reopened.search("pandas statistics")[0][0] == 2
+
+
+def test_search_sees_postings_added_by_another_worker(tmp_path):
+    first, second = JDIndex(tmp_path), JDIndex(tmp_path)
+    ids = second.add(JOBS[:1])
+    assert first.search("django postgres")[0][0] == ids[0]
+    assert first.stats()["postings"] == 1
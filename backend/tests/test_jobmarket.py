@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from agents.market_store import MarketStore
+from routers import jobmarket
+
+STRUCTURED = {"demand_level": "High", "demand_score": 70, "top_skills": [],
+              "salary_ranges": {"entry": {"min": 4, "max": 8, "unit": "LPA"},
+                                "mid": {"min": 10, "max": 18, "unit": "LPA"}}}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = MarketStore(tmp_path / "market.sqlite3")
+    monkeypatch.setattr(jobmarket, "market_store", store)
+    return store
+
+
+def _reply(monkeypatch, text: str):
+    async def fake_ask(*args, **kwargs):
+        return text
+    monkeypatch.setattr(jobmarket, "ask_gemini_async", fake_ask)
+
+
+@pytest.mark.parametrize("reply", ['[{"role": "x"}]', '"High"', '{"demand_level": "High"}', "not json"])
+def test_unexpected_structured_replies_are_not_stored(store, monkeypatch, reply):
+    _reply(monkeypatch, reply)
+    payload = asyncio.run(jobmarket.job_market_structured(jobmarket.JobMarketRequest(role="Data Scientist")))
+    assert "raw_ai" in payload
+    assert store.payloads("structured", "India") == []
+
+
+def test_trending_skips_malformed_entries(store):
+    store.put("structured", "AI/ML Engineer", "India", {"structured": [1, 2]})
+    store.put("structured", "DevOps Engineer", "India", ["bad"])
+    assert jobmarket.trending_roles()["source"] == "static"
+
+
+def test_trending_ranks_only_configured_roles_once_warm(store, monkeypatch):
+    monkeypatch.setenv("PRECOMPUTE_ROLES", "Data Scientist,DevOps Engineer,Cloud Architect")
+    store.put("structured", "Underwater Basket Weaver", "India", {"structured": {**STRUCTURED, "demand_score": 99}})
+    store.put("structured", "Data Scientist", "India", {"structured": STRUCTURED})
+    assert jobmarket.trending_roles()["trending_roles"] == jobmarket.STATIC_TRENDING_ROLES
+
+    store.put("structured", "cloud  architect", "India", {"structured": {**STRUCTURED, "demand_score": 90}})
+    result = jobmarket.trending_roles()
+    assert result["source"] == "precomputed"
+    assert [r["role"] for r in result["trending_roles"]] == ["Cloud Architect", "Data Scientist"]
+    assert result["trending_roles"][1]["avg_salary"] == "₹4-18 LPA"
@@ -0,0 +1,144 @@
+import asyncio
+
+import httpx
+import pytest
+
+from agents import ai_helper
+from agents.llm_scheduler import BATCH, INTERACTIVE, STANDARD, LLMOverloaded, LLMScheduler, parse_rate_limits
+from agents.providers import Provider
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("Gemini=15/1000000, Groq=30/6000,bad,OpenAI=x/1") == {
+        "Gemini": (15.0, 1000000.0), "Groq": (30.0, 6000.0)}
+
+
+def test_rate_limits_are_off_by_default(monkeypatch):
+    monkeypatch.delenv("LLM_RATE_LIMITS", raising=False)
+    scheduler = LLMScheduler()
+    for _ in range(100):
+        assert asyncio.run(scheduler.acquire_rate("Groq", "hello", BATCH)) == 0.0
+    assert scheduler.snapshot()["providers"] == {}
+
+
+def test_configured_request_limit_falls_through(monkeypatch):
+    monkeypatch.setenv("LLM_RATE_LIMITS", "Groq=2/0")
+    scheduler = LLMScheduler()
+    assert asyncio.run(scheduler.acquire_rate("Groq", "hello", INTERACTIVE)) is not None
+    assert asyncio.run(scheduler.acquire_rate("Groq", "hello", INTERACTIVE)) is not None
+    assert asyncio.run(scheduler.acquire_rate("Groq", "hello", INTERACTIVE)) is None
+    assert scheduler.rate_wait(["Groq"], "hello", INTERACTIVE) > 0
+    assert scheduler.rate_wait(["Groq", "Gemini"], "hello", INTERACTIVE) is None
+
+
+def test_rate_is_charged_per_model_attempt(monkeypatch):
+    monkeypatch.setenv("LLM_RATE_LIMITS", "RateTest=10/0")
+    scheduler = LLMScheduler()
+    monkeypatch.setattr(ai_helper, "scheduler", scheduler)
+    calls = []
+
+    def reply(request):
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(429, json={"error": {"status": "RESOURCE_EXHAUSTED"}})
+        return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": "hi"}]}}]})
+
+    provider = Provider("RateTest", "gemini", "https://llm.test/models", ["model-a", "model-b"], api_key="k")
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(reply)) as client:
+            return await ai_helper._try_gemini(client, provider, "hello", INTERACTIVE)
+
+    assert asyncio.run(run()) == "hi"
+    assert len(calls) == 2
+    assert scheduler.snapshot()["providers"]["RateTest"]["requests_available"] == pytest.approx(8, abs=0.1)
+
+
+def test_slots_go_to_the_most_urgent_waiter(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "1")
+    scheduler = LLMScheduler()
+    order = []
+
+    async def call(priority: int, name: str, hold: asyncio.Event | None = None):
+        async with scheduler.slot(priority):
+            order.append(name)
+            if hold is not None:
+                await hold.wait()
+
+    async def run():
+        scheduler.bind(asyncio.get_running_loop())
+        hold = asyncio.Event()
+        first = asyncio.create_task(call(STANDARD, "first", hold))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(call(BATCH, "batch")), asyncio.create_task(call(INTERACTIVE, "interactive"))]
+        await asyncio.sleep(0)
+        hold.set()
+        await asyncio.gather(first, *waiters)
+
+    asyncio.run(run())
+    assert order == ["first", "interactive", "batch"]
+
+
+def test_full_queue_sheds_batch_for_interactive(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "1")
+    monkeypatch.setenv("LLM_MAX_QUEUE", "1")
+    scheduler = LLMScheduler()
+
+    async def call(priority: int, hold: asyncio.Event | None = None):
+        async with scheduler.slot(priority):
+            if hold is not None:
+                await hold.wait()
+        return priority
+
+    async def run():
+        scheduler.bind(asyncio.get_running_loop())
+        hold = asyncio.Event()
+        first = asyncio.create_task(call(STANDARD, hold))
+        await asyncio.sleep(0)
+        batch = asyncio.create_task(call(BATCH))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call(INTERACTIVE))
+        await asyncio.sleep(0)
+        with pytest.raises(LLMOverloaded):
+            await call(STANDARD)   # queue full of more urgent work → rejected at once
+        hold.set()
+        return await asyncio.gather(first, batch, interactive, return_exceptions=True)
+
+    first, batch, interactive = asyncio.run(run())
+    assert isinstance(batch, LLMOverloaded) and batch.retry_after >= 1
+    assert (first, interactive) == (STANDARD, INTERACTIVE)
+    assert scheduler.stats["batch"]["shed"] == 1
+    assert scheduler.stats["standard"]["rejected"] == 1
+
+
+def test_unbound_loop_bypasses_admission(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "1")
+    scheduler = LLMScheduler()
+
+    async def run():
+        async with scheduler.slot(BATCH):
+            async with scheduler.slot(BATCH):
+                return True
+
+    assert asyncio.run(run())
+
+
+def test_open_breaker_skips_openai_compatible_provider(monkeypatch):
+    monkeypatch.setattr(ai_helper, "scheduler", LLMScheduler())
+    calls = []
+
+    def reply(request):
+        calls.append(request.url.path)
+        return httpx.Response(401, json={"error": {"message": "bad key"}})
+
+    provider = Provider("BreakerTest", "openai", "https://llm.test/v1/chat/completions", ["model-a"], api_key="k")
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(reply)) as client:
+            first = await ai_helper._try_openai_compat(client, provider, "hello")
+            second = await ai_helper._try_openai_compat(client, provider, "hello")
+            return first, second
+
+    first, second = asyncio.run(run())
+    assert first is None and second is None
+    assert len(calls) == 1  # the 401 opened the breaker, so the second try never hit the network
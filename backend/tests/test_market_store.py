@@ -0,0 +1,20 @@
+from agents import market_store as ms
+from agents.market_store import MarketStore
+
+
+def test_demand_is_flushed_without_the_warmer(tmp_path):
+    store = MarketStore(tmp_path / "market.sqlite3")
+    for i in range(ms.DEMAND_BUFFER * 3):
+        store.get("insights", f"Role {i}", "India")
+        assert len(store._demand) < ms.DEMAND_BUFFER
+    store.get("insights", "Role 7", "India")
+    assert store.most_requested(1) == [("Role 7", "India")]
+
+
+def test_demand_is_capped_when_disk_is_unavailable(tmp_path, monkeypatch):
+    store = MarketStore(tmp_path / "market.sqlite3")
+    monkeypatch.setattr(store, "_conn", lambda: None)
+    monkeypatch.setattr(ms, "MAX_DEMAND_ROWS", 50)
+    for i in range(500):
+        store.get("insights", f"Role {i}", "India")
+    assert len(store._demand) <= 50 + ms.DEMAND_BUFFER
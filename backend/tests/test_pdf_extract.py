@@ -0,0 +1,39 @@
+import asyncio
+import os
+
+import pytest
+
+from agents import pdf_extract
+
+
+def _crash_on_bad(contents: bytes, *args) -> dict:
+    """Stand-in for the parser: dies like a segfaulting PyMuPDF on b"bad"."""
+    if contents == b"bad":
+        os._exit(1)
+    return {"text": contents.decode(), "pages": 1, "pages_read": 1, "truncated": False}
+
+
+@pytest.fixture
+def crashing_parser(monkeypatch):
+    monkeypatch.setattr(pdf_extract, "extract_pdf_text", _crash_on_bad)
+    yield
+    pdf_extract.shutdown()
+
+
+def test_crashed_worker_fails_only_its_file(crashing_parser):
+    async def run():
+        files = [b"one", b"bad", b"two", b"three"]
+        return await asyncio.gather(*[pdf_extract.extract_pdf(f) for f in files], return_exceptions=True)
+
+    one, bad, two, three = asyncio.run(run())
+    assert isinstance(bad, RuntimeError)
+    assert [r["text"] for r in (one, two, three)] == ["one", "two", "three"]
+
+
+def test_pool_is_usable_after_a_crash(crashing_parser):
+    async def run():
+        with pytest.raises(RuntimeError):
+            await pdf_extract.extract_pdf(b"bad")
+        return await pdf_extract.extract_pdf(b"fine")
+
+    assert asyncio.run(run())["text"] == "fine"
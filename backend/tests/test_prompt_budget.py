@@ -0,0 +1,43 @@
+from agents.prompt_budget import (TRIM_MARKER, Slot, estimate_tokens, fit_prompt, normalize_text, prompt_stats,
+                                  trim_to_tokens)
+
+
+def test_estimate_is_denser_for_non_ascii():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a" * 37, "openai") == 10
+    assert estimate_tokens("a" * 40, "gemini") == 10
+    assert estimate_tokens("नमस्ते दुनिया") > estimate_tokens("hello world")
+
+
+def test_normalize_drops_boilerplate_and_repeats():
+    text = ("Jane Doe   Resume\r\nPage 1 of 2\n-----\nBuilt a data pipeline in Python and SQL\n\n\n\n"
+            "Built a data pipeline in Python and SQL\nPython\nPython\n")
+    assert normalize_text(text) == "Jane Doe Resume\nBuilt a data pipeline in Python and SQL\n\nPython\nPython"
+    assert normalize_text("same line repeated here\nsame line repeated here", dedupe=False).count("same") == 2
+
+
+def test_trim_keeps_head_or_tail_within_budget():
+    text = " ".join(f"Sentence number {i} is here." for i in range(200))
+    head = trim_to_tokens(text, 50)
+    assert estimate_tokens(head) <= 50 and head.endswith(TRIM_MARKER) and head.startswith("Sentence number 0")
+    tail = trim_to_tokens(text, 50, keep_tail=True)
+    assert estimate_tokens(tail) <= 50 and tail.endswith("Sentence number 199 is here.")
+    assert trim_to_tokens("short", 50) == "short"
+
+
+def test_fit_prompt_trims_lowest_priority_first():
+    route = "/api/test/budget"
+    build = lambda resume, jd: f"Compare.\nJD:\n{jd}\nResume:\n{resume}"
+    jd = "We need Python and SQL. " * 20
+    resume = " ".join(f"Line {i} about my project work." for i in range(3000))
+    prompt = fit_prompt(route, build, resume=Slot(resume, priority=1), jd=Slot(jd, priority=2))
+    assert estimate_tokens(prompt) <= 3000
+    assert jd.strip() in prompt and TRIM_MARKER in prompt
+    stats = prompt_stats.snapshot()[route]
+    assert stats["trimmed"] == 1 and stats["max_before"] > stats["max_after"]
+
+
+def test_fit_prompt_respects_overrides(monkeypatch):
+    monkeypatch.setenv("PROMPT_BUDGETS", "/api/test/tiny=100")
+    prompt = fit_prompt("/api/test/tiny", lambda text: f"Summarize: {text}", text="word " * 1000)
+    assert estimate_tokens(prompt) <= 100
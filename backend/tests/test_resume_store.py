@@ -0,0 +1,42 @@
+import os
+
+from agents.resume_store import ResumeStore, content_hash
+
+EXTRACTION = {"text": "Python developer with Django experience", "pages": 1}
+
+
+def test_extraction_and_evaluations_roundtrip(tmp_path):
+    store = ResumeStore(tmp_path)
+    digest = content_hash(b"%PDF-1.4 resume")
+    assert digest == content_hash(b"%PDF-1.4 resume") != content_hash(b"%PDF-1.4 other")
+    assert store.get_extraction(digest) is None
+
+    store.put_extraction(digest, EXTRACTION)
+    store.put_evaluation(digest, "Backend  Developer", "Strong fit")
+    assert store.get_evaluation(digest, "backend developer") == "Strong fit"
+    assert store.get_evaluation(digest, "Data Scientist") is None
+
+    reopened = ResumeStore(tmp_path)
+    assert reopened.get_extraction(digest) == EXTRACTION
+    assert reopened.get_evaluation(digest, "BACKEND DEVELOPER") == "Strong fit"
+
+
+def test_evaluation_without_extraction_is_dropped(tmp_path):
+    store = ResumeStore(tmp_path)
+    store.put_evaluation("0" * 64, "SWE", "orphan")
+    assert store.get_evaluation("0" * 64, "SWE") is None
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    store = ResumeStore(tmp_path, max_bytes=10_000)
+    digests = [content_hash(bytes([i])) for i in range(3)]
+    for age, digest in enumerate(digests):
+        store.put_extraction(digest, {"text": "x" * 3000, "pages": 1})
+        os.utime(store._path(digest), (1000 + age, 1000 + age))
+    store.get_extraction(digests[0])   # touch the oldest → most recently used
+
+    store.put_extraction(content_hash(b"new"), {"text": "y" * 3000, "pages": 1})
+    assert store.get_extraction(digests[1]) is None
+    assert store.get_extraction(digests[0]) is not None
+    assert sum(f.stat().st_size for f in tmp_path.glob("*.json")) <= 10_000
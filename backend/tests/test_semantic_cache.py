@@ -0,0 +1,56 @@
+from agents.semantic_cache import SemanticCache
+
+INSIGHTS = "/api/jobmarket/insights"
+SKILLS = "/api/skills/analyze"
+
+
+def _cache_with(route: str, fields: dict) -> SemanticCache:
+    cache = SemanticCache()
+    cache.set(route, fields, "stored answer", ttl=60)
+    return cache
+
+
+def test_serves_paraphrased_free_text_fields():
+    cache = _cache_with(INSIGHTS, {"role": "Machine Learning Engineer", "location": "Bangalore"})
+    assert cache.get(INSIGHTS, {"role": "ML Engineer", "location": "Bengaluru"}) == "stored answer"
+
+
+def test_different_location_is_a_miss():
+    cache = _cache_with(INSIGHTS, {"role": "Data Scientist", "location": "India"})
+    assert cache.get(INSIGHTS, {"role": "Data Scientist", "location": "USA"}) is None
+
+
+def test_seniority_words_must_match():
+    cache = _cache_with(INSIGHTS, {"role": "Machine Learning Engineer", "location": "India"})
+    assert cache.get(INSIGHTS, {"role": "Machine Learning Engineer Intern", "location": "India"}) is None
+    cache = _cache_with(INSIGHTS, {"role": "Software Engineer", "location": "India"})
+    assert cache.get(INSIGHTS, {"role": "Senior Software Engineer", "location": "India"}) is None
+    cache = _cache_with(INSIGHTS, {"role": "Sr. Software Engineer", "location": "India"})
+    assert cache.get(INSIGHTS, {"role": "Senior Software Engineer", "location": "India"}) == "stored answer"
+
+
+def test_skill_lists_must_match_as_sets():
+    fields = {"current_skills": "Python, SQL, React, JavaScript, HTML, CSS, Git, Docker",
+              "target_role": "Full Stack Developer", "experience_level": "Fresher"}
+    cache = _cache_with(SKILLS, fields)
+    for extra in ("AWS", "Node.js"):
+        near = {**fields, "current_skills": fields["current_skills"] + f", {extra}"}
+        assert cache.get(SKILLS, near) is None
+    reordered = {**fields, "current_skills": "docker, git, css, html, javascript, react, sql, python"}
+    assert cache.get(SKILLS, reordered) == "stored answer"
+
+
+def test_exact_fields_and_numbers_must_match():
+    fields = {"current_skills": "Python", "target_role": "Data Analyst", "experience_level": "Fresher"}
+    cache = _cache_with(SKILLS, fields)
+    assert cache.get(SKILLS, {**fields, "experience_level": "Intermediate"}) is None
+    roadmap = "/api/roadmap/generate"
+    plan = {"target_role": "Data Analyst", "current_skills": "", "duration_weeks": 12,
+            "experience_level": "Fresher", "daily_hours": 2.0, "timeline": "3 months"}
+    cache = _cache_with(roadmap, plan)
+    assert cache.get(roadmap, {**plan, "duration_weeks": 16}) is None
+    assert cache.get(roadmap, dict(plan)) == "stored answer"
+
+
+def test_routes_without_threshold_are_disabled():
+    assert not SemanticCache().enabled("/api/resume/evaluate")
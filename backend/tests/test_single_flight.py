@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from agents import ai_helper
+from agents.llm_scheduler import LLMOverloaded
+
+ROUTE = "/api/test/uncached"   # no cache TTL → every call reaches single-flight
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Replace the provider chain with a slow fake that records each prompt it receives."""
+    state = {"release": None, "error": None, "calls": []}
+
+    async def fake_chain(client, prompt, route="", hedge=None, priority=None):
+        state["calls"].append(prompt)
+        await state["release"].wait()
+        if state["error"] is not None:
+            raise state["error"]
+        return f"answer to {prompt.strip()}"
+
+    monkeypatch.setattr(ai_helper, "_run_chain", fake_chain)
+    monkeypatch.setattr(ai_helper, "_new_client", lambda: _NullClient())
+    return state
+
+
+class _NullClient:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+async def _ask_many(state, prompts: list) -> list:
+    state["release"] = asyncio.Event()
+    tasks = [asyncio.create_task(ai_helper.ask_gemini_async(p, route=ROUTE)) for p in prompts]
+    await asyncio.sleep(0.01)
+    state["release"].set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_identical_prompts_share_one_upstream_call(upstream):
+    results = asyncio.run(_ask_many(upstream, ["same  prompt"] * 20 + [" same prompt\n"]))
+    assert upstream["calls"] == ["same  prompt"]
+    assert set(results) == {"answer to same  prompt"}
+    assert not ai_helper._inflight
+
+
+def test_different_prompts_are_not_coalesced(upstream):
+    results = asyncio.run(_ask_many(upstream, ["first", "second", "first"]))
+    assert sorted(upstream["calls"]) == ["first", "second"]
+    assert results == ["answer to first", "answer to second", "answer to first"]
+
+
+def test_errors_reach_every_waiter_and_are_not_kept(upstream):
+    upstream["error"] = LLMOverloaded(3)
+    results = asyncio.run(_ask_many(upstream, ["busy"] * 5))
+    assert all(isinstance(r, LLMOverloaded) for r in results)
+    upstream["error"] = None
+    assert asyncio.run(_ask_many(upstream, ["busy"])) == ["answer to busy"]
+    assert len(upstream["calls"]) == 2
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call(upstream):
+    async def run():
+        upstream["release"] = asyncio.Event()
+        leaving = asyncio.create_task(ai_helper.ask_gemini_async("shared", route=ROUTE))
+        staying = asyncio.create_task(ai_helper.ask_gemini_async("shared", route=ROUTE))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        await asyncio.sleep(0)
+        upstream["release"].set()
+        return await staying, leaving.cancelled()
+
+    assert asyncio.run(run()) == ("answer to shared", True)
+    assert upstream["calls"] == ["shared"]
@@ -0,0 +1,31 @@
+from agents.skill_extractor import SkillExtractor, extract_skills
+
+
+def test_multi_word_and_symbol_skills():
+    text = "Built ML models in Python3 and C++, shipped via CI/CD on AWS with k8s."
+    assert extract_skills(text) == ["machine learning", "python", "c++", "ci/cd", "aws", "kubernetes"]
+
+
+def test_whole_words_only():
+    assert extract_skills("JavaScript developer") == ["javascript"]
+    assert extract_skills("javascripting is not java") == ["java"]
+
+
+def test_longest_match_wins():
+    assert extract_skills("React Native apps") == ["react native"]
+
+
+def test_plain_english_is_not_a_skill():
+    assert extract_skills("I like to express my ideas in spring") == []
+    assert extract_skills("A swift learner who can excel under pressure and run containers of work") == []
+    assert extract_skills("Each node carries the torch to spark interest") == []
+
+
+def test_context_keeps_ambiguous_skills():
+    text = "Node.js with Express.js, Spring Boot services, Apache Spark jobs, MS Excel reports, SwiftUI apps"
+    assert extract_skills(text) == ["node.js", "express", "spring boot", "spark", "excel", "swift"]
+
+
+def test_counts_and_custom_taxonomy():
+    extractor = SkillExtractor({"go": ["golang", "go lang"]})
+    assert extractor.counts("Golang, go lang and golang again; go home") == {"go": 3}